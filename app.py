@@ -5,12 +5,12 @@ Fixed version with temporal sequence analysis and history system
 ============================================
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import (Flask, render_template, request, jsonify, Response, g, abort, send_from_directory,
+                   stream_with_context, url_for)
 import cv2
 import numpy as np
 import base64
 import io
-from PIL import Image
 import logging
 from datetime import datetime
 import torch
@@ -20,6 +20,37 @@ from collections import defaultdict, deque
 import torch.nn as nn
 from pathlib import Path
 import os
+import csv
+import json
+import re
+import hashlib
+import functools
+import math
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from motion_gate import MotionGate
+from hand_landmarks import parse_hand_landmarks
+from face_landmarks import LIP_KEY_IDS, LIP_LANDMARK_IDS, LipGeometry, face_bbox, mouth_bbox
+from correction_store import CorrectionStore
+from correction_engine import CorrectionEngine, load_confidence_adjustments
+from history_coalescer import HistoryCoalescer
+from history_retention import HistoryRetention, RetentionPolicy, configure_history_database
+from history_cache import HISTORY_COLUMNS, RecentHistory
+from history_search import FTS5_AVAILABLE, ensure_search_index, search_history as run_history_search
+from person_tracker import PersonTracker
+from model_registry import ModelRegistry
+from inference_scheduler import FairScheduler, Overloaded, SchedulerPolicy
+from model_lifecycle import LifecyclePolicy, ModelLifecycle, process_rss
+from capture_profile import CaptureProfiles, parse_roi, roi_to_frame
+from sampling_profiler import SamplingProfiler
+from build_static import BUNDLES, AssetManifest
+from speech_stream import SAMPLE_RATE, SpeechStreams
+from session_state import SessionStates, create_state_backend
+from history_remote import RemoteHistory
+from frame_protocol import FRAME_CONTENT_TYPE, PROTOCOL_VERSION, TextDeltaTracker, pack_frame
+from runtime_tuning import RuntimeProfile, apply_runtime_profile, load_runtime_profile, prepare_yolo, runtime_status
 
 # YOLOv11 Import
 try:
@@ -44,6 +75,11 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# History database location (overridable for benchmarks and batch tools)
+HISTORY_DB_PATH = os.environ.get("SIGNEASE_HISTORY_DB", "asl_history.db")
+# Set on every node but the one owning the history database (see history_remote.py)
+HISTORY_URL = os.environ.get("SIGNEASE_HISTORY_URL")
+
 
 # ============================================
 # DATABASE INITIALIZATION
@@ -52,7 +88,8 @@ app = Flask(__name__)
 def init_history_database():
     """Initialize SQLite database for conversion history"""
     try:
-        conn = sqlite3.connect("asl_history.db")
+        conn = sqlite3.connect(HISTORY_DB_PATH)
+        configure_history_database(conn)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -70,6 +107,15 @@ def init_history_database():
             )
         ''')
         
+        # Keyset pagination per type walks this index instead of scanning
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_history_type_id
+            ON conversion_history(conversion_type, id)
+        ''')
+        
+        # Full-text index kept in sync by triggers (backfilled on first run)
+        ensure_search_index(conn)
+        
         conn.commit()
         conn.close()
         logger.info("Database initialized successfully")
@@ -78,68 +124,163 @@ def init_history_database():
         logger.error(f"Database initialization error: {e}")
 
 
+# ============================================
+# FRAME DECODING
+# ============================================
+
+def decode_frame(image_data):
+    """Base64 data URL -> BGR frame (decoded straight to BGR, no PIL copy / color conversion)"""
+    image_bytes = base64.b64decode(image_data.split(',')[1])
+    frame = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode image")
+    return frame
+
+
 # ============================================
 # ASL RECOGNITION SYSTEM
 # ============================================
 
 class YOLODetector:
-    """YOLOv11 detector for ASL signs"""
+    """YOLOv11 detector for ASL signs (model versions served by a ModelRegistry)"""
     
-    def __init__(self, model_path="dataset/trained_model/best.pt"):
-        self.model_path = model_path
-        self.model = None
-        self.is_available = False
+    def __init__(self, model_path="dataset/trained_model/best.pt", runtime_profile=None):
+        self.default_model_path = model_path
         self.confidence_threshold = 0.65
-        self.class_names = []
+        self.runtime = runtime_profile or RuntimeProfile()
+        self.registry = ModelRegistry(
+            os.path.dirname(model_path) or ".",
+            loader=self.load_weights,
+            predict=self.run_model,
+            warmup_input=self.warmup_input
+        )
         
         if YOLO_AVAILABLE:
             self.load_model()
     
+    # The active snapshot is read once per call, so a swap never mixes versions
+    @property
+    def model(self):
+        active = self.registry.active
+        return active.model if active else None
+    
+    @property
+    def class_names(self):
+        active = self.registry.active
+        return active.class_names if active else []
+    
+    @property
+    def model_path(self):
+        active = self.registry.active
+        return active.path if active else self.default_model_path
+    
+    @property
+    def is_available(self):
+        return self.registry.active is not None
+    
+    @property
+    def input_size(self):
+        """Inference size (imgsz) the active model was trained with"""
+        imgsz = getattr(self.model, 'overrides', {}).get('imgsz') or 640
+        return max(imgsz) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+    
+    @staticmethod
+    def warmup_input():
+        return np.zeros((480, 640, 3), dtype=np.uint8)
+    
+    def load_weights(self, path):
+        model = prepare_yolo(YOLO(path), self.runtime, self.warmup_input())
+        return model, list(model.names.values())
+    
     def load_model(self):
-        """Load YOLO model"""
-        try:
-            if not os.path.exists(self.model_path):
-                logger.error(f"Model not found: {self.model_path}")
-                return False
-            
-            self.model = YOLO(self.model_path)
-            self.class_names = list(self.model.names.values())
-            self.is_available = True
-            logger.info(f"YOLO model loaded: {len(self.class_names)} classes")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Model loading error: {e}")
-            return False
+        """Load YOLO model (SIGNEASE_MODEL_PATH, else the registry's active version, else best.pt)"""
+        loaded = self.registry.load_initial(
+            override_path=os.environ.get("SIGNEASE_MODEL_PATH"),
+            default_path=self.default_model_path if os.path.exists(self.default_model_path) else None
+        )
+        if loaded:
+            logger.info(f"YOLO model loaded: {self.registry.active.version}, {len(self.class_names)} classes")
+        else:
+            logger.error(f"Model not found: {self.default_model_path}")
+        return loaded
+    
+    def run_model(self, model, class_names, image):
+        """Top detection of one model as (prediction, confidence)"""
+        return self.run_model_box(model, class_names, image)[:2]
+    
+    def run_model_box(self, model, class_names, image):
+        """Top detection of one model as (prediction, confidence, normalized [x1, y1, x2, y2] or None)"""
+        with self.runtime.inference_context():
+            results = model(image, conf=self.confidence_threshold, verbose=False)
+        
+        if len(results) > 0 and len(results[0].boxes) > 0:
+            box = results[0].boxes[0]
+            return class_names[int(box.cls[0])], float(box.conf[0]), box.xyxyn[0].tolist()
+        
+        return None, 0.0, None
     
     def detect(self, image):
         """Run detection on image"""
-        if not self.is_available or self.model is None:
-            return None, 0.0
+        return self.detect_box(image)[:2]
+    
+    def detect_box(self, image):
+        """Run detection on image: (prediction, confidence, normalized box or None)"""
+        if self.registry.active is None:
+            return None, 0.0, None
         
         try:
-            results = self.model(image, conf=self.confidence_threshold, verbose=False)
+            with model_lifecycle.use('yolo'):
+                active = self.registry.active
+                start = time.perf_counter()
+                prediction, confidence, box = self.run_model_box(active.model, active.class_names, image)
+            self.registry.maybe_shadow(image, prediction, time.perf_counter() - start)
+            return prediction, confidence, box
             
-            if len(results) > 0 and len(results[0].boxes) > 0:
-                box = results[0].boxes[0]
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-                prediction = self.class_names[class_id]
-                
-                return prediction, confidence
+        except Exception as e:
+            logger.error(f"Detection error: {e}")
+            return None, 0.0, None
+    
+    def detect_all(self, image, max_det=10):
+        """Run detection once and keep every box: [{prediction, confidence, bbox}]"""
+        if self.registry.active is None:
+            return []
+        
+        try:
+            with model_lifecycle.use('yolo'), self.runtime.inference_context():
+                active = self.registry.active
+                results = active.model(image, conf=self.confidence_threshold, max_det=max_det, verbose=False)
+            if len(results) == 0 or len(results[0].boxes) == 0:
+                return []
             
-            return None, 0.0
+            boxes = results[0].boxes
+            xyxy = boxes.xyxy.cpu().numpy()
+            confidences = boxes.conf.cpu().numpy()
+            class_ids = boxes.cls.cpu().numpy().astype(int)
+            return [
+                {
+                    "prediction": active.class_names[class_id],
+                    "confidence": float(confidence),
+                    "bbox": [float(v) for v in box]
+                }
+                for box, confidence, class_id in zip(xyxy, confidences, class_ids)
+            ]
             
         except Exception as e:
             logger.error(f"Detection error: {e}")
-            return None, 0.0
+            return []
 
 
 class ASLRecognitionSystem:
     """Main ASL recognition system"""
     
-    def __init__(self):
-        self.detector = YOLODetector()
+    def __init__(self, runtime_profile=None):
+        self.detector = YOLODetector(runtime_profile=runtime_profile)
+        # Compares the hand only: a changed hand shape barely changes a whole-frame thumbnail
+        self.motion_gate = MotionGate(thumb_size=(32, 32), region=self.hand_region)
+        # Cached detections belong to the old model after a swap
+        self.detector.registry.swap_listeners.append(lambda loaded: self.motion_gate.reset())
+        self.correction_store = CorrectionStore()
+        self.correction_engine = self.load_correction_engine()
         self.current_text = ""
         self.last_prediction = None
         self.last_time = 0
@@ -150,66 +291,131 @@ class ASLRecognitionSystem:
             'total_confidence': 0.0
         }
     
-    def process_image(self, image_data):
+    @staticmethod
+    def hand_region(detection, margin=0.25):
+        """Normalized box around the last detected hand (motion gate region)"""
+        box = detection[2]
+        if box is None:
+            return None
+        x1, y1, x2, y2 = box
+        pad_x, pad_y = (x2 - x1) * margin, (y2 - y1) * margin
+        return (x1 - pad_x, y1 - pad_y, x2 + pad_x, y2 + pad_y)
+    
+    def process_image(self, image_data, session_id="default", landmarks=None, person=None):
         """Process base64 image and return prediction"""
         try:
-            image_bytes = base64.b64decode(image_data.split(',')[1])
-            image = Image.open(io.BytesIO(image_bytes))
-            frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            prediction, confidence = self.detector.detect(frame)
-            
-            self.stats['total_detections'] += 1
-            
-            if prediction and confidence > self.detector.confidence_threshold:
-                self.stats['successful_detections'] += 1
-                self.stats['total_confidence'] += confidence
-                
-                current_time = time.time()
-                if current_time - self.last_time > self.cooldown:
-                    if prediction != self.last_prediction:
-                        self.current_text += prediction
-                        self.last_prediction = prediction
-                        self.last_time = current_time
-                
-                return {
-                    "prediction": prediction,
-                    "confidence": float(confidence),
-                    "current_text": self.current_text,
-                    "status": "success"
-                }
+            frame = decode_frame(image_data)
+        except Exception as e:
+            logger.error(f"Process image error: {e}")
+            return self.error_result(e, person)
+        return self.process_frame(frame, session_id, landmarks, person)
+    
+    def error_result(self, error, person=None):
+        return {
+            "prediction": "Error",
+            "confidence": 0.0,
+            "current_text": (person or self).current_text,
+            "status": "error",
+            "error": str(error)
+        }
+    
+    def process_frame(self, frame, session_id="default", landmarks=None, person=None):
+        """Predict on a decoded BGR frame (text of `person`, default: the single-signer buffer)"""
+        try:
+            # Reuse the last detection when the hand (or, without one, the frame) has barely changed
+            gate_hit, cached, signature = self.motion_gate.lookup(session_id, frame)
+            if gate_hit:
+                prediction, confidence, _ = cached
+            else:
+                start = time.perf_counter()
+                detection = self.detector.detect_box(frame)
+                self.motion_gate.store(session_id, signature, detection, time.perf_counter() - start, frame=frame)
+                prediction, confidence, _ = detection
             
-            return {
-                "prediction": "No Hand",
-                "confidence": 0.0,
-                "current_text": self.current_text,
-                "status": "no_detection"
-            }
+            prediction, confidence, corrected = self.correction_engine.apply(prediction, confidence, landmarks)
+            result = self.apply_prediction(prediction, confidence, person)
+            result["corrected"] = corrected
+            return result
             
         except Exception as e:
             logger.error(f"Process image error: {e}")
+            return self.error_result(e, person)
+    
+    def load_correction_engine(self):
+        """Index all stored corrections for nearest-neighbour lookups"""
+        engine = CorrectionEngine(classify_min_samples=int(os.environ.get("SIGNEASE_LANDMARK_MIN_SAMPLES", 20)),
+                                  classify_min_signs=int(os.environ.get("SIGNEASE_LANDMARK_MIN_SIGNS", 5)))
+        engine.confidence_adjustments = load_confidence_adjustments()
+        try:
+            if self.correction_store.count() == 0:
+                self.correction_store.migrate()
+            vectors, metadata = self.correction_store.load_all()
+            engine.add_many([m['actual'] for m in metadata], vectors[[m['vector_index'] for m in metadata]])
+            logger.info(f"Correction engine ready: {engine.size} vectors, {len(engine.label_names)} signs")
+        except Exception as e:
+            logger.error(f"Correction store error: {e}")
+        return engine
+    
+    def add_correction(self, predicted, actual, landmarks, reward=0.0):
+        """Store a user correction and index it immediately"""
+        self.correction_store.append(predicted, actual, landmarks, reward=reward)
+        self.correction_engine.add(actual, landmarks)
+    
+    def process_landmarks(self, landmarks, person=None):
+        """Classify client-extracted hand landmarks (21 x 3 floats)"""
+        if landmarks is None:
+            return self.apply_prediction(None, 0.0, person)
+        
+        prediction, confidence = self.correction_engine.classify(landmarks)
+        return self.apply_prediction(prediction, confidence, person)
+    
+    def apply_prediction(self, prediction, confidence, person=None):
+        """Update stats and text (of `person`, default: the single-signer buffer) and build the response"""
+        person = person or self
+        self.stats['total_detections'] += 1
+        
+        if prediction and confidence > self.detector.confidence_threshold:
+            self.stats['successful_detections'] += 1
+            self.stats['total_confidence'] += confidence
+            
+            current_time = time.time()
+            if current_time - person.last_time > self.cooldown:
+                if prediction != person.last_prediction:
+                    person.current_text += prediction
+                    person.last_prediction = prediction
+                    person.last_time = current_time
+            
             return {
-                "prediction": "Error",
-                "confidence": 0.0,
-                "current_text": self.current_text,
-                "status": "error",
-                "error": str(e)
+                "prediction": prediction,
+                "confidence": float(confidence),
+                "current_text": person.current_text,
+                "status": "success"
             }
+        
+        return {
+            "prediction": "No Hand",
+            "confidence": 0.0,
+            "current_text": person.current_text,
+            "status": "no_detection"
+        }
     
-    def clear_text(self):
+    def clear_text(self, person=None):
         """Clear current text"""
-        self.current_text = ""
-        self.last_prediction = None
+        person = person or self
+        person.current_text = ""
+        person.last_prediction = None
     
-    def add_space(self):
+    def add_space(self, person=None):
         """Add space to text"""
-        if self.current_text and not self.current_text.endswith(" "):
-            self.current_text += " "
+        person = person or self
+        if person.current_text and not person.current_text.endswith(" "):
+            person.current_text += " "
     
-    def backspace(self):
+    def backspace(self, person=None):
         """Remove last character"""
-        if self.current_text:
-            self.current_text = self.current_text[:-1]
+        person = person or self
+        if person.current_text:
+            person.current_text = person.current_text[:-1]
     
     def get_stats(self):
         """Get system statistics"""
@@ -223,7 +429,9 @@ class ASLRecognitionSystem:
             'average_confidence': avg_confidence,
             'model_path': self.detector.model_path,
             'total_classes': len(self.detector.class_names),
-            'available_signs': self.detector.class_names
+            'available_signs': self.detector.class_names,
+            'motion_gate': self.motion_gate.get_stats(),
+            'corrections': self.correction_engine.get_stats()
         }
 
 
@@ -234,13 +442,24 @@ class ASLRecognitionSystem:
 class ImprovedLipReadingDetector:
     """Improved lip reading with temporal sequence analysis"""
     
+    # Face mesh ids used for lip features (outer + inner contours; the key points alone also work)
+    LIP_LANDMARK_IDS = LIP_LANDMARK_IDS
+    LIP_KEY_IDS = LIP_KEY_IDS
+    
     def __init__(self):
         self.is_available = False
         self.face_mesh = None
+        self._geometry = threading.local()  # one preallocated lip buffer per request thread
+        self.face_mesh_lock = threading.Lock()  # the MediaPipe graph is not thread-safe
+        # Compares the mouth only: opening and closing it barely changes a whole-frame thumbnail
+        self.motion_gate = MotionGate(threshold=2.0, thumb_size=(32, 16), region=self.mouth_region)
         self.current_text = ""
         self.last_word = None
         self.last_word_time = 0
         self.word_cooldown = 2.0
+        self.committed_word = None  # word appended to current_text by the latest frame
+        self.face_box = None        # normalized full-frame face box of the latest frame (capture ROI)
+        self.last_geometry = None   # (time, openness, inner area) of the previous frame
         
         # Temporal tracking
         self.openness_history = deque(maxlen=30)
@@ -282,37 +501,49 @@ class ImprovedLipReadingDetector:
         except Exception as e:
             logger.error(f"MediaPipe initialization error: {e}")
     
-    def calculate_lip_features(self, landmarks):
-        """Calculate comprehensive lip features"""
-        # Key lip landmarks
-        upper_lip = landmarks[13]
-        lower_lip = landmarks[14]
-        left_corner = landmarks[61]
-        right_corner = landmarks[291]
-        
-        # Vertical openness
-        vertical_dist = abs(upper_lip.y - lower_lip.y)
-        
-        # Horizontal width
-        horizontal_dist = abs(left_corner.x - right_corner.x)
-        
-        # Openness ratio
-        openness = vertical_dist / (horizontal_dist + 1e-6)
-        
-        return {
-            'openness': openness,
-            'vertical': vertical_dist,
-            'horizontal': horizontal_dist
-        }
+    def release_face_mesh(self):
+        """Free the FaceMesh graph (reloaded by reload_face_mesh)"""
+        with self.face_mesh_lock:
+            if self.face_mesh is not None:
+                self.face_mesh.close()
+                self.face_mesh = None
+    
+    def reload_face_mesh(self):
+        """Recreate and warm up the FaceMesh graph"""
+        with self.face_mesh_lock:
+            if self.face_mesh is None:
+                self.initialize_mediapipe()
+                self.face_mesh.process(np.zeros((240, 320, 3), dtype=np.uint8))
+    
+    @staticmethod
+    def mouth_region(multi_face_landmarks, margin=0.25):
+        """Normalized box around the lips of a FaceMesh result (motion gate region)"""
+        if not multi_face_landmarks:
+            return None
+        x1, y1, x2, y2 = mouth_bbox(multi_face_landmarks[0].landmark, 1, 1)
+        pad = (x2 - x1) * margin
+        return (x1 - pad, y1 - pad, x2 + pad, y2 + pad)
     
-    def analyze_temporal_sequence(self):
+    def lip_geometry(self):
+        """This thread's preallocated lip landmark buffer"""
+        geometry = getattr(self._geometry, 'buffer', None)
+        if geometry is None:
+            geometry = self._geometry.buffer = LipGeometry()
+        return geometry
+    
+    def calculate_lip_features(self, landmarks, roi=None):
+        """Calculate comprehensive lip features (vectorized over the lip contours)"""
+        return self.lip_geometry().load(landmarks, roi).features()
+    
+    def analyze_temporal_sequence(self, person=None):
         """Analyze temporal sequence for word detection"""
-        if len(self.openness_history) < self.min_sequence_length:
+        person = person or self
+        if len(person.openness_history) < self.min_sequence_length:
             return None, 0.0
         
         # Calculate sequence statistics
-        openness_values = list(self.openness_history)
-        movement_values = list(self.movement_history)
+        openness_values = list(person.openness_history)
+        movement_values = list(person.movement_history)
         
         avg_openness = np.mean(openness_values)
         avg_movement = np.mean(movement_values)
@@ -348,59 +579,94 @@ class ImprovedLipReadingDetector:
         
         return best_match, best_score
     
-    def process_frame(self, frame):
-        """Process frame for lip reading"""
+    def process_frame(self, frame, session_id="default", roi=None, person=None):
+        """Process frame for lip reading (`roi`: where a cropped frame sits in the full frame)"""
+        person = person or self
+        person.committed_word = None
+        person.face_box = None
         if not self.is_available:
             return None, 0.0, None, "MediaPipe not available", {}
         
         self.stats['total_frames'] += 1
         
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.face_mesh.process(rgb_frame)
+            # Reuse the last face landmarks when the mouth has barely changed (landmarks of
+            # another crop region never match)
+            gate_key = session_id if roi is None else f"{session_id}:{','.join(map(str, roi))}"
+            gate_hit, multi_face_landmarks, signature = self.motion_gate.lookup(gate_key, frame)
+            if not gate_hit:
+                start = time.perf_counter()
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                with model_lifecycle.use('facemesh'), self.face_mesh_lock:
+                    multi_face_landmarks = self.face_mesh.process(rgb_frame).multi_face_landmarks
+                self.motion_gate.store(gate_key, signature, multi_face_landmarks,
+                                       time.perf_counter() - start, frame=frame)
             
-            if not results.multi_face_landmarks:
-                self.openness_history.clear()
-                self.movement_history.clear()
+            if not multi_face_landmarks:
+                person.openness_history.clear()
+                person.movement_history.clear()
                 return None, 0.0, None, "No face detected", {}
             
-            landmarks = results.multi_face_landmarks[0].landmark
+            landmarks = multi_face_landmarks[0].landmark
+            person.face_box = roi_to_frame(face_bbox(landmarks, 1, 1), roi)
+            
+            # Features and bbox are always in full-frame units
+            h, w = frame.shape[:2]
+            if roi is not None:
+                w, h = w / (roi[2] - roi[0]), h / (roi[3] - roi[1])
+            return self.process_landmarks(landmarks, w, h, person=person, roi=roi)
             
+        except Exception as e:
+            logger.error(f"Lip reading error: {e}")
+            return None, 0.0, None, f"Error: {str(e)}", {}
+    
+    def process_landmarks(self, landmarks, w, h, person=None, roi=None):
+        """Run temporal analysis on face landmarks (indexable by mesh id) for `person` (default: single speaker)"""
+        person = person or self
+        person.committed_word = None
+        try:
             # Calculate features
-            features = self.calculate_lip_features(landmarks)
+            features = self.calculate_lip_features(landmarks, roi)
+            current_time = time.time()
+            
+            # Velocities against the previous frame of this person
+            if person.last_geometry is not None:
+                last_time, last_openness, last_area = person.last_geometry
+                dt = max(current_time - last_time, 1e-3)
+                features['openness_velocity'] = (features['openness'] - last_openness) / dt
+                if last_area is not None and 'inner_area' in features:
+                    features['area_velocity'] = (features['inner_area'] - last_area) / dt
+            person.last_geometry = (current_time, features['openness'], features.get('inner_area'))
             
             # Update temporal history
-            self.openness_history.append(features['openness'])
+            person.openness_history.append(features['openness'])
             
-            if len(self.openness_history) >= 2:
-                movement = abs(self.openness_history[-1] - self.openness_history[-2])
-                self.movement_history.append(movement)
+            if len(person.openness_history) >= 2:
+                movement = abs(person.openness_history[-1] - person.openness_history[-2])
+                person.movement_history.append(movement)
             
             # Analyze sequence
-            word, confidence = self.analyze_temporal_sequence()
+            word, confidence = self.analyze_temporal_sequence(person)
             
             # Apply cooldown
-            current_time = time.time()
             if word and confidence > 0.65:
-                if current_time - self.last_word_time > self.word_cooldown:
-                    if word != self.last_word:
-                        self.current_text += word + " "
-                        self.last_word = word
-                        self.last_word_time = current_time
+                if current_time - person.last_word_time > self.word_cooldown:
+                    if word != person.last_word:
+                        person.current_text += word + " "
+                        person.last_word = word
+                        person.committed_word = word
+                        person.last_word_time = current_time
                         self.stats['words_detected'] += 1
                         self.stats['detections'] += 1
                         
                         # Clear history after detection
-                        self.openness_history.clear()
-                        self.movement_history.clear()
+                        person.openness_history.clear()
+                        person.movement_history.clear()
             
-            # Bounding box
-            h, w = frame.shape[:2]
-            x_coords = [landmarks[i].x * w for i in [61, 291, 13, 14]]
-            y_coords = [landmarks[i].y * h for i in [61, 291, 13, 14]]
-            bbox = [min(x_coords), min(y_coords), max(x_coords), max(y_coords)]
+            # Bounding box (from the buffer filled by calculate_lip_features)
+            bbox = self.lip_geometry().bbox(w, h)
             
-            status = f"Analyzing... ({len(self.openness_history)}/{self.min_sequence_length} frames)"
+            status = f"Analyzing... ({len(person.openness_history)}/{self.min_sequence_length} frames)"
             
             return word, confidence, bbox, status, features
             
@@ -408,32 +674,606 @@ class ImprovedLipReadingDetector:
             logger.error(f"Lip reading error: {e}")
             return None, 0.0, None, f"Error: {str(e)}", {}
     
-    def clear_text(self):
+    def process_client_landmarks(self, lip_points, w, h, person=None):
+        """Process lip landmarks extracted on the client (landmark upload mode)"""
+        person = person or self
+        person.committed_word = None
+        self.stats['total_frames'] += 1
+        
+        if lip_points is None:
+            person.openness_history.clear()
+            person.movement_history.clear()
+            return None, 0.0, None, "No face detected", {}
+        
+        return self.process_landmarks(lip_points, w, h, person=person)
+    
+    def clear_text(self, person=None):
         """Clear detected text"""
+        person = person or self
+        person.current_text = ""
+        person.last_word = None
+        person.last_geometry = None
+        person.openness_history.clear()
+        person.movement_history.clear()
+
+
+# ============================================
+# PER-SESSION STATE
+# ============================================
+
+# Stored through session_states, so any app node can continue a session
+
+class SignerState:
+    """Text buffer of one signer (a session, or one tracked person)"""
+    
+    STATE_FIELDS = ('current_text', 'last_prediction', 'last_time')
+    
+    def __init__(self):
+        self.current_text = ""
+        self.last_prediction = None
+        self.last_time = 0
+
+
+class SpeakerState:
+    """Temporal window and text buffer of one speaker (a session, or one tracked person)"""
+    
+    STATE_FIELDS = ('current_text', 'last_word', 'last_word_time', 'last_geometry',
+                    'openness_history', 'movement_history')
+    
+    def __init__(self):
         self.current_text = ""
         self.last_word = None
-        self.openness_history.clear()
-        self.movement_history.clear()
+        self.last_word_time = 0
+        self.committed_word = None
+        self.face_box = None        # set per frame, like committed_word (not stored)
+        self.last_geometry = None
+        self.openness_history = deque(maxlen=30)
+        self.movement_history = deque(maxlen=30)
+
+
+class PeopleTracks:
+    """Face and hand trackers of one shared-camera session"""
+    
+    STATE_FIELDS = ('faces', 'hands')
+    
+    def __init__(self):
+        self.faces = PersonTracker(prefix="P")
+        self.hands = PersonTracker(prefix="H")
+
+
+# ============================================
+# MULTI-PERSON RECOGNITION
+# ============================================
+
+class MultiPersonRecognizer:
+    """One YOLO pass and one FaceMesh pass per frame for everyone in view"""
+    
+    def __init__(self, asl, lip, states, max_people=4, hand_link_distance=0.35):
+        self.asl = asl
+        self.lip = lip
+        self.states = states
+        self.max_people = max_people
+        self.hand_link_distance = hand_link_distance  # max |hand x - face x| / frame width
+        self.face_mesh = None
+        # MediaPipe graphs are not thread-safe
+        self.lock = threading.Lock()
+    
+    def _get_face_mesh(self):
+        if self.face_mesh is None and MEDIAPIPE_AVAILABLE:
+            self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+                max_num_faces=self.max_people,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        return self.face_mesh
+    
+    def load_face_mesh(self):
+        with self.lock:
+            self._get_face_mesh()
+    
+    def release_face_mesh(self):
+        """Free the multi-face FaceMesh graph (created again on next use)"""
+        with self.lock:
+            if self.face_mesh is not None:
+                self.face_mesh.close()
+                self.face_mesh = None
+    
+    def process_frame(self, frame, session_id="default", lip_enabled=True):
+        """Recognize all hands and faces; returns a list of per-person results"""
+        h, w = frame.shape[:2]
+        
+        with model_lifecycle.use('multi_facemesh' if lip_enabled else None):
+            hands = self.asl.detector.detect_all(frame, max_det=self.max_people * 2)
+            
+            faces = []
+            if lip_enabled:
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                # Only the FaceMesh graph is shared; YOLO and the state work run concurrently
+                with self.lock:
+                    face_mesh = self._get_face_mesh()
+                    multi_face_landmarks = face_mesh.process(rgb_frame).multi_face_landmarks if face_mesh else None
+                for face in multi_face_landmarks or []:
+                    faces.append((face.landmark, face_bbox(face.landmark, w, h)))
+        
+        with self.states.session('people', session_id, PeopleTracks) as tracks:
+            face_ids, expired_faces = tracks.faces.update([bbox for _, bbox in faces], (w, h))
+            hand_ids, expired_hands = tracks.hands.update([d['bbox'] for d in hands], (w, h))
+        expired = [f"{session_id}:{person_id}" for person_id in expired_faces + expired_hands]
+        self.states.delete('signer', *expired)
+        self.states.delete('speaker', *expired)
+        
+        # Each hand belongs to the horizontally closest face, or is its own person
+        hand_people = [self._link_hand(detection['bbox'], face_ids, faces, w) or hand_id
+                       for hand_id, detection in zip(hand_ids, hands)]
+        speaker_keys = [f"{session_id}:{person_id}" for person_id in face_ids]
+        signer_keys = sorted({f"{session_id}:{person_id}" for person_id in hand_people})
+        with self.states.sessions('speaker', speaker_keys, SpeakerState) as speakers, \
+                self.states.sessions('signer', signer_keys, SignerState) as signers:
+            people = {}
+            for person_id, key, (landmarks, bbox) in zip(face_ids, speaker_keys, faces):
+                speaker = speakers[key]
+                word, confidence, _, status, _ = self.lip.process_landmarks(landmarks, w, h, person=speaker)
+                people[person_id] = {
+                    "person_id": person_id,
+                    "face_bbox": [int(v) for v in bbox],
+                    "lip": {
+                        "prediction": word if word else "Analyzing...",
+                        "confidence": float(confidence) if confidence else 0.0,
+                        "current_text": speaker.current_text,
+                        "committed_word": speaker.committed_word,
+                        "status": status
+                    }
+                }
+            
+            # A person with several hands keeps the most confident sign
+            for hand_id, person_id, detection in sorted(zip(hand_ids, hand_people, hands),
+                                                        key=lambda item: -item[2]['confidence']):
+                person = people.setdefault(person_id, {"person_id": person_id, "face_bbox": None, "lip": None})
+                if person.get("asl"):
+                    continue
+                signer = signers[f"{session_id}:{person_id}"]
+                result = self.asl.apply_prediction(detection['prediction'], detection['confidence'], person=signer)
+                result["bbox"] = [int(v) for v in detection['bbox']]
+                result["hand_id"] = hand_id
+                person["asl"] = result
+        
+        for person in people.values():
+            person.setdefault("asl", None)
+        return sorted(people.values(), key=lambda person: person["person_id"])
+    
+    def _link_hand(self, hand_bbox, face_ids, faces, width):
+        hand_x = (hand_bbox[0] + hand_bbox[2]) / 2
+        best_id, best_distance = None, self.hand_link_distance
+        for person_id, (_, face_bbox) in zip(face_ids, faces):
+            distance = abs(hand_x - (face_bbox[0] + face_bbox[2]) / 2) / width
+            if distance < best_distance:
+                best_id, best_distance = person_id, distance
+        return best_id
+    
+    def clear_text(self, session_id, person_id=None):
+        """Clear the text of one person or of everyone in a session; returns the cleared per-person keys"""
+        if person_id is None:
+            with self.states.session('people', session_id, PeopleTracks) as tracks:
+                person_ids = list(tracks.faces.tracks) + list(tracks.hands.tracks)
+        else:
+            person_ids = [person_id]
+        keys = [f"{session_id}:{person_id}" for person_id in person_ids]
+        self.states.delete('signer', *keys)
+        self.states.delete('speaker', *keys)
+        return keys
+
+
+# ============================================
+# FUSED PIPELINE
+# ============================================
+
+class FusedPipeline:
+    """ASL and lip reading on one uploaded frame: decode once, run YOLO and FaceMesh concurrently"""
+    
+    def __init__(self, asl, lip, workers=2):
+        self.asl = asl
+        self.lip = lip
+        # Lip reading runs here while the request thread runs YOLO
+        # (both release the GIL inside their native inference code)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fused-lip")
+        self.stats = {
+            'frames': 0,
+            'decode_time': 0.0,
+            'asl_time': 0.0,
+            'lip_time': 0.0,
+            'total_time': 0.0
+        }
+    
+    def _run_lip(self, frame, session_id, speaker):
+        speaker = speaker or self.lip
+        start = time.perf_counter()
+        word, confidence, bbox, status, features = self.lip.process_frame(frame, session_id, person=speaker)
+        return (word, confidence, bbox, status, features, speaker.committed_word), time.perf_counter() - start
+    
+    def process(self, image_data, session_id="default", landmarks=None, lip_enabled=True, signer=None, speaker=None):
+        """Returns (asl result, lip tuple or None, timing in ms); text goes to `signer` / `speaker` state"""
+        start = time.perf_counter()
+        frame = decode_frame(image_data)
+        decoded = time.perf_counter()
+        
+        lip_future = None
+        if lip_enabled and self.lip.is_available:
+            lip_future = self.executor.submit(self._run_lip, frame, session_id, speaker)
+        
+        asl_result = self.asl.process_frame(frame, session_id, landmarks, signer)
+        asl_time = time.perf_counter() - decoded
+        lip_result, lip_time = lip_future.result() if lip_future else (None, 0.0)
+        total_time = time.perf_counter() - start
+        
+        self.stats['frames'] += 1
+        self.stats['decode_time'] += decoded - start
+        self.stats['asl_time'] += asl_time
+        self.stats['lip_time'] += lip_time
+        self.stats['total_time'] += total_time
+        
+        timing = {
+            "decode_ms": round((decoded - start) * 1000, 2),
+            "asl_ms": round(asl_time * 1000, 2),
+            "lip_ms": round(lip_time * 1000, 2),
+            "total_ms": round(total_time * 1000, 2)
+        }
+        return asl_result, lip_result, timing
+    
+    def get_stats(self):
+        frames = self.stats['frames']
+        return {
+            'frames': frames,
+            **{key.replace('_time', '_ms'): round(value / frames * 1000, 2) if frames else 0.0
+               for key, value in self.stats.items() if key.endswith('_time')}
+        }
 
 
 # ============================================
 # INITIALIZE SYSTEMS
 # ============================================
 
-init_history_database()
-asl_system = ASLRecognitionSystem()
-lip_reading_system = ImprovedLipReadingDetector() if MEDIAPIPE_AVAILABLE else None
+# History is local, or forwarded to the node that owns the database
+history_remote = RemoteHistory(HISTORY_URL) if HISTORY_URL else None
+history_retention = recent_history = None
+if history_remote is None:
+    init_history_database()
+    history_retention = HistoryRetention(HISTORY_DB_PATH, RetentionPolicy.from_env())
+    # The history screen's default queries are answered from memory
+    recent_history = RecentHistory(HISTORY_DB_PATH,
+                                   per_type=int(os.environ.get("SIGNEASE_HISTORY_CACHE_ROWS", 200)),
+                                   refresh_interval=float(os.environ.get("SIGNEASE_HISTORY_CACHE_REFRESH", 300)))
+    history_retention.prune_listeners.append(recent_history.invalidate)
+    history_retention.start()
+# Per-session recognition state: in-process, or shared by all nodes (SIGNEASE_STATE_BACKEND)
+session_states = SessionStates(create_state_backend(os.environ.get("SIGNEASE_STATE_BACKEND"),
+                                                    ttl=int(os.environ.get("SIGNEASE_STATE_TTL", 3600))))
+# Torch thread counts / precision from the autotune file or SIGNEASE_RUNTIME_PROFILE
+runtime_profile = load_runtime_profile(os.environ.get("SIGNEASE_RUNTIME_PROFILE"))
+apply_runtime_profile(runtime_profile)
+# Models are unloaded when idle or under memory pressure and reloaded on next use
+model_lifecycle = ModelLifecycle(LifecyclePolicy.from_env())
+rss_before = process_rss()
+asl_system = ASLRecognitionSystem(runtime_profile)
+rss_after_yolo = process_rss()
+# Always created: landmark upload mode works without server-side MediaPipe
+lip_reading_system = ImprovedLipReadingDetector()
+rss_after_facemesh = process_rss()
+multi_person_system = MultiPersonRecognizer(asl_system, lip_reading_system, session_states)
+
+if asl_system.detector.is_available:
+    model_lifecycle.register('yolo', asl_system.detector.registry.reload_active,
+                             asl_system.detector.registry.unload_active,
+                             rss_bytes=rss_after_yolo - rss_before if rss_before is not None else None)
+    asl_system.detector.registry.swap_listeners.append(lambda loaded: model_lifecycle.mark_loaded('yolo'))
+if lip_reading_system.face_mesh is not None:
+    model_lifecycle.register('facemesh', lip_reading_system.reload_face_mesh, lip_reading_system.release_face_mesh,
+                             rss_bytes=rss_after_facemesh - rss_after_yolo if rss_before is not None else None)
+if MEDIAPIPE_AVAILABLE:
+    model_lifecycle.register('multi_facemesh', multi_person_system.load_face_mesh,
+                             multi_person_system.release_face_mesh, loaded=False)
+model_lifecycle.start()
+
+# Upload size follows the model input size, also across model swaps
+capture_profiles = CaptureProfiles()
+capture_profiles.set_base('asl', width=asl_system.detector.input_size, height=asl_system.detector.input_size)
+asl_system.detector.registry.swap_listeners.append(
+    lambda loaded: capture_profiles.set_base('asl', width=asl_system.detector.input_size,
+                                             height=asl_system.detector.input_size))
+fused_pipeline = FusedPipeline(asl_system, lip_reading_system)
+profiler = SamplingProfiler()
+text_deltas = TextDeltaTracker()
+# Default slots: as many concurrent inferences as the runtime profile's thread split allows
+inference_scheduler = FairScheduler(SchedulerPolicy.from_env(
+    slots=max(1, (os.cpu_count() or 1) // max(1, torch.get_num_threads()))))
+ADMIN_TOKEN = os.environ.get("SIGNEASE_ADMIN_TOKEN")
+
 
 # ============================================
 # FLASK ROUTES
 # ============================================
 
+def scheduled(cost=1.0, inference=True):
+    """Per-session rate limit and (for model endpoints) a fair-share inference slot"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            session_id = get_session_id(request.get_json(silent=True))
+            try:
+                if not inference:
+                    inference_scheduler.check_rate(session_id)
+                    return view(*args, **kwargs)
+                with inference_scheduler.admit(session_id, cost):
+                    return view(*args, **kwargs)
+            except Overloaded as e:
+                response = jsonify({"status": "error", "message": str(e), "reason": e.reason})
+                response.status_code = e.status
+                response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+                return response
+        return wrapper
+    return decorator
+
+
+HISTORY_ENDPOINTS = {'get_history', 'search_history', 'export_history', 'get_statistics', 'delete_history_entry',
+                     'save_history', 'clear_history', 'history_retention_status', 'history_retention_run'}
+
+
+@app.before_request
+def forward_history_request():
+    """On nodes without the history database, relay history requests to the node that has it"""
+    if history_remote is None or request.endpoint not in HISTORY_ENDPOINTS:
+        return None
+    try:
+        status, headers, body = history_remote.forward(request.method, request.full_path.rstrip('?'),
+                                                       request.get_data(), request.headers)
+        return Response(body, status=status, headers=headers)
+    except Exception as e:
+        logger.error(f"History forward error: {e}")
+        return jsonify({"status": "error", "message": f"History node unavailable: {e}"}), 502
+
+
+def admin_allowed():
+    """Admin endpoints: X-Admin-Token must match SIGNEASE_ADMIN_TOKEN; without a token, localhost only"""
+    if ADMIN_TOKEN:
+        return request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+
+@app.before_request
+def start_request_trace():
+    """Sample this request's thread when it carries X-Profile-Request"""
+    if request.headers.get('X-Profile-Request') and admin_allowed():
+        g.profile_trace = profiler.start_trace()
+
+
+@app.after_request
+def finish_request_trace(response):
+    handle = g.pop('profile_trace', None)
+    if handle is not None:
+        response.headers['X-Profile-Trace'] = profiler.finish_trace(handle)
+    return response
+
+
+@app.teardown_request
+def stop_request_trace(error=None):
+    """Stop the sampler of a request that ended without after_request (unhandled exception)"""
+    handle = g.pop('profile_trace', None)
+    if handle is not None:
+        logger.warning(f"Profiled request failed ({error}), trace {profiler.finish_trace(handle)}")
+
+
+def get_session_id(data=None):
+    """Client session id from the request body or X-Session-ID header"""
+    session_id = (data or {}).get('session_id') or request.headers.get('X-Session-ID') or "default"
+    return str(session_id)[:64]
+
+
+EXPORT_BATCH_SIZE = 500
+
+
+def history_row_to_dict(row, columns=HISTORY_COLUMNS):
+    """Map a conversion_history row tuple to a dict"""
+    return dict(zip(columns, row))
+
+
+def insert_history_entry(conversion_type, input_text, output_text, confidence, method, duration=0.0, metadata=None,
+                         timestamp=None):
+    """Insert one row into conversion_history"""
+    timestamp = timestamp if timestamp is not None else time.time()
+    conn = sqlite3.connect(HISTORY_DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO conversion_history 
+        (conversion_type, input_text, output_text, confidence, method, duration, metadata, timestamp, date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        conversion_type,
+        input_text,
+        output_text,
+        confidence,
+        method,
+        duration,
+        str(metadata or {}),
+        timestamp,
+        datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    ))
+    conn.commit()
+    if recent_history is not None:
+        # Read back as stored (column affinity), exactly as the SQL queries return it
+        row = cursor.execute(f"SELECT {', '.join(HISTORY_COLUMNS)} FROM conversion_history WHERE id = ?",
+                             (cursor.lastrowid,)).fetchone()
+        recent_history.add(history_row_to_dict(row))
+    conn.close()
+
+
+# Auto-saved recognitions are merged per session into one row per run
+history_coalescer = HistoryCoalescer(history_remote.insert if history_remote else insert_history_entry, max_gap=4.0)
+
+
+def autosave_asl_result(result, session_id="default", input_text='Camera Input', method='YOLOv11'):
+    """Auto-save an ASL prediction to history (coalesced into runs of the same sign)"""
+    if result.get('status') == 'success' and result.get('prediction') not in ['No Hand', 'Error', None]:
+        history_coalescer.observe(session_id, 'asl-to-text', result['prediction'],
+                                  result.get('confidence', 0.0), input_text, method)
+
+
+def autosave_lip_word(word, confidence, session_id="default", input_text='Lip Movement',
+                      method='MediaPipe + Pattern Matching'):
+    """Auto-save a committed lip reading word (joined into one utterance row per session)"""
+    if word:
+        history_coalescer.observe(session_id, 'lip-reading', word, confidence, input_text, method, join=True)
+
+
+def attach_capture_profile(response, pipeline, session_id, client_version=None):
+    """Add the capture profile to a prediction response when the client's copy is outdated"""
+    profile = capture_profiles.get(pipeline, session_id)
+    if profile['version'] != client_version:
+        response['capture_profile'] = profile
+    return response
+
+
+_metadata_cache = {}
+
+
+def session_metadata():
+    """Static data clients fetch once (class lists, vocabularies, thresholds) and its version"""
+    active = asl_system.detector.registry.active
+    key = (active.version if active else None, asl_system.detector.confidence_threshold,
+           lip_reading_system.is_available)
+    cached = _metadata_cache.get(key)
+    if cached is None:
+        metadata = {
+            "protocol": PROTOCOL_VERSION,
+            "frame_formats": ["json", "binary"],
+            "asl": {
+                "available": asl_system.detector.is_available,
+                "model_version": key[0],
+                "classes": asl_system.detector.class_names,
+                "confidence_threshold": asl_system.detector.confidence_threshold,
+                "cooldown": asl_system.cooldown
+            },
+            "lip": {
+                "available": lip_reading_system.is_available,
+                "detectable_words": list(lip_reading_system.word_patterns.keys()),
+                "min_required": lip_reading_system.min_sequence_length,
+                "word_cooldown": lip_reading_system.word_cooldown
+            }
+        }
+        version = hashlib.sha1(json.dumps(metadata, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        _metadata_cache.clear()
+        cached = _metadata_cache[key] = (metadata, version)
+    return cached
+
+
+def slim_frame_response(pipeline, session_id, data, prediction, confidence, bbox, status, text, capture=True):
+    """Per-frame response for handshaken clients: prediction, confidence, bbox, status and a text delta"""
+    frame = {
+        "prediction": prediction,
+        "confidence": round(float(confidence or 0.0), 4),
+        "status": status
+    }
+    if bbox:
+        frame["bbox"] = [int(v) for v in bbox]
+    delta = text_deltas.delta(pipeline, session_id, text, data.get('text_length'))
+    if delta is not None:
+        frame["text"] = delta
+    if data.get('metadata_version') != session_metadata()[1]:
+        frame["stale"] = True
+    if capture:
+        profile = capture_profiles.get(pipeline, session_id)
+        if profile['version'] != data.get('profile_version'):
+            frame["capture_profile"] = profile
+    
+    if data.get('format') == 'binary':
+        return Response(pack_frame(frame), mimetype=FRAME_CONTENT_TYPE)
+    return jsonify(frame)
+
+
+def build_lip_response(word, confidence, bbox, status, features, speaker):
+    """Per-frame lip reading response"""
+    return {
+        "prediction": word if word else "Analyzing...",
+        "confidence": float(confidence) if confidence else 0.0,
+        "current_text": speaker.current_text,
+        "status": status,
+        "bbox": [int(b) for b in bbox] if bbox else None,
+        "features": features,
+        "stats": lip_reading_system.stats,
+        "detectable_words": list(lip_reading_system.word_patterns.keys()),
+        "sequence_length": len(speaker.openness_history),
+        "min_required": lip_reading_system.min_sequence_length
+    }
+
+
+def parse_lip_landmarks(values):
+    """Uploaded lip points as x, y[, z] (40 contour points or the 4 key points) -> (N, 3) float32"""
+    flat = np.asarray(values, dtype=np.float32).reshape(-1)
+    for count in (len(LIP_LANDMARK_IDS), len(LIP_KEY_IDS)):
+        for dims in (2, 3):
+            if flat.size == count * dims:
+                if not np.all(np.isfinite(flat)):
+                    raise ValueError("Lip landmarks contain non-finite values")
+                points = np.zeros((count, 3), dtype=np.float32)
+                points[:, :dims] = flat.reshape(count, dims)
+                return points
+    raise ValueError(f"Expected {len(LIP_LANDMARK_IDS)} (or {len(LIP_KEY_IDS)}) lip points as x, y or x, y, z")
+
+
+# ============================================
+# STATIC ASSETS
+# ============================================
+
+ASSET_MAX_AGE = 365 * 24 * 3600
+static_assets = AssetManifest(os.path.join(app.static_folder, 'dist'))
+
+
+@app.context_processor
+def asset_helpers():
+    return {'asset_urls': asset_urls}
+
+
+def asset_urls(bundle):
+    """Fingerprinted bundle URL after `python build_static.py`, else the bundle's source files"""
+    entry = static_assets.get(bundle)
+    if entry:
+        return [url_for('serve_asset', filename=entry['file'])]
+    return [url_for('static', filename=source) for source in BUNDLES[bundle]]
+
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Built bundles: the precompressed variant the client accepts, cached as immutable"""
+    if not static_assets.has_file(filename):
+        abort(404)
+    
+    mimetype = mimetypes.guess_type(filename)[0]
+    encoding = next((e for e, suffix in (('br', '.br'), ('gzip', '.gz'))
+                     if request.accept_encodings[e]
+                     and os.path.exists(os.path.join(static_assets.dist_dir, filename + suffix))), None)
+    if encoding:
+        suffix = '.br' if encoding == 'br' else '.gz'
+        response = send_from_directory(static_assets.dist_dir, filename + suffix, mimetype=mimetype,
+                                       max_age=ASSET_MAX_AGE)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(static_assets.dist_dir, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
 @app.route('/')
 def index():
-    return render_template('index.html')
+    # The page only changes with a new build: let browsers revalidate it with an ETag
+    response = app.make_response(render_template('index.html'))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @app.route('/predict_asl', methods=['POST'])
+@scheduled()
 def predict_asl():
     """Main ASL prediction endpoint with auto-save"""
     try:
@@ -443,40 +1283,128 @@ def predict_asl():
         if not image_data:
             return jsonify({"error": "No image data"}), 400
         
-        result = asl_system.process_image(image_data)
+        # Optional client-side hand landmarks enable nearest-neighbour corrections
+        try:
+            landmarks = parse_hand_landmarks(data['landmarks']) if data.get('landmarks') else None
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
         
-        if result.get('prediction') and result.get('prediction') not in ['No Hand', 'Error', None]:
-            try:
-                conn = sqlite3.connect("asl_history.db")
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO conversion_history 
-                    (conversion_type, input_text, output_text, confidence, method, duration, metadata, timestamp, date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    'asl-to-text',
-                    'Camera Input',
-                    result.get('prediction', ''),
-                    result.get('confidence', 0.0),
-                    'YOLOv11',
-                    0.0,
-                    str({"sign": result.get('prediction')}),
-                    time.time(),
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                ))
-                conn.commit()
-                conn.close()
-            except Exception as save_error:
-                logger.warning(f"Failed to auto-save history: {save_error}")
+        session_id = get_session_id(data)
+        with session_states.session('asl', session_id, SignerState) as signer:
+            result = asl_system.process_image(image_data, session_id, landmarks, signer)
+        autosave_asl_result(result, session_id)
         
-        return jsonify(result)
+        if data.get('slim'):
+            return slim_frame_response('asl', session_id, data, result['prediction'], result['confidence'], None,
+                                       result['status'], result['current_text'])
+        return jsonify(attach_capture_profile(result, 'asl', session_id, data.get('profile_version')))
         
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/predict_asl_landmarks', methods=['POST'])
+@scheduled(inference=False)
+def predict_asl_landmarks():
+    """ASL prediction from client-extracted hand landmarks (no image upload)"""
+    try:
+        data = request.json or {}
+        raw_landmarks = data.get('landmarks')
+        
+        try:
+            landmarks = parse_hand_landmarks(raw_landmarks) if raw_landmarks else None
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Image uploads keep working; the client switches back to them on 409
+        engine = asl_system.correction_engine
+        if not engine.can_classify:
+            return jsonify({
+                "error": "Landmark index not trained",
+                "message": (f"ASL landmark mode needs {engine.classify_min_samples} stored corrections for each of "
+                            f"at least {engine.classify_min_signs} signs (see /submit_correction)"),
+                "fallback": "image"
+            }), 409
+        
+        session_id = get_session_id(data)
+        with session_states.session('asl', session_id, SignerState) as signer:
+            result = asl_system.process_landmarks(landmarks, signer)
+        autosave_asl_result(result, session_id, input_text='Hand Landmarks', method='Landmark kNN')
+        
+        if data.get('slim'):
+            return slim_frame_response('asl', session_id, data, result['prediction'], result['confidence'], None,
+                                       result['status'], result['current_text'], capture=False)
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Landmark prediction error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/submit_correction', methods=['POST'])
+def submit_correction():
+    """Store a user correction (predicted vs actual sign with hand landmarks)"""
+    try:
+        data = request.json or {}
+        actual = data.get('actual')
+        
+        if not actual:
+            return jsonify({"status": "error", "message": "Missing actual sign"}), 400
+        
+        try:
+            landmarks = parse_hand_landmarks(data.get('landmarks'))
+        except (TypeError, ValueError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
+        asl_system.add_correction(data.get('predicted'), actual, landmarks, data.get('reward', 0.0))
+        logger.info(f"Stored correction: {data.get('predicted')} -> {actual}")
+        
+        return jsonify({
+            "status": "success",
+            "total_corrections": asl_system.correction_store.count()
+        })
+        
+    except Exception as e:
+        logger.error(f"Submit correction error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/session/handshake', methods=['GET', 'POST'])
+def session_handshake():
+    """Static session metadata, sent once; slim per-frame responses only refer to its version"""
+    data = request.get_json(silent=True) or request.args
+    session_id = get_session_id(data)
+    text_deltas.reset(session_id)
+    metadata, version = session_metadata()
+    
+    return jsonify({
+        "status": "success",
+        "session_id": session_id,
+        "metadata_version": version,
+        **metadata,
+        "capture_profiles": {pipeline: capture_profiles.get(pipeline, session_id)
+                             for pipeline in capture_profiles.profiles}
+    })
+
+
+@app.route('/capture_profile', methods=['GET'])
+def capture_profile():
+    """Upload settings for a pipeline (asl | lip) and session; without pipeline: all base profiles"""
+    pipeline = request.args.get('pipeline')
+    if pipeline is None:
+        return jsonify({"status": "success", "capture": capture_profiles.get_status()})
+    if pipeline not in capture_profiles.profiles:
+        return jsonify({"status": "error", "message": f"Unknown pipeline: {pipeline}"}), 400
+    
+    return jsonify({
+        "status": "success",
+        "profile": capture_profiles.get(pipeline, get_session_id(request.args))
+    })
+
+
 @app.route('/predict_lip', methods=['POST'])
+@scheduled()
 def predict_lip():
     """Lip reading prediction endpoint with auto-save"""
     try:
@@ -492,50 +1420,26 @@ def predict_lip():
         if not image_data:
             return jsonify({"error": "No image data"}), 400
         
-        image_bytes = base64.b64decode(image_data.split(',')[1])
-        image = Image.open(io.BytesIO(image_bytes))
-        frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+        # A face crop (per the capture profile) says where it sits in the full frame
+        try:
+            roi = parse_roi(data.get('roi'))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
         
-        word, confidence, bbox, status, features = lip_reading_system.process_frame(frame)
+        frame = decode_frame(image_data)
         
-        if word and confidence > 0.6 and word not in ['No Face', 'Analyzing...', None]:
-            try:
-                conn = sqlite3.connect("asl_history.db")
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO conversion_history 
-                    (conversion_type, input_text, output_text, confidence, method, duration, metadata, timestamp, date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    'lip-reading',
-                    'Lip Movement',
-                    word,
-                    confidence,
-                    'MediaPipe + Pattern Matching',
-                    0.0,
-                    str({"word": word}),
-                    time.time(),
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                ))
-                conn.commit()
-                conn.close()
-            except Exception as save_error:
-                logger.warning(f"Failed to auto-save history: {save_error}")
-        
-        response = {
-            "prediction": word if word else "Analyzing...",
-            "confidence": float(confidence) if confidence else 0.0,
-            "current_text": lip_reading_system.current_text,
-            "status": status,
-            "bbox": [int(b) for b in bbox] if bbox else None,
-            "features": features,
-            "stats": lip_reading_system.stats,
-            "detectable_words": list(lip_reading_system.word_patterns.keys()),
-            "sequence_length": len(lip_reading_system.openness_history),
-            "min_required": lip_reading_system.min_sequence_length
-        }
+        session_id = get_session_id(data)
+        with session_states.session('lip', session_id, SpeakerState) as speaker:
+            word, confidence, bbox, status, features = lip_reading_system.process_frame(frame, session_id, roi,
+                                                                                        speaker)
+        autosave_lip_word(speaker.committed_word, confidence, session_id)
+        capture_profiles.observe('lip', session_id, speaker.face_box)
         
-        return jsonify(response)
+        if data.get('slim'):
+            return slim_frame_response('lip', session_id, data, word or "Analyzing...", confidence, bbox, status,
+                                       speaker.current_text)
+        response = build_lip_response(word, confidence, bbox, status, features, speaker)
+        return jsonify(attach_capture_profile(response, 'lip', session_id, data.get('profile_version')))
         
     except Exception as e:
         logger.error(f"Lip prediction error: {e}")
@@ -544,32 +1448,163 @@ def predict_lip():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/predict_lip_landmarks', methods=['POST'])
+@scheduled(inference=False)
+def predict_lip_landmarks():
+    """Lip reading from client-extracted lip landmarks (no image upload)"""
+    try:
+        data = request.json or {}
+        raw_points = data.get('lips')
+        
+        try:
+            lip_points = parse_lip_landmarks(raw_points) if raw_points else None
+            width = int(data.get('width', 960))
+            height = int(data.get('height', 720))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        
+        session_id = get_session_id(data)
+        with session_states.session('lip', session_id, SpeakerState) as speaker:
+            word, confidence, bbox, status, features = lip_reading_system.process_client_landmarks(
+                lip_points, width, height, speaker)
+        autosave_lip_word(speaker.committed_word, confidence, session_id,
+                          method='Client Landmarks + Pattern Matching')
+        
+        if data.get('slim'):
+            return slim_frame_response('lip', session_id, data, word or "Analyzing...", confidence, bbox, status,
+                                       speaker.current_text, capture=False)
+        return jsonify(build_lip_response(word, confidence, bbox, status, features, speaker))
+        
+    except Exception as e:
+        logger.error(f"Lip landmark prediction error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/predict_fused', methods=['POST'])
+@scheduled(cost=2.0)
+def predict_fused():
+    """ASL and lip reading on one uploaded frame (single decode, models run concurrently)"""
+    try:
+        data = request.json or {}
+        image_data = data.get('image', '')
+        
+        if not image_data:
+            return jsonify({"error": "No image data"}), 400
+        
+        try:
+            landmarks = parse_hand_landmarks(data['landmarks']) if data.get('landmarks') else None
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        
+        session_id = get_session_id(data)
+        try:
+            with session_states.session('asl', session_id, SignerState) as signer, \
+                    session_states.session('lip', session_id, SpeakerState) as speaker:
+                asl_result, lip_result, timing = fused_pipeline.process(image_data, session_id, landmarks,
+                                                                        lip_enabled=data.get('lip', True),
+                                                                        signer=signer, speaker=speaker)
+        except (IndexError, ValueError) as e:
+            return jsonify({"error": f"Invalid image: {e}"}), 400
+        autosave_asl_result(asl_result, session_id, method='YOLOv11 Fused')
+        
+        lip_response = None
+        if lip_result is not None:
+            word, confidence, bbox, status, features, committed_word = lip_result
+            autosave_lip_word(committed_word, confidence, session_id, method='MediaPipe Fused + Pattern Matching')
+            lip_response = build_lip_response(word, confidence, bbox, status, features, speaker)
+        
+        return jsonify(attach_capture_profile({
+            "status": "success",
+            "asl": asl_result,
+            "lip": lip_response,
+            "timing": timing
+        }, 'asl', session_id, data.get('profile_version')))
+        
+    except Exception as e:
+        logger.error(f"Fused prediction error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/predict_multi', methods=['POST'])
+@scheduled(cost=2.0)
+def predict_multi():
+    """All signers/speakers in one shared camera frame (single inference pass)"""
+    try:
+        data = request.json or {}
+        image_data = data.get('image', '')
+        
+        if not image_data:
+            return jsonify({"error": "No image data"}), 400
+        
+        frame = decode_frame(image_data)
+        
+        session_id = get_session_id(data)
+        people = multi_person_system.process_frame(frame, session_id, lip_enabled=data.get('lip', True))
+        
+        for person in people:
+            person_session = f"{session_id}:{person['person_id']}"
+            if person['asl']:
+                autosave_asl_result(person['asl'], person_session, input_text='Shared Camera',
+                                    method='YOLOv11 Multi-Person')
+            if person['lip']:
+                autosave_lip_word(person['lip']['committed_word'], person['lip']['confidence'], person_session,
+                                  input_text='Shared Camera', method='MediaPipe Multi-Face + Pattern Matching')
+        
+        return jsonify({
+            "status": "success",
+            "people": people,
+            "count": len(people)
+        })
+        
+    except Exception as e:
+        logger.error(f"Multi-person prediction error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/clear_multi_text', methods=['POST'])
+def clear_multi_text():
+    """Clear the text of one tracked person (person_id) or of the whole session"""
+    data = request.json or {}
+    session_id = get_session_id(data)
+    # Only this session's people: flush(session_id=None) would write every user's open runs
+    for person_session in multi_person_system.clear_text(session_id, data.get('person_id')):
+        history_coalescer.flush(session_id=person_session)
+    return jsonify({"status": "success"})
+
+
 @app.route('/clear_text', methods=['POST'])
 def clear_text():
     """Clear ASL text output"""
-    asl_system.clear_text()
+    session_id = get_session_id(request.get_json(silent=True))
+    history_coalescer.flush(session_id=session_id, conversion_type='asl-to-text')
+    with session_states.session('asl', session_id, SignerState) as signer:
+        asl_system.clear_text(signer)
     return jsonify({"status": "success", "text": ""})
 
 
 @app.route('/add_space', methods=['POST'])
 def add_space():
     """Add space to ASL text"""
-    asl_system.add_space()
-    return jsonify({"status": "success", "text": asl_system.current_text})
+    with session_states.session('asl', get_session_id(request.get_json(silent=True)), SignerState) as signer:
+        asl_system.add_space(signer)
+    return jsonify({"status": "success", "text": signer.current_text})
 
 
 @app.route('/backspace', methods=['POST'])
 def backspace():
     """Remove last character from ASL text"""
-    asl_system.backspace()
-    return jsonify({"status": "success", "text": asl_system.current_text})
+    with session_states.session('asl', get_session_id(request.get_json(silent=True)), SignerState) as signer:
+        asl_system.backspace(signer)
+    return jsonify({"status": "success", "text": signer.current_text})
 
 
 @app.route('/clear_lip_text', methods=['POST'])
 def clear_lip_text():
     """Clear lip reading text"""
-    if lip_reading_system:
-        lip_reading_system.clear_text()
+    session_id = get_session_id(request.get_json(silent=True))
+    history_coalescer.flush(session_id=session_id, conversion_type='lip-reading')
+    with session_states.session('lip', session_id, SpeakerState) as speaker:
+        lip_reading_system.clear_text(speaker)
     return jsonify({"status": "success", "text": ""})
 
 
@@ -585,69 +1620,192 @@ def lip_stats():
     if not lip_reading_system:
         return jsonify({"error": "Lip reading not available"}), 503
     
+    speaker = session_states.get('lip', get_session_id(request.args), SpeakerState)
     return jsonify({
         "stats": lip_reading_system.stats,
-        "current_text": lip_reading_system.current_text,
+        "current_text": speaker.current_text,
         "detectable_words": list(lip_reading_system.word_patterns.keys()),
-        "sequence_length": len(lip_reading_system.openness_history),
-        "cooldown": lip_reading_system.word_cooldown
+        "sequence_length": len(speaker.openness_history),
+        "cooldown": lip_reading_system.word_cooldown,
+        "motion_gate": lip_reading_system.motion_gate.get_stats()
     })
 
 
+def history_not_modified(etag):
+    """304 when the client's copy has the current history cache version"""
+    if etag is not None and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def history_response(payload, etag):
+    """JSON history response, revalidated by ETag when it came from the cache version `etag`"""
+    response = jsonify(payload)
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 @app.route('/get_history', methods=['GET'])
 def get_history():
-    """Get conversion history"""
+    """Get conversion history (newest first, paged with before_id)"""
     try:
-        limit = request.args.get('limit', 100, type=int)
+        limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+        before_id = request.args.get('before_id', None, type=int)
         conversion_type = request.args.get('type', None)
-        
-        conn = sqlite3.connect("asl_history.db")
+        if conversion_type == 'all':
+            conversion_type = None
+        
+        # Recent pages come from memory; the tag is taken first, so it is never newer than the data
+        etag = recent_history.etag() if recent_history is not None else None
+        not_modified = history_not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        page = recent_history.page(conversion_type, limit, before_id) if recent_history is not None else None
+        if page is not None:
+            history, has_more = page
+            return history_response({
+                "status": "success",
+                "history": history,
+                "count": len(history),
+                "has_more": has_more,
+                "next_before_id": history[-1]["id"] if has_more else None
+            }, etag)
+        
+        conditions, params = [], []
+        if conversion_type:
+            conditions.append('conversion_type = ?')
+            params.append(conversion_type)
+        if before_id is not None:
+            conditions.append('id < ?')
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = sqlite3.connect(HISTORY_DB_PATH)
         cursor = conn.cursor()
+        # Fetch one extra row to know whether another page exists
+        cursor.execute(f'''
+            SELECT {', '.join(HISTORY_COLUMNS)}
+            FROM conversion_history 
+            {where}
+            ORDER BY id DESC 
+            LIMIT ?
+        ''', (*params, limit + 1))
+        rows = cursor.fetchall()
+        conn.close()
         
-        if conversion_type and conversion_type != 'all':
-            query = '''
-                SELECT id, conversion_type, input_text, output_text, confidence, 
-                       method, duration, timestamp, date
-                FROM conversion_history 
-                WHERE conversion_type = ?
-                ORDER BY id DESC 
-                LIMIT ?
-            '''
-            cursor.execute(query, (conversion_type, limit))
-        else:
-            query = '''
-                SELECT id, conversion_type, input_text, output_text, confidence, 
-                       method, duration, timestamp, date
-                FROM conversion_history 
-                ORDER BY id DESC 
-                LIMIT ?
-            '''
-            cursor.execute(query, (limit,))
-        
-        history = []
-        for row in cursor.fetchall():
-            history.append({
-                "id": row[0],
-                "conversion_type": row[1],
-                "input_text": row[2],
-                "output_text": row[3],
-                "confidence": row[4],
-                "method": row[5],
-                "duration": row[6],
-                "timestamp": row[7],
-                "date": row[8]
-            })
+        has_more = len(rows) > limit
+        history = [history_row_to_dict(row) for row in rows[:limit]]
         
-        conn.close()
+        return history_response({
+            "status": "success",
+            "history": history,
+            "count": len(history),
+            "has_more": has_more,
+            "next_before_id": history[-1]["id"] if has_more else None
+        }, etag)
+        
+    except Exception as e:
+        logger.error(f"Get history error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/search_history', methods=['GET'])
+def search_history():
+    """Full-text search over history (bm25 ranked, highlighted, paged with offset)"""
+    try:
+        if not FTS5_AVAILABLE:
+            return jsonify({"status": "error", "message": "SQLite FTS5 not available"}), 503
+        
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"status": "error", "message": "Missing search query"}), 400
+        
+        limit = max(1, min(request.args.get('limit', 20, type=int), 200))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        
+        conn = sqlite3.connect(HISTORY_DB_PATH)
+        try:
+            results, has_more, ranking = run_history_search(conn, query, request.args.get('type'), limit, offset)
+        finally:
+            conn.close()
         
         return jsonify({
             "status": "success",
-            "history": history,
-            "count": len(history)
+            "query": query,
+            "ranking": ranking,
+            "history": results,
+            "count": len(results),
+            "has_more": has_more,
+            "next_offset": offset + len(results) if has_more else None
         })
         
     except Exception as e:
-        logger.error(f"Get history error: {e}")
+        logger.error(f"Search history error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+def iter_history_export(export_format, conversion_type=None):
+    """Yield the history as CSV or NDJSON chunks, one fetchmany batch at a time"""
+    columns = HISTORY_COLUMNS + ("metadata",)
+    
+    if export_format == 'csv':
+        # Header goes out before the query runs so the first byte is immediate
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+    
+    conn = sqlite3.connect(HISTORY_DB_PATH)
+    try:
+        cursor = conn.cursor()
+        if conversion_type and conversion_type != 'all':
+            cursor.execute(f'''
+                SELECT {', '.join(columns)} FROM conversion_history
+                WHERE conversion_type = ? ORDER BY id
+            ''', (conversion_type,))
+        else:
+            cursor.execute(f"SELECT {', '.join(columns)} FROM conversion_history ORDER BY id")
+        
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield ''.join(json.dumps(history_row_to_dict(row, columns)) + '\n' for row in rows)
+    finally:
+        conn.close()
+
+
+@app.route('/export_history', methods=['GET'])
+def export_history():
+    """Stream the full history as CSV or NDJSON"""
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({"status": "error", "message": "format must be csv or ndjson"}), 400
+        
+        conversion_type = request.args.get('type', None)
+        mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        filename = f"signease_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        
+        return Response(
+            iter_history_export(export_format, conversion_type),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+        
+    except Exception as e:
+        logger.error(f"Export history error: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
@@ -655,7 +1813,14 @@ def get_history():
 def get_statistics():
     """Get conversion statistics"""
     try:
-        conn = sqlite3.connect("asl_history.db")
+        if recent_history is not None:
+            etag = recent_history.etag()
+            return history_not_modified(etag) or history_response({
+                "status": "success",
+                "statistics": recent_history.statistics()
+            }, etag)
+        
+        conn = sqlite3.connect(HISTORY_DB_PATH)
         cursor = conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM conversion_history')
@@ -671,6 +1836,10 @@ def get_statistics():
         cursor.execute('SELECT AVG(confidence) FROM conversion_history WHERE confidence > 0')
         avg_confidence = cursor.fetchone()[0] or 0.0
         
+        # Rows expired by the retention job survive as daily rollups
+        cursor.execute('SELECT conversion_type, SUM(rows) FROM history_rollup GROUP BY conversion_type')
+        archived_by_type = dict(cursor.fetchall())
+        
         conn.close()
         
         return jsonify({
@@ -678,7 +1847,8 @@ def get_statistics():
             "statistics": {
                 "total_conversions": total_conversions,
                 "by_type": by_type,
-                "average_confidence": avg_confidence
+                "average_confidence": avg_confidence,
+                "archived_by_type": archived_by_type
             }
         })
         
@@ -691,15 +1861,19 @@ def get_statistics():
 def delete_history_entry(entry_id):
     """Delete a single history entry"""
     try:
-        conn = sqlite3.connect("asl_history.db")
+        conn = sqlite3.connect(HISTORY_DB_PATH)
         cursor = conn.cursor()
         
+        entry = cursor.execute('SELECT conversion_type, confidence FROM conversion_history WHERE id = ?',
+                               (entry_id,)).fetchone()
         cursor.execute('DELETE FROM conversion_history WHERE id = ?', (entry_id,))
         conn.commit()
         
         deleted = cursor.rowcount > 0
         conn.close()
         
+        if deleted and recent_history is not None:
+            recent_history.remove(entry_id, *entry)
         if deleted:
             logger.info(f"Deleted history entry: {entry_id}")
             return jsonify({"status": "success", "message": "Entry deleted"})
@@ -717,27 +1891,16 @@ def save_history():
     try:
         data = request.json
         
-        conn = sqlite3.connect("asl_history.db")
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO conversion_history 
-            (conversion_type, input_text, output_text, confidence, method, duration, metadata, timestamp, date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        insert_history_entry(
             data.get('type', 'unknown'),
             data.get('input', ''),
             data.get('output', ''),
             data.get('confidence', 0.0),
             data.get('method', ''),
             data.get('duration', 0.0),
-            str(data.get('metadata', {})),
-            time.time(),
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        ))
-        
-        conn.commit()
-        conn.close()
+            data.get('metadata', {}),
+            data.get('timestamp')
+        )
         
         logger.info(f"Saved history: {data.get('type')}")
         
@@ -751,6 +1914,131 @@ def save_history():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+# ============================================
+# TEXT TO ASL
+# ============================================
+
+WORD_TO_GIF = {
+    'hello': '/static/animations/hello.gif',
+    'hi': '/static/animations/hello.gif',
+    'goodbye': '/static/animations/goodbye.gif',
+    'bye': '/static/animations/goodbye.gif',
+    'thank you': '/static/animations/thank-you.gif',
+    'thanks': '/static/animations/thank-you.gif',
+    'please': '/static/animations/please.gif',
+    'yes': '/static/animations/yes.gif',
+    'no': '/static/animations/no.gif',
+    'sorry': '/static/animations/sorry.gif',
+    'want': '/static/animations/want.gif',
+    'help': '/static/animations/help.gif',
+    'love': '/static/animations/i-love-you.gif',
+    'happy': '/static/animations/happy.gif',
+    'sad': '/static/animations/sad.gif',
+    'good': '/static/animations/good.gif',
+    'bad': '/static/animations/bad.gif',
+    'water': '/static/animations/water.gif',
+    'food': '/static/animations/food.gif',
+    'eat': '/static/animations/eat.gif',
+    'drink': '/static/animations/drink.gif',
+    'sleep': '/static/animations/sleep.gif',
+    'home': '/static/animations/home.gif',
+    'family': '/static/animations/family.gif',
+    'friend': '/static/animations/friend.gif',
+    'go': '/static/animations/go.gif',
+    'me': '/static/animations/me.gif',
+    'to': '/static/animations/to.gif',
+    'walk': '/static/animations/walk.gif',
+    'back': '/static/animations/back.gif',
+    'you': '/static/animations/you.gif',
+    'work': '/static/animations/work.gif',
+    'name': '/static/animations/name.gif',
+    'meet': '/static/animations/meet.gif',
+    'nice': '/static/animations/nice.gif',
+    'here': '/static/animations/here.gif',
+    'how are you': '/static/animations/how-are-you.gif',
+    'applause': '/static/animations/applause.gif',
+    'i love you': '/static/animations/i-love-you.gif',
+    'good morning': '/static/animations/good-morning.gif',
+    'nice to meet you': '/static/animations/nice-to-meet-you.gif',
+    'pardon': '/static/animations/Pardon.gif',
+    'good night': '/static/animations/goodnight.gif',
+    'good afternoon': '/static/animations/afternoon.gif',
+    'are you here': '/static/animations/here.gif',
+    'see you again': '/static/animations/again.gif'
+}
+
+MULTI_WORD_PHRASES = [
+    'nice to meet you',
+    'are you here',
+    'see you again',
+    'see you later',
+    'how are you',
+    'thank you',
+    'i love you',
+    'good morning',
+    'good night',
+    'good afternoon',
+    'good evening',
+    'excuse me',
+    'you are welcome',
+    'what is your name',
+    'pleased to meet you'
+]
+
+WORD_VARIATIONS = {
+    'hi': 'hello',
+    'hey': 'hello',
+    'greetings': 'hello',
+    'bye': 'goodbye',
+    'farewell': 'goodbye',
+    'thanks': 'thank you',
+    'thank': 'thank you',
+    'thx': 'thank you',
+    'plz': 'please',
+    'yeah': 'yes',
+    'yep': 'yes',
+    'yup': 'yes',
+    'nope': 'no',
+    'nah': 'no',
+    'wanna': 'want'
+}
+
+
+def text_to_asl(text):
+    """Split text into known phrases / words and their animations: (words, animations)"""
+    cleaned = re.sub(r'[^\w\s\']', ' ', text.lower()).strip()
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+    
+    words = []
+    animations = []
+    tokens = cleaned.split()
+    used_indices = set()
+    
+    for i in range(len(tokens)):
+        if i in used_indices:
+            continue
+        
+        matched = False
+        for phrase_len in range(min(6, len(tokens) - i), 1, -1):
+            candidate = ' '.join(tokens[i:i+phrase_len])
+            if candidate in MULTI_WORD_PHRASES:
+                words.append(candidate)
+                animations.append(WORD_TO_GIF.get(candidate, ''))
+                for j in range(i, i + phrase_len):
+                    used_indices.add(j)
+                matched = True
+                break
+        
+        if not matched:
+            word = tokens[i]
+            word = WORD_VARIATIONS.get(word, word)
+            words.append(word)
+            animations.append(WORD_TO_GIF.get(word, ''))
+            used_indices.add(i)
+    
+    return words, animations
+
+
 @app.route('/convert_text_to_asl', methods=['POST'])
 def convert_text_to_asl():
     """Convert text to ASL animations"""
@@ -763,125 +2051,10 @@ def convert_text_to_asl():
         
         logger.info(f"Converting text to ASL: {text}")
         
-        word_to_gif = {
-            'hello': '/static/animations/hello.gif',
-            'hi': '/static/animations/hello.gif',
-            'goodbye': '/static/animations/goodbye.gif',
-            'bye': '/static/animations/goodbye.gif',
-            'thank you': '/static/animations/thank-you.gif',
-            'thanks': '/static/animations/thank-you.gif',
-            'please': '/static/animations/please.gif',
-            'yes': '/static/animations/yes.gif',
-            'no': '/static/animations/no.gif',
-            'sorry': '/static/animations/sorry.gif',
-            'want': '/static/animations/want.gif',
-            'help': '/static/animations/help.gif',
-            'love': '/static/animations/i-love-you.gif',
-            'happy': '/static/animations/happy.gif',
-            'sad': '/static/animations/sad.gif',
-            'good': '/static/animations/good.gif',
-            'bad': '/static/animations/bad.gif',
-            'water': '/static/animations/water.gif',
-            'food': '/static/animations/food.gif',
-            'eat': '/static/animations/eat.gif',
-            'drink': '/static/animations/drink.gif',
-            'sleep': '/static/animations/sleep.gif',
-            'home': '/static/animations/home.gif',
-            'family': '/static/animations/family.gif',
-            'friend': '/static/animations/friend.gif',
-            'go': '/static/animations/go.gif',
-            'me': '/static/animations/me.gif',
-            'to': '/static/animations/to.gif',
-            'walk': '/static/animations/walk.gif',
-            'back': '/static/animations/back.gif',
-            'you': '/static/animations/you.gif',
-            'work': '/static/animations/work.gif',
-            'name': '/static/animations/name.gif',
-            'meet': '/static/animations/meet.gif',
-            'nice': '/static/animations/nice.gif',
-            'here': '/static/animations/here.gif',
-            'how are you': '/static/animations/how-are-you.gif',
-            'applause': '/static/animations/applause.gif',
-            'i love you': '/static/animations/i-love-you.gif',
-            'good morning': '/static/animations/good-morning.gif',
-            'nice to meet you': '/static/animations/nice-to-meet-you.gif',
-            'pardon': '/static/animations/Pardon.gif',
-            'good night': '/static/animations/goodnight.gif',
-            'good afternoon': '/static/animations/afternoon.gif',
-            'are you here': '/static/animations/here.gif',
-            'see you again': '/static/animations/again.gif'
-        }
-        
-        multi_word_phrases = [
-            'nice to meet you',
-            'are you here',
-            'see you again',
-            'see you later',
-            'how are you',
-            'thank you',
-            'i love you',
-            'good morning',
-            'good night',
-            'good afternoon',
-            'good evening',
-            'excuse me',
-            'you are welcome',
-            'what is your name',
-            'pleased to meet you'
-        ]
-        
-        variations = {
-            'hi': 'hello',
-            'hey': 'hello',
-            'greetings': 'hello',
-            'bye': 'goodbye',
-            'farewell': 'goodbye',
-            'thanks': 'thank you',
-            'thank': 'thank you',
-            'thx': 'thank you',
-            'plz': 'please',
-            'yeah': 'yes',
-            'yep': 'yes',
-            'yup': 'yes',
-            'nope': 'no',
-            'nah': 'no',
-            'wanna': 'want'
-        }
-        
-        import re
-        cleaned = re.sub(r'[^\w\s\']', ' ', text.lower()).strip()
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        
-        if not cleaned:
+        words, animations = text_to_asl(text)
+        if not words:
             return jsonify({'status': 'error', 'error': 'No valid text after cleaning'})
         
-        words = []
-        animations = []
-        tokens = cleaned.split()
-        used_indices = set()
-        
-        for i in range(len(tokens)):
-            if i in used_indices:
-                continue
-            
-            matched = False
-            for phrase_len in range(min(6, len(tokens) - i), 1, -1):
-                candidate = ' '.join(tokens[i:i+phrase_len])
-                if candidate in multi_word_phrases:
-                    words.append(candidate)
-                    animations.append(word_to_gif.get(candidate, ''))
-                    for j in range(i, i + phrase_len):
-                        used_indices.add(j)
-                    matched = True
-                    break
-            
-            if not matched:
-                word = tokens[i]
-                word = variations.get(word, word)
-                words.append(word)
-                animations.append(word_to_gif.get(word, ''))
-                used_indices.add(i)
-        
         logger.info(f"Converted to {len(words)} words: {words}")
         
         return jsonify({
@@ -898,6 +2071,98 @@ def convert_text_to_asl():
         return jsonify({'status': 'error', 'error': str(e)})
 
 
+# ============================================
+# STREAMING SPEECH RECOGNITION
+# ============================================
+
+# Finals and stable partials go straight through text_to_asl
+speech_streams = SpeechStreams(text_to_asl, MULTI_WORD_PHRASES)
+MAX_AUDIO_CHUNK_BYTES = 10 * 2 * SAMPLE_RATE  # 10 s of 16-bit mono
+
+
+@app.route('/speech/status', methods=['GET'])
+def speech_status():
+    """Whether local streaming recognition is available (else clients use the browser's)"""
+    return jsonify({"status": "success", "speech": speech_streams.get_status()})
+
+
+@app.route('/speech/stream', methods=['POST'])
+def open_speech_stream():
+    """Open a recognition stream; returns its id and the audio format to post"""
+    try:
+        stream = speech_streams.create()
+        return jsonify({
+            "status": "success",
+            "stream_id": stream.id,
+            "sample_rate": SAMPLE_RATE,
+            "encoding": "pcm_s16le",
+            "channels": 1
+        })
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+
+
+@app.route('/speech/stream/<stream_id>/audio', methods=['POST'])
+def speech_stream_audio(stream_id):
+    """Feed raw 16 kHz mono int16 PCM; returns the events this chunk produced"""
+    stream = speech_streams.get(stream_id)
+    if stream is None:
+        return jsonify({"status": "error", "message": "Unknown speech stream"}), 404
+    
+    pcm = request.get_data(cache=False)
+    if len(pcm) > MAX_AUDIO_CHUNK_BYTES or len(pcm) % 2:
+        return jsonify({"status": "error", "message": "Audio chunks must be 16-bit PCM of at most 10 s"}), 400
+    
+    try:
+        return jsonify({"status": "success", "events": stream.feed(pcm)})
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Speech recognition error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/speech/stream/<stream_id>/close', methods=['POST'])
+def close_speech_stream(stream_id):
+    """Flush the last utterance and end the stream"""
+    stream = speech_streams.get(stream_id)
+    if stream is None:
+        return jsonify({"status": "error", "message": "Unknown speech stream"}), 404
+    return jsonify({"status": "success", "events": stream.close()})
+
+
+@app.route('/speech/stream/<stream_id>/events', methods=['GET'])
+def speech_stream_events(stream_id):
+    """Server-Sent Events: partial, segment, final and end (resumes after Last-Event-ID)"""
+    stream = speech_streams.get(stream_id)
+    if stream is None:
+        return jsonify({"status": "error", "message": "Unknown speech stream"}), 404
+    
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        last_id = 0
+    
+    def generate():
+        nonlocal last_id
+        yield "retry: 1000\n\n"
+        while True:
+            events = stream.wait_events(last_id)
+            if not events:
+                if stream.closed:
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                last_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+                if event['event'] == 'end':
+                    return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/clear_history', methods=['POST'])
 def clear_history():
     """Clear all or filtered history"""
@@ -905,7 +2170,7 @@ def clear_history():
         data = request.json
         conversion_type = data.get('type', None)
         
-        conn = sqlite3.connect("asl_history.db")
+        conn = sqlite3.connect(HISTORY_DB_PATH)
         cursor = conn.cursor()
         
         if conversion_type:
@@ -918,7 +2183,11 @@ def clear_history():
         conn.commit()
         deleted_count = cursor.rowcount
         conn.close()
+        if recent_history is not None:
+            recent_history.clear(conversion_type)
         
+        # Hand the freed pages back in the background
+        history_retention.trigger(vacuum_only=True)
         logger.info(f"{message} ({deleted_count} entries)")
         
         return jsonify({
@@ -932,10 +2201,190 @@ def clear_history():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/history_retention', methods=['GET'])
+def history_retention_status():
+    """Retention policy, last run results and database size"""
+    try:
+        return jsonify({"status": "success", "retention": history_retention.get_status()})
+    except Exception as e:
+        logger.error(f"Retention status error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/history_retention/run', methods=['POST'])
+def history_retention_run():
+    """Start a retention pass in the background (admin)"""
+    if not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    history_retention.trigger()
+    return jsonify({"status": "success", "message": "Retention run scheduled"}), 202
+
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    """Registered model versions, the active one and shadow comparison stats"""
+    return jsonify({"status": "success", "models": asl_system.detector.registry.get_status()})
+
+
+@app.route('/models/register', methods=['POST'])
+def register_model():
+    """Register a model file from the model directory as a new version (admin)"""
+    if not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    try:
+        data = request.json or {}
+        registry = asl_system.detector.registry
+        entry = registry.register(registry.resolve_artifact(data.get('path', '')),
+                                  data.get('version'), data.get('note', ''))
+        return jsonify({"status": "success", "version": entry})
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Model register error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/models/activate', methods=['POST'])
+def activate_model():
+    """Load and warm up a version in the background, then swap it in (admin)"""
+    if not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    try:
+        version = (request.json or {}).get('version')
+        asl_system.detector.registry.activate(version)
+        return jsonify({"status": "success", "message": f"Loading {version}"}), 202
+    except KeyError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Model activate error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/models/shadow', methods=['POST'])
+def shadow_model():
+    """Shadow-run a version on a sampled fraction of frames ({"version": null} stops) (admin)"""
+    if not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    try:
+        data = request.json or {}
+        registry = asl_system.detector.registry
+        if not data.get('version'):
+            registry.stop_shadow()
+            return jsonify({"status": "success", "message": "Shadow stopped"})
+        
+        registry.start_shadow(data['version'], float(data.get('fraction', 0.1)))
+        return jsonify({"status": "success", "message": f"Loading shadow {data['version']}"}), 202
+    except KeyError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Model shadow error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/models/promote', methods=['POST'])
+def promote_model():
+    """Make the (already warm) shadow version active (admin)"""
+    if not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    try:
+        version = asl_system.detector.registry.promote_shadow()
+        return jsonify({"status": "success", "active_version": version})
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+
+
+@app.route('/admin/scheduler', methods=['GET', 'POST'])
+def scheduler_status():
+    """Slots, queue and per-session counters; POST {"session_id", "weight"} sets a session's share (admin)"""
+    if request.method == 'POST':
+        if not admin_allowed():
+            return jsonify({"status": "error", "message": "Forbidden"}), 403
+        data = request.get_json(silent=True) or {}
+        try:
+            weight = float(data.get('weight', 1.0))
+            if not data.get('session_id') or weight <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "session_id and a positive weight are required"}), 400
+        inference_scheduler.set_weight(data['session_id'], weight)
+    return jsonify({"status": "success", "scheduler": inference_scheduler.get_status()})
+
+
+@app.route('/models/lifecycle', methods=['GET', 'POST'])
+def model_lifecycle_status():
+    """Per-model load state, idle time and RSS; POST {"unload": name} unloads one now (admin)"""
+    if request.method == 'POST':
+        if not admin_allowed():
+            return jsonify({"status": "error", "message": "Forbidden"}), 403
+        name = (request.get_json(silent=True) or {}).get('unload')
+        if name not in model_lifecycle.models:
+            return jsonify({"status": "error", "message": f"Unknown model: {name}"}), 400
+        if not model_lifecycle.unload(name):
+            return jsonify({"status": "error", "message": f"{name} is not loaded or in use"}), 409
+    status = model_lifecycle.get_status()
+    if 'yolo' in status['models']:
+        registry = asl_system.detector.registry.get_status()
+        status['models']['yolo'].update(version=registry['active_version'], last_swap=registry['last_swap'])
+    return jsonify({"status": "success", "lifecycle": status})
+
+
+def profile_response(result, default_name):
+    """Collapsed stacks (flame graph input) or a JSON summary, per ?format="""
+    include_idle = request.args.get('idle', '0') == '1'
+    if request.args.get('format', 'collapsed') == 'json':
+        return jsonify({"status": "success", "profile": result.summary(include_idle=include_idle)})
+    
+    return Response(result.collapsed(include_idle=include_idle), mimetype='text/plain', headers={
+        "Content-Disposition": f"attachment; filename={default_name}.folded"
+    })
+
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """Sample all threads for ?seconds= (max 60) and return the stacks"""
+    if not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    try:
+        seconds = max(0.1, min(60.0, float(request.args.get('seconds', 5))))
+        interval = max(1.0, float(request.args.get('interval_ms', 5))) / 1000
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    result = profiler.profile(seconds, interval)
+    if result is None:
+        return jsonify({"status": "error", "message": "A profiling session is already running"}), 409
+    
+    logger.info(f"Profiled {result.samples} samples over {result.duration:.1f}s")
+    return profile_response(result, f"profile-{datetime.now():%Y%m%d-%H%M%S}")
+
+
+@app.route('/admin/profile/trace/<trace_id>', methods=['GET'])
+def admin_profile_trace(trace_id):
+    """Stacks of one request sent with X-Profile-Request (id from its X-Profile-Trace header)"""
+    if not admin_allowed():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    result = profiler.get_trace(trace_id)
+    if result is None:
+        return jsonify({"status": "error", "message": "Unknown or expired trace"}), 404
+    
+    return profile_response(result, f"trace-{trace_id}")
+
+
 @app.route('/system_status', methods=['GET'])
 def system_status():
     """Get detailed system status"""
     stats = asl_system.get_stats()
+    model_status = asl_system.detector.registry.get_status()
+    signer = session_states.get('asl', get_session_id(request.args), SignerState)
     
     return jsonify({
         "yolo": {
@@ -944,16 +2393,27 @@ def system_status():
             "total_classes": stats.get('total_classes', 0),
             "detections": stats.get('successful_detections', 0),
             "accuracy": f"{stats.get('average_confidence', 0) * 100:.1f}%",
-            "confidence_threshold": asl_system.detector.confidence_threshold
+            "confidence_threshold": asl_system.detector.confidence_threshold,
+            "model_version": model_status['active_version'],
+            "model_loading": model_status['loading'],
+            "shadow": model_status['shadow']
         },
         "signs": {
             "available": stats.get('available_signs', []),
             "total": len(stats.get('available_signs', []))
         },
         "text": {
-            "current": asl_system.current_text,
-            "length": len(asl_system.current_text)
-        }
+            "current": signer.current_text,
+            "length": len(signer.current_text)
+        },
+        "history_autosave": history_coalescer.get_stats(),
+        "fused_pipeline": fused_pipeline.get_stats(),
+        "runtime": runtime_status(runtime_profile),
+        "model_lifecycle": model_lifecycle.get_status(),
+        "scheduler": inference_scheduler.get_status(),
+        "session_state": session_states.get_status(),
+        "history_cache": recent_history.get_status() if recent_history is not None else None,
+        "history_node": history_remote.get_status() if history_remote else None
     })
 
 
@@ -965,6 +2425,7 @@ def adjust_sensitivity():
         confidence = data.get('confidence', 0.65)
         
         asl_system.detector.confidence_threshold = max(0.3, min(0.95, confidence))
+        asl_system.motion_gate.reset()
         
         logger.info(f"Sensitivity adjusted: confidence={confidence}")
         
@@ -0,0 +1,493 @@
+"""
+Offline Batch Inference - Reprocess image folders and recorded videos
+
+Streams frames through a decode -> batch -> infer -> write pipeline:
+- Decoding runs in parallel worker threads (one source file per task)
+- Frames are grouped into YOLO batches of configurable size
+- Results go to JSONL, CSV or the conversion_history table
+
+USAGE:
+    python batch_inference.py runs/detect/predict/ --output results.jsonl
+    python batch_inference.py recordings/session.mp4 --every 5 --batch-size 16 --output results.csv
+    python batch_inference.py recordings/ --recursive --history-db asl_history.db
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+
+from history_coalescer import HistoryCoalescer
+
+try:
+    from ultralytics import YOLO
+    YOLO_AVAILABLE = True
+except ImportError:
+    YOLO_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm'}
+
+# One decoded frame travelling through the pipeline
+# (timestamp: seconds into the source, captured_at: wall-clock time the frame was recorded)
+FrameItem = namedtuple('FrameItem', ['source', 'frame_index', 'timestamp', 'captured_at', 'frame'])
+
+_END_OF_SOURCE = object()
+
+
+# ============================================
+# SOURCE DISCOVERY & DECODING
+# ============================================
+
+def collect_sources(paths, recursive=False):
+    """Expand input paths into a sorted list of image/video files"""
+    sources = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            pattern = '**/*' if recursive else '*'
+            candidates = sorted(p for p in path.glob(pattern) if p.is_file())
+        elif path.is_file():
+            candidates = [path]
+        else:
+            logger.warning(f"Input not found: {raw}")
+            continue
+
+        for candidate in candidates:
+            suffix = candidate.suffix.lower()
+            if suffix in IMAGE_EXTENSIONS or suffix in VIDEO_EXTENSIONS:
+                sources.append(candidate)
+
+    return sources
+
+
+def put_frame(frame_queue, item, stop=None):
+    """Block on the bounded queue until there is room; False once the run was stopped"""
+    while stop is None or not stop.is_set():
+        try:
+            frame_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def decode_source(path, frame_queue, every=1, stop=None):
+    """Decode one image or video file and push its frames onto the queue"""
+    decoded = 0
+    try:
+        if stop is not None and stop.is_set():
+            return decoded
+
+        # The file's modification time is when recording ended
+        recorded_at = path.stat().st_mtime
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
+            frame = cv2.imread(str(path))
+            if frame is None:
+                raise ValueError("unreadable image")
+            put_frame(frame_queue, FrameItem(str(path), 0, 0.0, recorded_at, frame), stop)
+            return 1
+
+        cap = cv2.VideoCapture(str(path))
+        if not cap.isOpened():
+            raise ValueError("unreadable video")
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        started_at = recorded_at - (frame_count / fps if fps > 0 and frame_count > 0 else 0.0)
+
+        index = 0
+        try:
+            while True:
+                # grab() skips the colour conversion for frames we do not keep
+                if not cap.grab():
+                    break
+                if index % every == 0:
+                    ok, frame = cap.retrieve()
+                    if not ok:
+                        break
+                    timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                    if not put_frame(frame_queue, FrameItem(str(path), index, timestamp, started_at + timestamp, frame),
+                                     stop):
+                        break
+                    decoded += 1
+                index += 1
+        finally:
+            cap.release()
+        return decoded
+
+    except Exception as e:
+        logger.error(f"Decode error ({path}): {e}")
+        return decoded
+    finally:
+        put_frame(frame_queue, _END_OF_SOURCE, stop)
+
+
+# ============================================
+# OUTPUT WRITERS
+# ============================================
+
+class JsonlWriter:
+    """Write one JSON object per frame"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, records):
+        for record in records:
+            self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    """Write one CSV row per frame (top detection only)"""
+
+    FIELDS = ['source', 'frame_index', 'timestamp', 'prediction', 'confidence', 'num_detections', 'bbox']
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.FIELDS)
+        self.writer.writeheader()
+
+    def write(self, records):
+        for record in records:
+            self.writer.writerow({
+                'source': record['source'],
+                'frame_index': record['frame_index'],
+                'timestamp': record['timestamp'],
+                'prediction': record['prediction'] or '',
+                'confidence': record['confidence'],
+                'num_detections': len(record['detections']),
+                'bbox': ' '.join(str(v) for v in record['bbox']) if record['bbox'] else ''
+            })
+
+    def close(self):
+        self.file.close()
+
+
+class HistoryDbWriter:
+    """Insert runs of detections into the conversion_history table used by app.py"""
+
+    def __init__(self, db_path):
+        # Created here, written by the pipeline's writer thread only, closed after it finished
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS conversion_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversion_type TEXT NOT NULL,
+                input_text TEXT,
+                output_text TEXT,
+                confidence REAL,
+                method TEXT,
+                duration REAL,
+                metadata TEXT,
+                timestamp REAL,
+                date TEXT
+            )
+        ''')
+
+        # Consecutive frames with the same sign become one row, as for live recognition;
+        # runs close on recording time, so there is no sweeper and close() flushes the rest
+        self.rows = []
+        self.coalescer = HistoryCoalescer(self._add_row, sweep_interval=None)
+
+    def _add_row(self, conversion_type, input_text, output_text, confidence, method, duration, metadata, timestamp):
+        self.rows.append((
+            conversion_type, input_text, output_text, confidence, method, duration, str(metadata), timestamp,
+            datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        ))
+
+    def write(self, records):
+        for record in records:
+            if record['prediction']:
+                self.coalescer.observe(record['source'], 'asl-to-text', record['prediction'], record['confidence'],
+                                       f"{record['source']}#{record['frame_index']}", 'YOLOv11 (batch)',
+                                       now=record['captured_at'])
+        self._insert_rows()
+
+    def _insert_rows(self):
+        rows, self.rows = self.rows, []
+        if rows:
+            self.conn.executemany('''
+                INSERT INTO conversion_history
+                (conversion_type, input_text, output_text, confidence, method, duration, metadata, timestamp, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+
+    def close(self):
+        self.coalescer.close()
+        self._insert_rows()
+        self.conn.close()
+
+
+def create_writer(output=None, history_db=None):
+    """Pick an output writer from the command line options"""
+    if history_db:
+        return HistoryDbWriter(history_db)
+    if output and output.lower().endswith('.csv'):
+        return CsvWriter(output)
+    return JsonlWriter(output or 'batch_results.jsonl')
+
+
+# ============================================
+# BATCH PIPELINE
+# ============================================
+
+class BatchInferencePipeline:
+    """Decode -> batch -> infer -> write pipeline over offline sources"""
+
+    def __init__(self, model_path, batch_size=8, workers=4, confidence=0.65, imgsz=640, every=1):
+        self.model_path = model_path
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.confidence = confidence
+        self.imgsz = imgsz
+        self.every = max(1, every)
+        self.model = None
+        self.class_names = []
+
+        self.stats = {
+            'sources': 0,
+            'frames': 0,
+            'frames_with_detection': 0,
+            'batches': 0,
+            'decode_time': 0.0,
+            'inference_time': 0.0,
+            'write_time': 0.0,
+            'class_counts': Counter()
+        }
+
+    def load_model(self):
+        """Load YOLO model"""
+        if not YOLO_AVAILABLE:
+            raise RuntimeError("YOLOv11 not installed. Install: pip install ultralytics")
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Model not found: {self.model_path}")
+
+        self.model = YOLO(self.model_path)
+        self.class_names = list(self.model.names.values())
+        logger.info(f"YOLO model loaded: {len(self.class_names)} classes")
+
+    def infer_batch(self, items):
+        """Run one YOLO batch and convert results to plain records"""
+        results = self.model([item.frame for item in items], conf=self.confidence,
+                             imgsz=self.imgsz, verbose=False)
+
+        records = []
+        for item, result in zip(items, results):
+            detections = []
+            for box in result.boxes:
+                class_id = int(box.cls[0])
+                detections.append({
+                    'prediction': self.class_names[class_id],
+                    'confidence': float(box.conf[0]),
+                    'bbox': [int(v) for v in box.xyxy[0].tolist()]
+                })
+            top = max(detections, key=lambda d: d['confidence']) if detections else None
+
+            records.append({
+                'source': item.source,
+                'frame_index': item.frame_index,
+                'timestamp': round(item.timestamp, 3),
+                'captured_at': round(item.captured_at, 3),
+                'prediction': top['prediction'] if top else None,
+                'confidence': top['confidence'] if top else 0.0,
+                'bbox': top['bbox'] if top else None,
+                'detections': detections
+            })
+        return records
+
+    def _write_loop(self, writer, write_queue):
+        """Writer thread: drain finished batches so inference never waits on I/O"""
+        while True:
+            records = write_queue.get()
+            if records is None:
+                break
+            start = time.perf_counter()
+            try:
+                writer.write(records)
+            except Exception as e:
+                logger.error(f"Write error: {e}")
+            self.stats['write_time'] += time.perf_counter() - start
+
+    def run(self, sources, writer):
+        """Process all sources and return the summary dict"""
+        if self.model is None:
+            self.load_model()
+
+        self.stats['sources'] = len(sources)
+        frame_queue = queue.Queue(maxsize=self.batch_size * 4)
+        write_queue = queue.Queue(maxsize=8)
+
+        writer_thread = threading.Thread(target=self._write_loop, args=(writer, write_queue), daemon=True)
+        writer_thread.start()
+
+        start = time.perf_counter()
+        try:
+            self._process(sources, frame_queue, write_queue)
+        finally:
+            write_queue.put(None)
+            writer_thread.join()
+            writer.close()
+
+        return self.summary(time.perf_counter() - start)
+
+    def _process(self, sources, frame_queue, write_queue):
+        """Decode workers feed the frame queue; batches are inferred here and handed to the writer"""
+        remaining = len(sources)
+        stop = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='decode') as pool:
+            try:
+                for source in sources:
+                    pool.submit(decode_source, source, frame_queue, self.every, stop)
+                self._batch_loop(remaining, frame_queue, write_queue)
+            except BaseException:
+                # Release workers blocked on the full queue before the pool waits for them
+                stop.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    def _batch_loop(self, remaining, frame_queue, write_queue):
+        """Group decoded frames into batches until every source has ended"""
+        batch = []
+        while remaining > 0 or batch:
+            item = None
+            if remaining > 0:
+                wait_start = time.perf_counter()
+                item = frame_queue.get()
+                self.stats['decode_time'] += time.perf_counter() - wait_start
+                if item is _END_OF_SOURCE:
+                    remaining -= 1
+                    item = None
+
+            if item is not None:
+                batch.append(item)
+
+            # Flush on a full batch, or whatever is left once decoding finished
+            if len(batch) >= self.batch_size or (remaining == 0 and batch):
+                infer_start = time.perf_counter()
+                records = self.infer_batch(batch)
+                self.stats['inference_time'] += time.perf_counter() - infer_start
+                self.stats['batches'] += 1
+                self.stats['frames'] += len(batch)
+
+                for record in records:
+                    if record['prediction']:
+                        self.stats['frames_with_detection'] += 1
+                        self.stats['class_counts'][record['prediction']] += 1
+
+                write_queue.put(records)
+                batch = []
+
+    def summary(self, elapsed):
+        """Throughput and per-class summary"""
+        frames = self.stats['frames']
+        inference_time = self.stats['inference_time']
+        return {
+            'sources': self.stats['sources'],
+            'frames': frames,
+            'frames_with_detection': self.stats['frames_with_detection'],
+            'batches': self.stats['batches'],
+            'batch_size': self.batch_size,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+            'inference_fps': round(frames / inference_time, 2) if inference_time > 0 else 0.0,
+            'decode_wait_seconds': round(self.stats['decode_time'], 3),
+            'write_seconds': round(self.stats['write_time'], 3),
+            'class_counts': dict(self.stats['class_counts'].most_common())
+        }
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch ASL inference over image folders and videos")
+    parser.add_argument('inputs', nargs='+', help="Image files, video files or folders")
+    parser.add_argument('--model', default="dataset/trained_model/best.pt", help="YOLO model path")
+    parser.add_argument('--batch-size', type=int, default=8, help="Frames per YOLO batch")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel decode workers")
+    parser.add_argument('--conf', type=float, default=0.65, help="Confidence threshold")
+    parser.add_argument('--imgsz', type=int, default=640, help="YOLO inference size")
+    parser.add_argument('--every', type=int, default=1, help="Keep every Nth video frame")
+    parser.add_argument('--recursive', action='store_true', help="Search folders recursively")
+    parser.add_argument('--output', help="Output file (.jsonl or .csv, default batch_results.jsonl)")
+    parser.add_argument('--history-db', help="Write detections to this history database instead")
+    parser.add_argument('--summary', help="Also save the run summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    sources = collect_sources(args.inputs, recursive=args.recursive)
+    if not sources:
+        print("ERROR: No images or videos found")
+        return 1
+
+    print("=" * 60)
+    print("BATCH INFERENCE")
+    print("=" * 60)
+    print(f"Sources: {len(sources)}")
+    print(f"Model: {args.model}")
+    print(f"Batch size: {args.batch_size} | Decode workers: {args.workers}")
+
+    pipeline = BatchInferencePipeline(
+        args.model,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        confidence=args.conf,
+        imgsz=args.imgsz,
+        every=args.every
+    )
+
+    try:
+        pipeline.load_model()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    writer = create_writer(args.output, args.history_db)
+    summary = pipeline.run(sources, writer)
+
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    print(f"Frames: {summary['frames']} ({summary['frames_with_detection']} with detection)")
+    print(f"Elapsed: {summary['elapsed_seconds']}s")
+    print(f"Throughput: {summary['throughput_fps']} frames/sec "
+          f"(inference only: {summary['inference_fps']} frames/sec)")
+    print("Per-class counts:")
+    for name, count in summary['class_counts'].items():
+        print(f"   {name}: {count}")
+    print("=" * 60)
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
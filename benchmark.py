@@ -0,0 +1,343 @@
+"""
+Component Microbenchmarks - Recognition, text and history paths
+
+Times each component separately on CPU with synthetic frames/landmark
+streams plus the sample image in runs/detect/predict/, reports ops/sec and
+latency percentiles, and compares against a stored baseline.
+
+USAGE:
+    python benchmark.py                                   # run everything
+    python benchmark.py --only lip --iterations 500       # components matching "lip"
+    python benchmark.py --output bench.json               # save results
+    python benchmark.py --baseline bench_baseline.json    # compare with a previous run
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+SAMPLE_IMAGE_DIR = Path("runs/detect/predict")
+
+# Stand-in for a MediaPipe NormalizedLandmark
+SyntheticLandmark = namedtuple('SyntheticLandmark', ['x', 'y', 'z'])
+
+
+# ============================================
+# TIMING HARNESS
+# ============================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def time_component(fn, iterations=200, warmup=10, min_time=0.0):
+    """Call fn repeatedly and return latency statistics in milliseconds"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < iterations or (time.perf_counter() - start) < min_time:
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - t0) / 1e6)
+    total = time.perf_counter() - start
+
+    samples.sort()
+    return {
+        'iterations': len(samples),
+        'ops_per_sec': round(len(samples) / total, 2) if total > 0 else 0.0,
+        'mean_ms': round(sum(samples) / len(samples), 4),
+        'min_ms': round(samples[0], 4),
+        'p50_ms': round(percentile(samples, 50), 4),
+        'p90_ms': round(percentile(samples, 90), 4),
+        'p99_ms': round(percentile(samples, 99), 4),
+        'max_ms': round(samples[-1], 4)
+    }
+
+
+# ============================================
+# SYNTHETIC INPUTS
+# ============================================
+
+def synthetic_frame(width=960, height=720, seed=0):
+    """Random BGR frame the size camera.js uploads"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def sample_frame():
+    """First sample image from runs/detect/predict (None if missing)"""
+    for path in sorted(SAMPLE_IMAGE_DIR.glob("*.jpg")):
+        frame = cv2.imread(str(path))
+        if frame is not None:
+            return frame
+    return None
+
+
+def synthetic_landmarks(seed=0, count=478):
+    """Face-mesh sized landmark list with a plausible mouth"""
+    rng = np.random.default_rng(seed)
+    points = [SyntheticLandmark(*p) for p in rng.uniform(0.3, 0.7, (count, 3)).tolist()]
+    points[13] = SyntheticLandmark(0.50, 0.62, 0.0)
+    points[14] = SyntheticLandmark(0.50, 0.66, 0.0)
+    points[61] = SyntheticLandmark(0.44, 0.64, 0.0)
+    points[291] = SyntheticLandmark(0.56, 0.64, 0.0)
+    return points
+
+
+def synthetic_openness_stream(length=30, seed=0):
+    """Mouth openness sequence resembling a spoken word"""
+    rng = np.random.default_rng(seed)
+    base = 0.3 + 0.1 * np.sin(np.linspace(0, 2 * np.pi, length))
+    return (base + rng.normal(0, 0.02, length)).tolist()
+
+
+def synthetic_lip_crops(count=30, seed=0):
+    """Variable-size BGR mouth crops for LRS3 preprocessing"""
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (int(rng.integers(50, 80)), int(rng.integers(90, 130)), 3), dtype=np.uint8)
+            for _ in range(count)]
+
+
+def encode_data_url(frame, quality=80):
+    """Encode a frame the way camera.js does (JPEG data URL)"""
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.tobytes()).decode('ascii')
+
+
+# ============================================
+# COMPONENT REGISTRY
+# ============================================
+
+def ungated(fn, *gates):
+    """Run `fn` with empty motion gates, so repeated identical frames are really inferred"""
+    def run():
+        for gate in gates:
+            gate.reset()
+        return fn()
+    return run
+
+
+def build_components(app_module):
+    """Return {name: callable}; components whose dependencies are missing are skipped"""
+    components = {}
+    skipped = {}
+
+    frame = synthetic_frame()
+    sample = sample_frame()
+
+    # --- ASL recognition ---
+    detector = app_module.asl_system.detector
+    if detector.is_available:
+        components['asl.yolo_detect.synthetic'] = lambda: detector.detect(frame)
+        if sample is not None:
+            components['asl.yolo_detect.sample'] = lambda: detector.detect(sample)
+    else:
+        skipped['asl.yolo_detect'] = "YOLO model not loaded"
+
+    data_url = encode_data_url(sample if sample is not None else frame)
+    asl_gate = app_module.asl_system.motion_gate
+    components['asl.process_image'] = ungated(lambda: app_module.asl_system.process_image(data_url), asl_gate)
+    # The same frame every iteration: mostly motion gate hits
+    components['asl.process_image.gated'] = lambda: app_module.asl_system.process_image(data_url)
+
+    # --- Lip reading ---
+    lip = app_module.lip_reading_system or app_module.ImprovedLipReadingDetector()
+    landmarks = synthetic_landmarks()
+    components['lip.calculate_features'] = lambda: lip.calculate_lip_features(landmarks)
+
+    stream = synthetic_openness_stream()
+
+    def analyze_temporal():
+        lip.openness_history.clear()
+        lip.movement_history.clear()
+        lip.openness_history.extend(stream)
+        lip.movement_history.extend(abs(b - a) for a, b in zip(stream, stream[1:]))
+        return lip.analyze_temporal_sequence()
+
+    components['lip.analyze_temporal_sequence'] = analyze_temporal
+
+    if lip.is_available:
+        lip_input = sample if sample is not None else frame
+        components['lip.process_frame'] = ungated(lambda: lip.process_frame(lip_input), lip.motion_gate)
+        components['lip.process_frame.gated'] = lambda: lip.process_frame(lip_input)
+    else:
+        skipped['lip.process_frame'] = "MediaPipe not available"
+
+    # --- Fused single upload (ASL + lip reading on one frame) vs two separate uploads ---
+    if detector.is_available and lip.is_available:
+        fused = app_module.fused_pipeline
+        components['fused.process'] = ungated(lambda: fused.process(data_url, session_id="bench-fused"),
+                                              asl_gate, lip.motion_gate)
+        components['fused.separate_uploads'] = ungated(lambda: (
+            app_module.asl_system.process_image(data_url, session_id="bench-separate"),
+            lip.process_frame(app_module.decode_frame(data_url), session_id="bench-separate")),
+            asl_gate, lip.motion_gate)
+    else:
+        skipped['fused.process'] = "needs both the YOLO model and MediaPipe"
+
+    # --- LRS3 preprocessing (no checkpoint needed) ---
+    try:
+        from model_loader import LRS3LipReader
+        reader = LRS3LipReader.__new__(LRS3LipReader)
+        crops = synthetic_lip_crops()
+        components['lrs3.preprocess_lip_frames'] = lambda: reader.preprocess_lip_frames(crops)
+    except Exception as e:
+        skipped['lrs3.preprocess_lip_frames'] = str(e)
+
+    # --- Text and history routes ---
+    client = app_module.app.test_client()
+    sentence = {"text": "Hi, nice to meet you! How are you? Thanks for the help, see you again"}
+    components['text.convert_text_to_asl'] = lambda: client.post('/convert_text_to_asl', json=sentence)
+
+    entry = {"type": "text-to-asl", "input": "hello", "output": "hello", "confidence": 0.9,
+             "method": "benchmark", "duration": 0.1, "metadata": {}}
+    components['history.save_history'] = lambda: client.post('/save_history', json=entry)
+    components['history.get_history'] = lambda: client.get('/get_history?limit=100')
+    components['history.get_history.filtered'] = lambda: client.get('/get_history?limit=100&type=text-to-asl')
+    components['history.get_statistics'] = lambda: client.get('/get_statistics')
+
+    return components, skipped
+
+
+# ============================================
+# BASELINE COMPARISON
+# ============================================
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Compare p50 latency with a stored run; returns list of regressions"""
+    regressions = []
+    print("\n" + "=" * 80)
+    print(f"{'COMPONENT':40s} {'BASE p50':>10s} {'NOW p50':>10s} {'CHANGE':>10s}")
+    print("=" * 80)
+
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous.get('p50_ms'):
+            print(f"{name:40s} {'-':>10s} {current['p50_ms']:>10.3f} {'new':>10s}")
+            continue
+
+        change = (current['p50_ms'] - previous['p50_ms']) / previous['p50_ms']
+        flag = ""
+        if change > tolerance:
+            flag = "  <-- SLOWER"
+            regressions.append(name)
+        elif change < -tolerance:
+            flag = "  faster"
+        print(f"{name:40s} {previous['p50_ms']:>10.3f} {current['p50_ms']:>10.3f} {change:>+9.1%}{flag}")
+
+    return regressions
+
+
+def environment_info():
+    """Machine description stored alongside results"""
+    info = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+    try:
+        import torch
+        info['torch'] = torch.__version__
+        info['torch_threads'] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SignEase component microbenchmarks")
+    parser.add_argument('--only', action='append', default=[], help="Run components whose name contains this")
+    parser.add_argument('--iterations', type=int, default=200, help="Timed calls per component")
+    parser.add_argument('--warmup', type=int, default=10, help="Untimed warm-up calls")
+    parser.add_argument('--min-time', type=float, default=0.0, help="Minimum seconds per component")
+    parser.add_argument('--output', help="Save results as JSON")
+    parser.add_argument('--baseline', help="Compare against a previous JSON result")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Allowed p50 slowdown (0.10 = 10%%)")
+    parser.add_argument('--history-db', help="History DB for route benchmarks (default: temporary file)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Never benchmark against the real history database
+    temp_dir = None
+    if args.history_db:
+        os.environ['SIGNEASE_HISTORY_DB'] = args.history_db
+    else:
+        temp_dir = tempfile.TemporaryDirectory()
+        os.environ['SIGNEASE_HISTORY_DB'] = os.path.join(temp_dir.name, "bench_history.db")
+
+    logging.disable(logging.INFO)
+    import app as app_module
+
+    components, skipped = build_components(app_module)
+    if args.only:
+        components = {name: fn for name, fn in components.items()
+                      if any(pattern in name for pattern in args.only)}
+
+    print("=" * 80)
+    print("SIGNEASE COMPONENT BENCHMARKS")
+    print("=" * 80)
+    print(f"{'COMPONENT':40s} {'OPS/SEC':>10s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s}")
+
+    results = {}
+    for name, fn in components.items():
+        try:
+            stats = time_component(fn, args.iterations, args.warmup, args.min_time)
+        except Exception as e:
+            skipped[name] = f"failed: {e}"
+            continue
+        results[name] = stats
+        print(f"{name:40s} {stats['ops_per_sec']:>10.1f} {stats['p50_ms']:>9.3f} "
+              f"{stats['p90_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+
+    for name, reason in skipped.items():
+        print(f"{name:40s} SKIPPED ({reason})")
+
+    report = {'environment': environment_info(), 'results': results, 'skipped': skipped}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved: {args.output}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} component(s) slower than baseline by more than {args.tolerance:.0%}")
+            exit_code = 1
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
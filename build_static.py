@@ -0,0 +1,327 @@
+"""
+Static Build - Minified, fingerprinted, precompressed front-end bundles
+
+Concatenates the page's scripts and stylesheets into one bundle each,
+minifies them, names each bundle after a hash of its content and writes
+gzip (and brotli, if the `brotli` package is installed) variants next to it:
+
+    static/dist/signease.3f9c1a2b7e.js      (+ .gz, .br)
+    static/dist/signease.8d02e4c6f1.css     (+ .gz, .br)
+    static/dist/manifest.json
+
+The app's `asset_urls()` template helper reads the manifest; `/assets/`
+serves the precompressed file matching Accept-Encoding with an immutable
+cache header. A new build gets new file names, so browsers never
+revalidate a bundle. Without a build the page loads the source files.
+
+The minifier is conservative: it drops comments and redundant whitespace
+but keeps line breaks (automatic semicolon insertion) and never renames.
+
+USAGE:
+    python build_static.py           # build static/dist
+    python build_static.py --check   # report sizes without writing
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Bundle name -> source files under static/, in page load order
+BUNDLES = {
+    'signease.css': ['style.css'],
+    'signease.js': ['voice-to-asl.js', 'text-to-asl.js', 'camera.js', 'history.js']
+}
+
+
+# ============================================
+# MINIFIERS
+# ============================================
+
+_WORD = re.compile(r'[\w$]')
+# A '/' after these starts a regex literal, not a division
+_REGEX_AFTER_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_AFTER_WORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                      'throw', 'yield', 'await'}
+
+
+def _needs_space(previous, following):
+    """A single space is required between these characters"""
+    if _WORD.match(previous) and _WORD.match(following):
+        return True
+    if previous == following and previous in '+-/':
+        return True
+    return previous.isdigit() and following == '.'
+
+
+def minify_js(source):
+    """Strip comments and whitespace from a script, keeping strings, templates, regexes and line breaks"""
+    out = []
+    i, n = 0, len(source)
+    templates = []        # brace depth inside each open `${ ... }` substitution
+    pending = ''          # whitespace seen since the last token: '', ' ' or '\n'
+    last_char = ''
+    last_word = ''
+
+    def copy_until_quote(start, quote):
+        j = start + 1
+        while j < n and source[j] != quote:
+            j += 2 if source[j] == '\\' else 1
+        return j + 1
+
+    def copy_template(start):
+        """Template text from `start` to the closing backtick or the next `${`"""
+        j = start
+        while j < n:
+            if source[j] == '\\':
+                j += 2
+            elif source[j] == '`':
+                return j + 1, False
+            elif source.startswith('${', j):
+                return j + 2, True
+            else:
+                j += 1
+        return n, False
+
+    def copy_regex(start):
+        j, in_class = start + 1, False
+        while j < n:
+            c = source[j]
+            if c == '\\':
+                j += 2
+                continue
+            if c == '[':
+                in_class = True
+            elif c == ']':
+                in_class = False
+            elif c == '/' and not in_class:
+                break
+            j += 1
+        j += 1
+        while j < n and _WORD.match(source[j]):
+            j += 1
+        return j
+
+    while i < n:
+        c = source[i]
+
+        if c in ' \t\r\n':
+            if c == '\n':
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i += 1
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            pending = '\n' if '\n' in source[i:end] or pending == '\n' else (pending or ' ')
+            i = end
+            continue
+
+        if pending == '\n' and out:
+            out.append('\n')
+        elif pending and last_char and _needs_space(last_char, c):
+            out.append(' ')
+        pending = ''
+
+        if c in '\'"':
+            end = copy_until_quote(i, c)
+        elif c == '`':
+            end, opened = copy_template(i + 1)
+            if opened:
+                templates.append(0)
+        elif c == '}' and templates and templates[-1] == 0:
+            templates.pop()
+            end, opened = copy_template(i + 1)
+            if opened:
+                templates.append(0)
+        elif c == '/' and (not last_char or last_char in _REGEX_AFTER_CHARS or last_word in _REGEX_AFTER_WORDS):
+            end = copy_regex(i)
+        elif _WORD.match(c):
+            end = i + 1
+            while end < n and _WORD.match(source[end]):
+                end += 1
+        else:
+            end = i + 1
+            if templates:
+                if c == '{':
+                    templates[-1] += 1
+                elif c == '}':
+                    templates[-1] -= 1
+
+        token = source[i:end]
+        out.append(token)
+        last_char = token[-1]
+        last_word = token if _WORD.match(c) else ''
+        i = end
+
+    return ''.join(out).strip() + '\n'
+
+
+def minify_css(source):
+    """Strip comments and whitespace from a stylesheet (strings kept as-is)"""
+    parts = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', source)
+    for index in range(0, len(parts), 2):
+        text = re.sub(r'/\*.*?\*/', '', parts[index], flags=re.S)
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+        parts[index] = text.replace(';}', '}')
+    return ''.join(parts).strip() + '\n'
+
+
+MINIFIERS = {'.js': minify_js, '.css': minify_css}
+
+
+# ============================================
+# BUILD
+# ============================================
+
+def _bundle_source(sources, static_dir):
+    chunks = []
+    for name in sources:
+        with open(os.path.join(static_dir, name), 'r', encoding='utf-8') as f:
+            chunks.append(f.read())
+    return chunks
+
+
+def _write(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR, bundles=None, write=True):
+    """Build every bundle; returns the manifest"""
+    bundles = bundles or BUNDLES
+    manifest = {
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'brotli': BROTLI_AVAILABLE,
+        'bundles': {}
+    }
+    if write:
+        os.makedirs(dist_dir, exist_ok=True)
+
+    for name, sources in bundles.items():
+        stem, ext = os.path.splitext(name)
+        minify = MINIFIERS[ext]
+        chunks = _bundle_source(sources, static_dir)
+        # Each script ends its own statements, as it did as a separate <script>
+        separator = ';\n' if ext == '.js' else '\n'
+        data = separator.join(minify(chunk) for chunk in chunks).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        filename = f"{stem}.{digest}{ext}"
+
+        variants = {'gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if BROTLI_AVAILABLE:
+            variants['br'] = brotli.compress(data, quality=11)
+
+        manifest['bundles'][name] = {
+            'file': filename,
+            'sources': sources,
+            'source_bytes': sum(len(chunk.encode('utf-8')) for chunk in chunks),
+            'bytes': len(data),
+            **{f'{suffix}_bytes': len(blob) for suffix, blob in variants.items()}
+        }
+        if write:
+            _write(os.path.join(dist_dir, filename), data)
+            for suffix, blob in variants.items():
+                _write(os.path.join(dist_dir, f"{filename}.{suffix}"), blob)
+
+    if write:
+        # Drop bundles of earlier builds
+        keep = {MANIFEST_NAME}
+        for entry in manifest['bundles'].values():
+            keep.update({entry['file'], entry['file'] + '.gz', entry['file'] + '.br'})
+        for existing in os.listdir(dist_dir):
+            if existing not in keep:
+                os.remove(os.path.join(dist_dir, existing))
+        _write(os.path.join(dist_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+class AssetManifest:
+    """Built bundle names, reloaded when the manifest file changes"""
+
+    def __init__(self, dist_dir=DIST_DIR):
+        self.dist_dir = dist_dir
+        self.path = os.path.join(dist_dir, MANIFEST_NAME)
+        self.bundles = {}
+        self.files = set()
+        self.mtime = None
+        self.lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        with self.lock:
+            bundles = {}
+            if mtime is not None:
+                try:
+                    with open(self.path, 'r') as f:
+                        bundles = json.load(f).get('bundles', {})
+                except (OSError, ValueError) as e:
+                    logger.error(f"Could not read asset manifest {self.path}: {e}")
+            self.bundles = bundles
+            self.files = {entry['file'] for entry in bundles.values()}
+            self.mtime = mtime
+
+    def get(self, bundle):
+        """Manifest entry of a bundle, or None without a build"""
+        self._refresh()
+        return self.bundles.get(bundle)
+
+    def has_file(self, filename):
+        self._refresh()
+        return filename in self.files
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build minified, fingerprinted, precompressed static bundles")
+    parser.add_argument('--static-dir', default=STATIC_DIR)
+    parser.add_argument('--dist-dir', default=None, help="Output directory (default: <static-dir>/dist)")
+    parser.add_argument('--check', action='store_true', help="Report sizes without writing files")
+    args = parser.parse_args(argv)
+
+    manifest = build(args.static_dir, args.dist_dir or os.path.join(args.static_dir, 'dist'), write=not args.check)
+    for name, entry in manifest['bundles'].items():
+        compressed = ', '.join(f"{key[:-6]} {entry[key]:,}" for key in ('gz_bytes', 'br_bytes') if key in entry)
+        print(f"{entry['file']:<28} {entry['source_bytes']:>8,} -> {entry['bytes']:>8,} bytes ({compressed})")
+    if not BROTLI_AVAILABLE:
+        print("brotli not installed: gzip variants only (pip install brotli)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Capture Profiles - Server-chosen upload size, JPEG quality and crop per pipeline
+
+The browser should only upload the pixels a model will use:
+- ASL: frames fitted into the YOLO input size (larger uploads are resized away)
+- Lip reading: a crop around the last detected face, fitted into `roi_size`
+  (FaceMesh's landmark model runs on a small face crop anyway)
+
+The client fits the source rectangle (the ROI, or the whole frame) into
+`width` x `height` preserving aspect ratio, never upscaling, and sends back
+the ROI it used. ROIs are normalized [x1, y1, x2, y2] full-frame coordinates,
+so results computed on a crop can be mapped back with `roi_to_frame`.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+
+
+@dataclass
+class PipelineProfile:
+    """Upload settings of one pipeline"""
+    width: int
+    height: int
+    quality: float = 0.7
+    roi_size: int = 0          # long side of ROI uploads (0 disables cropping)
+    roi_margin: float = 0.35   # ROI padding around the detection, as a fraction of its size
+    roi_ttl: float = 5.0       # seconds a ROI stays valid without a fresh detection
+
+
+DEFAULT_PROFILES = {
+    'asl': PipelineProfile(width=640, height=640, quality=0.7),
+    'lip': PipelineProfile(width=480, height=480, quality=0.75, roi_size=256)
+}
+
+
+def parse_roi(value):
+    """Validated (x1, y1, x2, y2) tuple in [0, 1], or None"""
+    if value is None:
+        return None
+    x1, y1, x2, y2 = (float(v) for v in value)
+    if not (0.0 <= x1 < x2 <= 1.0 and 0.0 <= y1 < y2 <= 1.0):
+        raise ValueError("roi must be normalized [x1, y1, x2, y2] with x1 < x2 and y1 < y2")
+    return x1, y1, x2, y2
+
+
+def roi_to_frame(box, roi):
+    """Map a normalized box inside `roi` to normalized full-frame coordinates"""
+    if roi is None or box is None:
+        return box
+    x1, y1, x2, y2 = roi
+    rw, rh = x2 - x1, y2 - y1
+    return [x1 + box[0] * rw, y1 + box[1] * rh, x1 + box[2] * rw, y1 + box[3] * rh]
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+def _area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+class CaptureProfiles:
+    """Per-pipeline base profiles plus a per-session ROI that follows detections"""
+
+    def __init__(self, profiles=None, max_sessions=256):
+        self.profiles = dict(profiles or DEFAULT_PROFILES)
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()  # (pipeline, session_id) -> {'roi', 'seen', 'version'}
+        self.lock = threading.Lock()
+        self._versions = itertools.count(1)
+        self.base_version = next(self._versions)
+
+    def set_base(self, pipeline, **changes):
+        """Change a pipeline's base settings (e.g. after a model with a new input size is swapped in)"""
+        with self.lock:
+            updated = replace(self.profiles[pipeline], **changes)
+            if updated != self.profiles[pipeline]:
+                self.profiles[pipeline] = updated
+                self.base_version = next(self._versions)
+
+    def get(self, pipeline, session_id="default"):
+        """Profile the client should capture with next"""
+        base = self.profiles[pipeline]
+        now = time.time()
+        with self.lock:
+            session = self.sessions.get((pipeline, session_id))
+            roi = None
+            if session and session['roi'] is not None and now - session['seen'] <= base.roi_ttl:
+                roi = session['roi']
+            session_version = session['version'] if session else 0
+
+        profile = {
+            'pipeline': pipeline,
+            'version': f"{self.base_version}.{session_version}.{int(roi is not None)}",
+            'width': base.width,
+            'height': base.height,
+            'quality': base.quality,
+            'roi': [round(v, 4) for v in roi] if roi else None
+        }
+        if roi:
+            profile['width'] = profile['height'] = base.roi_size
+        return profile
+
+    def observe(self, pipeline, session_id, box):
+        """Update the session ROI from a detection (normalized full-frame box, or None for a miss)"""
+        base = self.profiles[pipeline]
+        if not base.roi_size:
+            return
+
+        key = (pipeline, session_id)
+        now = time.time()
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = self.sessions[key] = {'roi': None, 'seen': now, 'version': 0}
+                while len(self.sessions) > self.max_sessions:
+                    self.sessions.popitem(last=False)
+            self.sessions.move_to_end(key)
+
+            roi = session['roi']
+            if box is None:
+                # Lost the target: go back to full frames
+                if roi is not None:
+                    session['roi'] = None
+                    session['version'] += 1
+                return
+
+            session['seen'] = now
+            # Keep a stable ROI while the target stays inside it at a similar scale
+            if roi is not None and _contains(roi, box) and _area(box) >= 0.25 * _area(roi):
+                return
+
+            w, h = box[2] - box[0], box[3] - box[1]
+            pad_x, pad_y = w * base.roi_margin, h * base.roi_margin
+            session['roi'] = (max(0.0, box[0] - pad_x), max(0.0, box[1] - pad_y),
+                              min(1.0, box[2] + pad_x), min(1.0, box[3] + pad_y))
+            session['version'] += 1
+
+    def get_status(self):
+        with self.lock:
+            active_rois = sum(1 for s in self.sessions.values() if s['roi'] is not None)
+        return {
+            'profiles': {name: asdict(profile) for name, profile in self.profiles.items()},
+            'sessions': len(self.sessions),
+            'active_rois': active_rois
+        }
@@ -0,0 +1,292 @@
+"""
+Correction Engine - Online nearest-neighbour corrections from user feedback
+
+All stored correction landmarks are kept as normalized vectors in one
+preallocated float32 matrix:
+- Small sets: exact brute-force search (one matrix-vector product)
+- Large sets: an IVF index (k-means cells, only the closest cells are probed),
+  trained once when the set outgrows `exact_limit`; later vectors are simply
+  assigned to their nearest cell, so there is never a full rebuild
+
+At inference time a detector prediction is overridden when at least half of
+the k nearest neighbours lie inside the radius and agree on a different sign,
+otherwise its confidence is re-weighted by how well the neighbourhood
+supports it. Frames without a detection are left alone.
+
+Landmark-only classification (no detector) answers only with signs that have
+at least `classify_min_samples` stored samples, and only once
+`classify_min_signs` signs are covered; before that it is unavailable.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from hand_landmarks import HAND_VECTOR_SIZE, NUM_HAND_LANDMARKS, normalize_hand_landmarks
+
+logger = logging.getLogger(__name__)
+
+
+def load_confidence_adjustments(path="learning_data.json"):
+    """Per-sign confidence offsets collected in the legacy feedback file"""
+    if not Path(path).exists():
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return {str(k): float(v) for k, v in json.load(f).get('confidence_adjustments', {}).items()}
+    except Exception as e:
+        logger.error(f"Could not load confidence adjustments: {e}")
+        return {}
+
+
+class CorrectionEngine:
+    """Vectorized kNN index over corrected landmark vectors"""
+
+    def __init__(self, k=5, radius=0.25, override_share=0.6, exact_limit=4096,
+                 n_lists=64, n_probe=6, initial_capacity=1024, classify_min_samples=20, classify_min_signs=5):
+        self.k = k
+        self.radius = radius                  # RMS distance on normalized landmarks
+        self.override_share = override_share  # vote share needed to replace the detector's class
+        self.exact_limit = exact_limit
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.classify_min_samples = classify_min_samples
+        self.classify_min_signs = classify_min_signs
+
+        self.vectors = np.empty((initial_capacity, HAND_VECTOR_SIZE), dtype=np.float32)
+        self.sq_norms = np.empty(initial_capacity, dtype=np.float32)
+        self.label_ids = np.empty(initial_capacity, dtype=np.int32)
+        self.size = 0
+
+        self.label_names = []
+        self.label_index = {}
+        self.confidence_adjustments = {}
+
+        # IVF state (None while searching exactly)
+        self.centroids = None
+        self.centroid_sq_norms = None
+        self.lists = None
+        self.cell_blocks = None
+
+        self.lock = threading.RLock()
+        self.stats = {'queries': 0, 'overrides': 0, 'reweights': 0}
+
+    @property
+    def is_available(self):
+        return self.size > 0
+
+    def covered_signs(self):
+        """Signs with enough samples for landmark-only classification"""
+        with self.lock:
+            counts = np.bincount(self.label_ids[:self.size], minlength=len(self.label_names))
+            return {self.label_names[i] for i in np.flatnonzero(counts >= self.classify_min_samples).tolist()}
+
+    @property
+    def can_classify(self):
+        """Enough signs are covered for landmark-only classification"""
+        return len(self.covered_signs()) >= self.classify_min_signs
+
+    # ============================================
+    # BUILDING THE INDEX
+    # ============================================
+
+    def _label_id(self, label):
+        if label not in self.label_index:
+            self.label_index[label] = len(self.label_names)
+            self.label_names.append(label)
+        return self.label_index[label]
+
+    def _grow(self, needed):
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('vectors', 'sq_norms', 'label_ids'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add_many(self, labels, landmark_vectors):
+        """Bulk insert raw (N, 63) landmark vectors"""
+        if len(labels) == 0:
+            return
+        raw = np.asarray(landmark_vectors, dtype=np.float32).reshape(-1, NUM_HAND_LANDMARKS, 3)
+        normalized = np.stack([normalize_hand_landmarks(points) for points in raw])
+
+        with self.lock:
+            start = self.size
+            self._grow(start + len(normalized))
+            self.vectors[start:start + len(normalized)] = normalized
+            self.sq_norms[start:start + len(normalized)] = np.einsum('ij,ij->i', normalized, normalized)
+            self.label_ids[start:start + len(normalized)] = [self._label_id(label) for label in labels]
+            self.size += len(normalized)
+
+            if self.centroids is not None:
+                self._assign(np.arange(start, self.size))
+            elif self.size > self.exact_limit:
+                self._train_ivf()
+
+    def add(self, label, landmarks):
+        """Insert one corrected sample (incremental, no rebuild)"""
+        self.add_many([label], np.asarray(landmarks, dtype=np.float32).reshape(1, -1))
+
+    def _train_ivf(self, iterations=8, seed=0):
+        """One-time k-means over the current vectors"""
+        data = self.vectors[:self.size]
+        rng = np.random.default_rng(seed)
+        n_lists = min(self.n_lists, self.size)
+        centroids = data[rng.choice(self.size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = self._nearest_centroids(data, centroids)
+            for c in range(n_lists):
+                members = data[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+
+        self.centroids = centroids
+        self.centroid_sq_norms = np.einsum('ij,ij->i', centroids, centroids)
+        self.lists = [[] for _ in range(n_lists)]
+        self.cell_blocks = [None] * n_lists
+        self._assign(np.arange(self.size))
+        logger.info(f"Correction index switched to IVF: {self.size} vectors, {n_lists} cells")
+
+    @staticmethod
+    def _nearest_centroids(data, centroids):
+        distances = (np.einsum('ij,ij->i', centroids, centroids)[None, :] - 2.0 * data @ centroids.T)
+        return np.argmin(distances, axis=1)
+
+    def _assign(self, ids):
+        assignment = self._nearest_centroids(self.vectors[ids], self.centroids)
+        for vector_id, cell in zip(ids.tolist(), assignment.tolist()):
+            self.lists[cell].append(vector_id)
+            self.cell_blocks[cell] = None
+
+    # ============================================
+    # QUERIES
+    # ============================================
+
+    def _cell_block(self, cell):
+        """Contiguous (vectors, squared norms, label ids) copy of one IVF cell"""
+        block = self.cell_blocks[cell]
+        if block is None:
+            ids = np.asarray(self.lists[cell], dtype=np.int64)
+            block = (self.vectors[ids], self.sq_norms[ids], self.label_ids[ids])
+            self.cell_blocks[cell] = block
+        return block
+
+    def _search_space(self, query):
+        """(squared distances without |q|^2, label ids) over all rows or the closest IVF cells"""
+        if self.centroids is None:
+            return (self.sq_norms[:self.size] - 2.0 * (self.vectors[:self.size] @ query),
+                    self.label_ids[:self.size])
+
+        distances = self.centroid_sq_norms - 2.0 * (self.centroids @ query)
+        n_probe = min(self.n_probe, len(distances))
+        cells = np.argpartition(distances, n_probe - 1)[:n_probe]
+
+        d2_parts, label_parts = [], []
+        for cell in cells.tolist():
+            vectors, sq_norms, label_ids = self._cell_block(cell)
+            if len(label_ids):
+                d2_parts.append(sq_norms - 2.0 * (vectors @ query))
+                label_parts.append(label_ids)
+        if not d2_parts:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32)
+        return np.concatenate(d2_parts), np.concatenate(label_parts)
+
+    def neighbours(self, landmarks, k=None):
+        """(label names, RMS distances) of the k nearest stored corrections"""
+        k = k or self.k
+        query = normalize_hand_landmarks(np.asarray(landmarks, dtype=np.float32).reshape(NUM_HAND_LANDMARKS, 3))
+
+        with self.lock:
+            if self.size == 0:
+                return [], np.zeros(0, dtype=np.float32)
+
+            d2, labels = self._search_space(query)
+            d2 += float(query @ query)
+            if len(d2) > k:
+                nearest = np.argpartition(d2, k)[:k]
+                nearest = nearest[np.argsort(d2[nearest])]
+            else:
+                nearest = np.argsort(d2)
+
+            distances = np.sqrt(np.maximum(d2[nearest], 0.0) / HAND_VECTOR_SIZE)
+            return [self.label_names[i] for i in labels[nearest].tolist()], distances
+
+    def vote(self, landmarks):
+        """Distance-weighted votes of neighbours inside the radius"""
+        labels, distances = self.neighbours(landmarks)
+        votes = {}
+        for label, distance in zip(labels, distances.tolist()):
+            if distance <= self.radius:
+                votes[label] = votes.get(label, 0.0) + 1.0 - distance / self.radius
+        return votes
+
+    def vote_counts(self, landmarks):
+        """(votes, neighbours inside the radius) per label"""
+        labels, distances = self.neighbours(landmarks)
+        votes, counts = {}, {}
+        for label, distance in zip(labels, distances.tolist()):
+            if distance <= self.radius:
+                votes[label] = votes.get(label, 0.0) + 1.0 - distance / self.radius
+                counts[label] = counts.get(label, 0) + 1
+        return votes, counts
+
+    def classify(self, landmarks):
+        """Landmark-only classification over the covered signs: (label, confidence) or (None, 0.0)"""
+        covered = self.covered_signs()
+        if len(covered) < self.classify_min_signs:
+            return None, 0.0
+        self.stats['queries'] += 1
+        votes = {label: weight for label, weight in self.vote(landmarks).items() if label in covered}
+        if not votes:
+            return None, 0.0
+        label = max(votes, key=votes.get)
+        return label, votes[label] / sum(votes.values())
+
+    def apply(self, prediction, confidence, landmarks=None):
+        """Override or re-weight a detector prediction; returns (prediction, confidence, corrected)"""
+        if prediction in self.confidence_adjustments:
+            confidence = min(1.0, max(0.0, confidence + self.confidence_adjustments[prediction]))
+
+        # Nothing detected: landmark-only answers go through classify() and its coverage gate
+        if prediction is None or landmarks is None or self.size == 0:
+            return prediction, confidence, False
+
+        self.stats['queries'] += 1
+        votes, counts = self.vote_counts(landmarks)
+        min_neighbours = (self.k + 1) // 2
+        if sum(counts.values()) < min_neighbours:
+            return prediction, confidence, False
+
+        total = sum(votes.values())
+        best = max(votes, key=votes.get)
+        share = votes[best] / total
+
+        # A majority of the k neighbours must agree; one stored sample is not enough
+        if best != prediction and share >= self.override_share and counts[best] >= min_neighbours:
+            self.stats['overrides'] += 1
+            similarity = votes[best] / counts[best]
+            return best, float(confidence * (1.0 - share) + share * similarity), True
+
+        # Neighbourhood agrees -> boost, disagrees without a clear winner -> damp
+        support = votes.get(prediction, 0.0) / total
+        self.stats['reweights'] += 1
+        return prediction, float(confidence * (0.5 + 0.5 * support) + 0.5 * support * (1.0 - confidence)), False
+
+    def get_stats(self):
+        return {
+            'vectors': self.size,
+            'signs': len(self.label_names),
+            'index': 'ivf' if self.centroids is not None else 'exact',
+            'classify_signs': sorted(self.covered_signs()),
+            'classify_ready': self.can_classify,
+            **self.stats
+        }
@@ -0,0 +1,263 @@
+"""
+Correction Store - Compact append-only storage for user-correction landmarks
+
+Layout:
+- Landmark vectors: fixed-width float32 records (21 x 3 = 63 floats, 252 bytes)
+  appended to a raw segment file (asl_corrections.f32). The whole segment is
+  loaded with a single memory map, no per-element parsing.
+- Metadata: indexed SQLite table `correction_vectors` in asl_learning.db,
+  each row pointing at its record via `vector_index`.
+
+USAGE:
+    python correction_store.py migrate     # one-shot import of learning_data.json + corrections table
+    python correction_store.py stats
+"""
+
+import argparse
+import ast
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from hand_landmarks import HAND_VECTOR_SIZE, parse_hand_landmarks
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DTYPE = np.dtype('<f4')
+RECORD_BYTES = HAND_VECTOR_SIZE * VECTOR_DTYPE.itemsize
+
+
+class CorrectionStore:
+    """Append-only correction vectors with SQLite metadata"""
+
+    def __init__(self, db_path="asl_learning.db", vector_path="asl_corrections.f32"):
+        self.db_path = db_path
+        self.vector_path = vector_path
+        self.lock = threading.Lock()
+        self.init_database()
+        self._repair_segment()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def init_database(self):
+        """Create the metadata table and indexes"""
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS correction_vectors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                vector_index INTEGER NOT NULL UNIQUE,
+                predicted TEXT,
+                actual TEXT NOT NULL,
+                reward REAL DEFAULT 0.0,
+                timestamp REAL NOT NULL,
+                source TEXT,
+                source_key TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_correction_actual ON correction_vectors(actual)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_correction_predicted ON correction_vectors(predicted)')
+        conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_correction_source
+            ON correction_vectors(source, source_key) WHERE source_key IS NOT NULL
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _repair_segment(self):
+        """Drop a partially written trailing record, vectors without metadata and metadata without vectors"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT MAX(vector_index) FROM correction_vectors').fetchone()
+            committed = (row[0] + 1) if row[0] is not None else 0
+
+            size = os.path.getsize(self.vector_path) if os.path.exists(self.vector_path) else 0
+            if size > committed * RECORD_BYTES:
+                logger.warning(f"Correction segment has {size} bytes, truncating to {committed} records")
+                with open(self.vector_path, 'r+b') as f:
+                    f.truncate(committed * RECORD_BYTES)
+            elif size < committed * RECORD_BYTES:
+                # Segment lost records (restored from an older copy, disk full, ...):
+                # never zero-fill, drop the metadata that points past its end instead
+                stored = size // RECORD_BYTES
+                deleted = conn.execute('DELETE FROM correction_vectors WHERE vector_index >= ?', (stored,)).rowcount
+                conn.commit()
+                logger.warning(f"Correction segment holds {stored} of {committed} records, "
+                               f"dropped {deleted} metadata rows without vectors")
+                if size != stored * RECORD_BYTES:
+                    with open(self.vector_path, 'r+b') as f:
+                        f.truncate(stored * RECORD_BYTES)
+        finally:
+            conn.close()
+
+    def count(self):
+        """Number of stored vectors"""
+        if not os.path.exists(self.vector_path):
+            return 0
+        return os.path.getsize(self.vector_path) // RECORD_BYTES
+
+    def append(self, predicted, actual, landmarks, reward=0.0, timestamp=None, source='feedback', source_key=None):
+        """Append one correction; returns its row id (None if source_key already stored)"""
+        vector = parse_hand_landmarks(landmarks).reshape(-1).astype(VECTOR_DTYPE)
+
+        with self.lock:
+            conn = self._connect()
+            try:
+                if source_key is not None:
+                    exists = conn.execute(
+                        'SELECT 1 FROM correction_vectors WHERE source = ? AND source_key = ?',
+                        (source, source_key)).fetchone()
+                    if exists:
+                        return None
+
+                # Vector first, metadata second: a crash in between leaves an
+                # orphan record that _repair_segment truncates on next start
+                vector_index = self.count()
+                with open(self.vector_path, 'ab') as f:
+                    f.write(vector.tobytes())
+
+                try:
+                    cursor = conn.execute('''
+                        INSERT INTO correction_vectors
+                        (vector_index, predicted, actual, reward, timestamp, source, source_key)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (vector_index, predicted, actual, float(reward),
+                          timestamp if timestamp is not None else time.time(), source, source_key))
+                    conn.commit()
+                except Exception:
+                    # No metadata (e.g. database locked): drop the vector again, so the
+                    # next append reuses its index instead of leaving a gap
+                    with open(self.vector_path, 'r+b') as f:
+                        f.truncate(vector_index * RECORD_BYTES)
+                    raise
+                return cursor.lastrowid
+            finally:
+                conn.close()
+
+    def load_vectors(self):
+        """All vectors as one read-only (N, 63) float32 memory map"""
+        count = self.count()
+        if count == 0:
+            return np.zeros((0, HAND_VECTOR_SIZE), dtype=VECTOR_DTYPE)
+        return np.memmap(self.vector_path, dtype=VECTOR_DTYPE, mode='r', shape=(count, HAND_VECTOR_SIZE))
+
+    def load_all(self):
+        """(vectors, metadata rows) aligned by vector_index"""
+        with self.lock:
+            vectors = self.load_vectors()
+            conn = self._connect()
+            rows = conn.execute('''
+                SELECT id, vector_index, predicted, actual, reward, timestamp
+                FROM correction_vectors ORDER BY vector_index
+            ''').fetchall()
+            conn.close()
+
+        metadata = [
+            {'id': r[0], 'vector_index': r[1], 'predicted': r[2], 'actual': r[3], 'reward': r[4], 'timestamp': r[5]}
+            for r in rows if r[1] < len(vectors)
+        ]
+        return vectors, metadata
+
+    def get_stats(self):
+        """Counts per label and storage size"""
+        conn = self._connect()
+        by_actual = dict(conn.execute(
+            'SELECT actual, COUNT(*) FROM correction_vectors GROUP BY actual').fetchall())
+        conn.close()
+        return {
+            'vectors': self.count(),
+            'by_actual': by_actual,
+            'segment_bytes': os.path.getsize(self.vector_path) if os.path.exists(self.vector_path) else 0
+        }
+
+    # ============================================
+    # MIGRATION FROM LEGACY FORMATS
+    # ============================================
+
+    def migrate(self, json_path="learning_data.json", legacy_db_path=None):
+        """Import learning_data.json feedback and the legacy corrections table (idempotent)"""
+        imported = {'json': 0, 'legacy_db': 0, 'skipped': 0}
+
+        if json_path and os.path.exists(json_path):
+            with open(json_path, 'r') as f:
+                data = json.load(f)
+
+            for i, entry in enumerate(data.get('user_feedback', [])):
+                try:
+                    when = entry.get('timestamp')
+                    timestamp = datetime.fromisoformat(when).timestamp() if when else None
+                    row_id = self.append(entry.get('predicted'), entry['actual'], entry['landmarks'],
+                                         timestamp=timestamp, source='learning_data.json',
+                                         source_key=f"{i}:{when}")
+                    if row_id is not None:
+                        imported['json'] += 1
+                except (KeyError, TypeError, ValueError):
+                    imported['skipped'] += 1
+
+        legacy_db_path = legacy_db_path or self.db_path
+        if legacy_db_path and os.path.exists(legacy_db_path):
+            conn = sqlite3.connect(legacy_db_path)
+            has_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'corrections'").fetchone()
+            rows = conn.execute(
+                'SELECT id, predicted, actual, features, reward, timestamp FROM corrections').fetchall() if has_table else []
+            conn.close()
+
+            for row_id, predicted, actual, features, reward, timestamp in rows:
+                try:
+                    landmarks = _parse_features_text(features)
+                    stored = self.append(predicted, actual, landmarks, reward=reward or 0.0,
+                                         timestamp=timestamp, source='corrections', source_key=str(row_id))
+                    if stored is not None:
+                        imported['legacy_db'] += 1
+                except (TypeError, ValueError, SyntaxError):
+                    imported['skipped'] += 1
+
+        logger.info(f"Correction migration: {imported}")
+        return imported
+
+
+def _parse_features_text(text):
+    """Legacy `features` TEXT column: JSON or Python-literal list of floats"""
+    if text is None:
+        raise ValueError("empty features")
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return ast.literal_eval(text)
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact correction store")
+    parser.add_argument('command', choices=['migrate', 'stats'])
+    parser.add_argument('--db', default="asl_learning.db", help="Metadata database")
+    parser.add_argument('--vectors', default="asl_corrections.f32", help="Vector segment file")
+    parser.add_argument('--json', default="learning_data.json", help="Legacy feedback JSON")
+    parser.add_argument('--legacy-db', help="Database with the legacy corrections table (default: --db)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = CorrectionStore(args.db, args.vectors)
+
+    if args.command == 'migrate':
+        result = store.migrate(args.json, args.legacy_db)
+        print(f"Imported {result['json']} from {args.json}, {result['legacy_db']} from corrections table "
+              f"({result['skipped']} skipped)")
+
+    print(json.dumps(store.get_stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
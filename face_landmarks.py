@@ -0,0 +1,149 @@
+"""
+Face Landmark Utilities - Vectorized lip geometry on FaceMesh landmarks
+
+Only the lip region is copied out of a FaceMesh result: the 40 landmarks of
+the outer and inner lip contours go into a preallocated (40, 3) float32
+buffer, once per frame. Every feature (widths, heights, contour areas,
+openness) and the bounding box is then computed with vectorized NumPy ops
+on fixed index arrays, so adding features does not add per-landmark Python.
+"""
+
+import numpy as np
+
+# Contours in drawing order (MediaPipe FACEMESH_LIPS), starting at the left corner
+LIPS_OUTER_IDS = (61, 185, 40, 39, 37, 0, 267, 269, 270, 409,
+                  291, 375, 321, 405, 314, 17, 84, 181, 91, 146)
+LIPS_INNER_IDS = (78, 191, 80, 81, 82, 13, 312, 311, 310, 415,
+                  308, 324, 318, 402, 317, 14, 87, 178, 88, 95)
+
+# Points the legacy client upload sends (upper, lower, left corner, right corner)
+LIP_KEY_IDS = (13, 14, 61, 291)
+
+LIP_LANDMARK_IDS = LIPS_OUTER_IDS + LIPS_INNER_IDS
+NUM_LIP_LANDMARKS = len(LIP_LANDMARK_IDS)
+
+FACE_OVAL_IDS = (10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
+                 397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150, 136,
+                 172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109)
+
+_ROW = {landmark_id: row for row, landmark_id in enumerate(LIP_LANDMARK_IDS)}
+_LIP_IDS = np.array(LIP_LANDMARK_IDS)
+_KEY_ROWS = np.array([_ROW[i] for i in LIP_KEY_IDS])
+
+# Everything the contour features need, gathered in one indexing op:
+# contour points (outer then inner), their successors (closed polygons),
+# facing upper/lower points along the mouth (outer then inner) and the corners
+_CONTOUR_ROWS = np.array([_ROW[i] for i in LIPS_OUTER_IDS + LIPS_INNER_IDS])
+_SUCCESSOR_ROWS = np.array([_ROW[i] for i in LIPS_OUTER_IDS[1:] + LIPS_OUTER_IDS[:1] +
+                            LIPS_INNER_IDS[1:] + LIPS_INNER_IDS[:1]])
+_UPPER_ROWS = np.array([_ROW[i] for i in (40, 37, 0, 267, 270, 81, 82, 13, 312, 311)])
+_LOWER_ROWS = np.array([_ROW[i] for i in (91, 84, 17, 314, 321, 178, 87, 14, 317, 402)])
+_CORNER_ROWS = np.array([_ROW[i] for i in (61, 291, 78, 308)])
+_GATHER_ROWS = np.concatenate([_CONTOUR_ROWS, _SUCCESSOR_ROWS, _UPPER_ROWS, _LOWER_ROWS, _CORNER_ROWS])
+_N_CONTOUR, _N_HEIGHTS = len(_CONTOUR_ROWS), len(_UPPER_ROWS)
+
+# Per-contour sums as matrix products: (40,) cross terms -> 2 areas, (10,) heights -> 2 means
+_CONTOUR_SUM = np.zeros((_N_CONTOUR, 2), dtype=np.float32)
+_CONTOUR_SUM[:len(LIPS_OUTER_IDS), 0] = _CONTOUR_SUM[len(LIPS_OUTER_IDS):, 1] = 0.5
+_HEIGHT_MEAN = np.zeros((_N_HEIGHTS, 2), dtype=np.float32)
+_HEIGHT_MEAN[:_N_HEIGHTS // 2, 0] = _HEIGHT_MEAN[_N_HEIGHTS // 2:, 1] = 2.0 / _N_HEIGHTS
+
+
+class LipGeometry:
+    """Preallocated lip landmark buffer with vectorized features"""
+
+    def __init__(self):
+        self.points = np.zeros((NUM_LIP_LANDMARKS, 3), dtype=np.float32)
+        self._flat = self.points.reshape(-1)
+        self.has_contours = False
+
+    def load(self, landmarks, roi=None):
+        """Copy lip landmarks into the buffer
+
+        Accepts a FaceMesh landmark list (or anything indexable by mesh id) or
+        an array of shape (>=468, 3), (40, 3) in LIP_LANDMARK_IDS order, or
+        (4, 3) in LIP_KEY_IDS order (key points only, no contour features).
+        Landmarks of a cropped frame are mapped back to full-frame coordinates
+        with `roi` (normalized [x1, y1, x2, y2] of the crop).
+        """
+        self._fill(landmarks)
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            self.points *= (x2 - x1, y2 - y1, x2 - x1)
+            self.points[:, :2] += (x1, y1)
+        return self
+
+    def _fill(self, landmarks):
+        if isinstance(landmarks, np.ndarray):
+            if len(landmarks) == len(LIP_KEY_IDS):
+                self.points[_KEY_ROWS] = landmarks
+                self.has_contours = False
+                return
+            self.points[:] = landmarks if len(landmarks) == NUM_LIP_LANDMARKS else landmarks[_LIP_IDS]
+        else:
+            # One flat float list -> one buffer write
+            self._flat[:] = [v for p in map(landmarks.__getitem__, LIP_LANDMARK_IDS) for v in (p.x, p.y, p.z)]
+        self.has_contours = True
+
+    def features(self):
+        """Openness plus, with full contours, widths, heights and areas (normalized image units)"""
+        (upper_x, upper_y), (lower_x, lower_y), (left_x, _), (right_x, _) = self.points[_KEY_ROWS, :2].tolist()
+        vertical = abs(upper_y - lower_y)
+        horizontal = abs(left_x - right_x)
+        features = {
+            'openness': vertical / (horizontal + 1e-6),
+            'vertical': vertical,
+            'horizontal': horizontal
+        }
+        if not self.has_contours:
+            return features
+
+        g = self.points[_GATHER_ROWS, :2]
+        contour = g[:_N_CONTOUR]
+        successor = g[_N_CONTOUR:2 * _N_CONTOUR]
+        upper = g[2 * _N_CONTOUR:2 * _N_CONTOUR + _N_HEIGHTS]
+        lower = g[2 * _N_CONTOUR + _N_HEIGHTS:2 * _N_CONTOUR + 2 * _N_HEIGHTS]
+
+        # Shoelace areas of both contours at once
+        cross = contour[:, 0] * successor[:, 1] - contour[:, 1] * successor[:, 0]
+        outer_area, inner_area = (abs(v) for v in (cross @ _CONTOUR_SUM).tolist())
+        heights = np.abs(upper[:, 1] - lower[:, 1])
+        outer_height, inner_height = (heights @ _HEIGHT_MEAN).tolist()
+        inner_heights = heights[_N_HEIGHTS // 2:].tolist()
+
+        (ol_x, ol_y), (or_x, or_y), (il_x, il_y), (ir_x, ir_y) = g[2 * _N_CONTOUR + 2 * _N_HEIGHTS:].tolist()
+        outer_width = ((or_x - ol_x) ** 2 + (or_y - ol_y) ** 2) ** 0.5
+        inner_width = ((ir_x - il_x) ** 2 + (ir_y - il_y) ** 2) ** 0.5
+
+        features.update({
+            'outer_width': outer_width,
+            'inner_width': inner_width,
+            'inner_height': inner_height,
+            'outer_height': outer_height,
+            'inner_area': inner_area,
+            'outer_area': outer_area,
+            'mouth_aspect_ratio': inner_height / (inner_width + 1e-6),
+            'open_area_ratio': inner_area / (outer_area + 1e-9),
+            'asymmetry': (inner_heights[0] - inner_heights[-1]) / (max(inner_heights) + 1e-6)
+        })
+        return features
+
+    def bbox(self, w, h):
+        """Pixel [x1, y1, x2, y2] around the loaded lip points"""
+        xy = self.points[:, :2] if self.has_contours else self.points[_KEY_ROWS, :2]
+        (x1, y1), (x2, y2) = xy.min(axis=0).tolist(), xy.max(axis=0).tolist()
+        return [x1 * w, y1 * h, x2 * w, y2 * h]
+
+
+def face_bbox(landmarks, w, h):
+    """Pixel [x1, y1, x2, y2] from the 36 face-oval landmarks"""
+    xs = [landmarks[i].x for i in FACE_OVAL_IDS]
+    ys = [landmarks[i].y for i in FACE_OVAL_IDS]
+    return [min(xs) * w, min(ys) * h, max(xs) * w, max(ys) * h]
+
+
+def mouth_bbox(landmarks, w, h):
+    """Pixel [x1, y1, x2, y2] from the 20 outer lip landmarks"""
+    xs = [landmarks[i].x for i in LIPS_OUTER_IDS]
+    ys = [landmarks[i].y for i in LIPS_OUTER_IDS]
+    return [min(xs) * w, min(ys) * h, max(xs) * w, max(ys) * h]
@@ -0,0 +1,150 @@
+"""
+Frame Protocol - Slim per-frame responses after a one-time session handshake
+
+Static data (class lists, vocabularies, thresholds) is fetched once from the
+handshake and identified by `metadata_version`. Per-frame responses of
+clients that send `"slim": true` then carry only:
+- prediction, confidence, bbox, status
+- a text delta `[keep, append]`: the client keeps the first `keep`
+  characters of its copy of the text and appends `append` (omitted when the
+  text did not change)
+- `stale` flags telling the client to redo the handshake / take the new
+  capture profile
+
+Binary encoding (`"format": "binary"`, content type FRAME_CONTENT_TYPE),
+little-endian:
+    'SF' u8 protocol u8 flags u16 confidence*65535
+    u8 len + prediction utf8, u8 len + status utf8
+    [flags & HAS_BBOX]    4 x i16 bbox
+    [flags & HAS_TEXT]    u16 keep, u16 len + append utf8
+    [flags & HAS_PROFILE] u16 len + capture profile JSON
+"""
+
+import json
+import struct
+import threading
+from collections import OrderedDict
+
+PROTOCOL_VERSION = 1
+FRAME_CONTENT_TYPE = "application/x-signease-frame"
+
+HAS_BBOX = 0x01
+HAS_TEXT = 0x02
+METADATA_STALE = 0x04
+HAS_PROFILE = 0x08
+
+_HEADER = struct.Struct('<2sBBH')
+_BBOX = struct.Struct('<4h')
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+
+
+def _utf8(text, limit):
+    """UTF-8 bytes cut to `limit` without splitting a character"""
+    return (text or '').encode('utf-8')[:limit].decode('utf-8', 'ignore').encode('utf-8')
+
+
+def text_delta(previous, current):
+    """[keep, append] turning `previous` into `current`, or None if unchanged"""
+    if previous == current:
+        return None
+    keep = 0
+    limit = min(len(previous), len(current))
+    while keep < limit and previous[keep] == current[keep]:
+        keep += 1
+    return [keep, current[keep:]]
+
+
+class TextDeltaTracker:
+    """Text each session was last sent, per pipeline"""
+
+    def __init__(self, max_sessions=512):
+        self.max_sessions = max_sessions
+        self.sent = OrderedDict()  # (pipeline, session_id) -> text
+        self.lock = threading.Lock()
+
+    def delta(self, pipeline, session_id, text, client_length=None):
+        """Delta since the last response; a full resend if the client's copy has a different length"""
+        key = (pipeline, session_id)
+        with self.lock:
+            previous = self.sent.get(key)
+            # Unknown session or a diverged client copy (e.g. a lost response): resend everything
+            if previous is not None and client_length is not None and client_length != len(previous):
+                previous = None
+            self.sent[key] = text
+            self.sent.move_to_end(key)
+            while len(self.sent) > self.max_sessions:
+                self.sent.popitem(last=False)
+
+        if previous is None:
+            return [0, text]
+        return text_delta(previous, text)
+
+    def reset(self, session_id):
+        with self.lock:
+            for key in [key for key in self.sent if key[1] == session_id]:
+                del self.sent[key]
+
+
+def pack_frame(frame):
+    """Binary encoding of a slim frame dict"""
+    flags = 0
+    bbox, text = frame.get('bbox'), frame.get('text')
+    profile = frame.get('capture_profile')
+    if bbox:
+        flags |= HAS_BBOX
+    if text is not None:
+        flags |= HAS_TEXT
+    if frame.get('stale'):
+        flags |= METADATA_STALE
+    if profile:
+        flags |= HAS_PROFILE
+
+    prediction = _utf8(frame.get('prediction'), 255)
+    status = _utf8(frame.get('status'), 255)
+    confidence = int(round(max(0.0, min(1.0, frame.get('confidence') or 0.0)) * 65535))
+
+    parts = [_HEADER.pack(b'SF', PROTOCOL_VERSION, flags, confidence),
+             _U8.pack(len(prediction)), prediction, _U8.pack(len(status)), status]
+    if bbox:
+        parts.append(_BBOX.pack(*(max(-32768, min(32767, int(v))) for v in bbox)))
+    if text is not None:
+        append = _utf8(text[1], 65535)
+        parts += [_U16.pack(min(text[0], 65535)), _U16.pack(len(append)), append]
+    if profile:
+        encoded = json.dumps(profile, separators=(',', ':')).encode('utf-8')
+        parts += [_U16.pack(len(encoded)), encoded]
+    return b''.join(parts)
+
+
+def unpack_frame(data):
+    """Inverse of pack_frame (used by tools and load tests)"""
+    magic, protocol, flags, confidence = _HEADER.unpack_from(data, 0)
+    if magic != b'SF' or protocol != PROTOCOL_VERSION:
+        raise ValueError("Not a protocol 1 frame")
+    offset = _HEADER.size
+
+    def read_bytes(size_struct):
+        nonlocal offset
+        (length,) = size_struct.unpack_from(data, offset)
+        offset += size_struct.size
+        value = bytes(data[offset:offset + length])
+        offset += length
+        return value
+
+    frame = {
+        'confidence': confidence / 65535,
+        'prediction': read_bytes(_U8).decode('utf-8') or None,
+        'status': read_bytes(_U8).decode('utf-8'),
+        'stale': bool(flags & METADATA_STALE)
+    }
+    if flags & HAS_BBOX:
+        frame['bbox'] = list(_BBOX.unpack_from(data, offset))
+        offset += _BBOX.size
+    if flags & HAS_TEXT:
+        (keep,) = _U16.unpack_from(data, offset)
+        offset += _U16.size
+        frame['text'] = [keep, read_bytes(_U16).decode('utf-8')]
+    if flags & HAS_PROFILE:
+        frame['capture_profile'] = json.loads(read_bytes(_U16))
+    return frame
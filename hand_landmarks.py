@@ -0,0 +1,34 @@
+"""
+Hand Landmark Utilities - Compact landmark input for ASL
+
+Clients in landmark mode run hand tracking locally and upload 21 (x, y, z)
+points instead of a JPEG frame. These helpers validate and normalize such
+vectors for the correction engine and correction store.
+"""
+
+import numpy as np
+
+NUM_HAND_LANDMARKS = 21
+HAND_VECTOR_SIZE = NUM_HAND_LANDMARKS * 3
+
+
+def parse_hand_landmarks(values):
+    """Convert a 21x3 nested list or flat 63-float list into a (21, 3) float32 array"""
+    array = np.asarray(values, dtype=np.float32)
+    if array.size != HAND_VECTOR_SIZE:
+        raise ValueError(f"Expected {NUM_HAND_LANDMARKS} landmarks with x, y, z (got {array.size} values)")
+    array = array.reshape(NUM_HAND_LANDMARKS, 3)
+    if not np.all(np.isfinite(array)):
+        raise ValueError("Landmarks contain non-finite values")
+    return array
+
+
+def normalize_hand_landmarks(landmarks):
+    """Translation/scale invariant flat vector: wrist at origin, unit max radius"""
+    points = landmarks - landmarks[0]
+    xy = points[:, :2]
+    scale = float((xy * xy).sum(axis=1).max()) ** 0.5
+    if scale > 1e-6:
+        points *= 1.0 / scale
+    return points.reshape(-1).astype(np.float32, copy=False)
+
@@ -0,0 +1,242 @@
+"""
+History Cache - Recent conversion history and running totals in memory
+
+A write-through cache in front of the history database:
+- the newest `per_type` rows of each conversion type, in id order
+- per-type row counts and confidence sums (for /get_statistics) and the
+  archived rollup totals
+
+Every insert, delete and clear in app.py updates it after its commit, so the
+history screen's default queries (/get_history first pages, per type or
+all types, and /get_statistics) never open SQLite. Queries that reach past
+the cached window (older pages, search, export) still go to the database.
+
+The retention job invalidates the cache after each chunk it deletes; the next
+read reloads it (a few indexed queries). Writes by other processes
+(batch_inference.py, the retention CLI) are picked up by a reload every
+`refresh_interval` seconds.
+
+`version` changes with every modification, so responses carry it as an ETag
+and revalidating clients get 304 Not Modified while nothing changed.
+"""
+
+import heapq
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COLUMNS = ("id", "conversion_type", "input_text", "output_text", "confidence",
+                   "method", "duration", "timestamp", "date")
+
+
+class _TypeTotals:
+    def __init__(self, rows=0, confidence_sum=0.0, confidence_rows=0):
+        self.rows = rows
+        self.confidence_sum = confidence_sum
+        self.confidence_rows = confidence_rows   # rows with confidence > 0 (what AVG() counted)
+
+    def add(self, confidence, sign=1):
+        self.rows += sign
+        if confidence and confidence > 0:
+            self.confidence_sum += sign * confidence
+            self.confidence_rows += sign
+
+
+class RecentHistory:
+    """Newest rows per conversion type plus running aggregates, kept in step with the database"""
+
+    def __init__(self, db_path, per_type=200, refresh_interval=300.0):
+        self.db_path = db_path
+        self.per_type = per_type
+        self.refresh_interval = refresh_interval
+        self.lock = threading.RLock()
+        self.generation = uuid.uuid4().hex[:8]   # ETags of another process never match
+        self.version = 0
+        self.rows = {}              # type -> deque of row dicts, oldest first
+        self.complete = set()       # types whose deque holds every row in the database
+        self.totals = {}            # type -> _TypeTotals
+        self.archived_by_type = {}
+        self.last_seq = 0           # largest id issued when the cache was loaded
+        self.loaded_at = None
+        self.stale = True
+        self.stats = {'hits': 0, 'misses': 0, 'reloads': 0}
+
+    # ============================================
+    # LOADING
+    # ============================================
+
+    def reload(self):
+        """Rebuild from the database"""
+        with self.lock:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            try:
+                # One read transaction: rows, totals and last_seq come from the same snapshot, so a row
+                # committed meanwhile is either loaded or above last_seq (and then add()ed)
+                conn.execute('BEGIN')
+                seq = conn.execute(
+                    "SELECT seq FROM sqlite_sequence WHERE name = 'conversion_history'").fetchone()
+                rows, complete, totals = {}, set(), {}
+                for conversion_type, count, confidence_sum, confidence_rows in conn.execute('''
+                    SELECT conversion_type, COUNT(*), SUM(CASE WHEN confidence > 0 THEN confidence ELSE 0 END),
+                           SUM(CASE WHEN confidence > 0 THEN 1 ELSE 0 END)
+                    FROM conversion_history GROUP BY conversion_type
+                '''):
+                    totals[conversion_type] = _TypeTotals(count, confidence_sum or 0.0, confidence_rows or 0)
+                    recent = conn.execute(f'''
+                        SELECT {', '.join(HISTORY_COLUMNS)} FROM conversion_history
+                        WHERE conversion_type = ? ORDER BY id DESC LIMIT ?
+                    ''', (conversion_type, self.per_type)).fetchall()
+                    rows[conversion_type] = deque((dict(zip(HISTORY_COLUMNS, row)) for row in reversed(recent)),
+                                                  maxlen=self.per_type)
+                    if count <= self.per_type:
+                        complete.add(conversion_type)
+
+                has_rollup = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_rollup'").fetchone()
+                archived = dict(conn.execute(
+                    'SELECT conversion_type, SUM(rows) FROM history_rollup GROUP BY conversion_type'
+                ).fetchall()) if has_rollup else {}
+                conn.execute('COMMIT')
+            finally:
+                conn.close()
+
+            self.rows, self.complete, self.totals, self.archived_by_type = rows, complete, totals, archived
+            self.last_seq = seq[0] if seq else 0
+            self.loaded_at = time.monotonic()
+            self.stale = False
+            self.version += 1
+            self.stats['reloads'] += 1
+
+    def invalidate(self, *args):
+        """Reload before the next read (rows changed behind the cache, e.g. retention)"""
+        with self.lock:
+            self.stale = True
+            self.version += 1
+
+    def _ensure_loaded(self):
+        expired = (self.refresh_interval > 0 and self.loaded_at is not None
+                   and time.monotonic() - self.loaded_at > self.refresh_interval)
+        if self.stale or expired:
+            self.reload()
+
+    # ============================================
+    # WRITE-THROUGH
+    # ============================================
+
+    def add(self, row):
+        """A row committed to the database (dict with HISTORY_COLUMNS)"""
+        with self.lock:
+            if self.stale or row['id'] <= self.last_seq:
+                return  # the pending reload / the last reload already has it
+            conversion_type = row['conversion_type']
+            recent = self.rows.setdefault(conversion_type, deque(maxlen=self.per_type))
+            if len(recent) == self.per_type:
+                self.complete.discard(conversion_type)
+            elif conversion_type not in self.totals:
+                self.complete.add(conversion_type)
+            recent.append(row)
+            self.totals.setdefault(conversion_type, _TypeTotals()).add(row['confidence'])
+            self.version += 1
+
+    def remove(self, entry_id, conversion_type, confidence):
+        """A deleted row"""
+        with self.lock:
+            if self.stale:
+                return
+            recent = self.rows.get(conversion_type)
+            if recent is not None:
+                for row in recent:
+                    if row['id'] == entry_id:
+                        recent.remove(row)
+                        break
+            totals = self.totals.get(conversion_type)
+            if totals is not None:
+                totals.add(confidence, sign=-1)
+                if totals.rows <= 0:
+                    del self.totals[conversion_type]
+            self.version += 1
+
+    def clear(self, conversion_type=None):
+        """All rows (of one type) deleted"""
+        with self.lock:
+            types = [conversion_type] if conversion_type else list(self.rows) + list(self.totals)
+            for name in types:
+                self.rows.pop(name, None)
+                self.totals.pop(name, None)
+                self.complete.add(name)
+            self.version += 1
+
+    # ============================================
+    # QUERIES
+    # ============================================
+
+    def etag(self):
+        """Version tag of the current contents"""
+        with self.lock:
+            self._ensure_loaded()
+            return f"{self.generation}-{self.version}"
+
+    def _is_complete(self, conversion_type):
+        # A type without rows at the last load / since its last clear is complete too
+        return conversion_type in self.complete or conversion_type not in self.totals
+
+    def page(self, conversion_type=None, limit=100, before_id=None):
+        """(rows newest first, has_more) from memory, or None when the page reaches past the cached window"""
+        with self.lock:
+            self._ensure_loaded()
+            if conversion_type:
+                sources = {conversion_type: self.rows.get(conversion_type, ())}
+            else:
+                sources = self.rows
+
+            newest_first = heapq.merge(*(reversed(rows) for rows in sources.values()),
+                                       key=lambda row: row['id'], reverse=True)
+            selected = []
+            for row in newest_first:
+                if before_id is not None and row['id'] >= before_id:
+                    continue
+                selected.append(row)
+                if len(selected) > limit:
+                    break
+
+            # Rows older than a type's window may belong in the page
+            boundary = selected[-1]['id'] if len(selected) > limit else None
+            for name, rows in sources.items():
+                if self._is_complete(name):
+                    continue
+                if boundary is None or not rows or rows[0]['id'] > boundary:
+                    self.stats['misses'] += 1
+                    return None
+
+            self.stats['hits'] += 1
+            return [dict(row) for row in selected[:limit]], len(selected) > limit
+
+    def statistics(self):
+        """Same shape as the /get_statistics SQL aggregates"""
+        with self.lock:
+            self._ensure_loaded()
+            self.stats['hits'] += 1
+            confidence_sum = sum(t.confidence_sum for t in self.totals.values())
+            confidence_rows = sum(t.confidence_rows for t in self.totals.values())
+            return {
+                "total_conversions": sum(t.rows for t in self.totals.values()),
+                "by_type": {name: t.rows for name, t in self.totals.items() if t.rows > 0},
+                "average_confidence": confidence_sum / confidence_rows if confidence_rows else 0.0,
+                "archived_by_type": dict(self.archived_by_type)
+            }
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'per_type': self.per_type,
+                'cached_rows': sum(len(rows) for rows in self.rows.values()),
+                'complete_types': sorted(name for name in self.totals if name in self.complete),
+                'version': self.version,
+                'stale': self.stale,
+                **self.stats
+            }
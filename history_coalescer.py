@@ -0,0 +1,147 @@
+"""
+History Coalescer - Merge runs of recognized frames into single history rows
+
+A signer holding a letter produces the same prediction for many frames in a
+row. Instead of one `conversion_history` row per frame, each session keeps an
+open run per conversion type:
+- merge runs: consecutive frames with the same output extend the run
+  (frame count, mean confidence, start/end time)
+- join runs: committed words are appended to one utterance
+
+A run is written as one row when the output changes, the session goes quiet
+for `max_gap` seconds, the run exceeds `max_run` seconds, or on explicit flush.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCoalescer:
+    """Per-session run buffer in front of the history writer"""
+
+    def __init__(self, writer, max_gap=3.0, max_run=60.0, sweep_interval=1.0):
+        self.writer = writer            # writer(conversion_type, input_text, output_text, confidence, method, duration, metadata, timestamp)
+        self.max_gap = max_gap          # seconds of silence that close a run
+        self.max_run = max_run          # longest run kept in memory before it is written
+        self.sweep_interval = sweep_interval    # None: no sweeper, the caller flushes (offline replays)
+
+        self.runs = {}
+        self.lock = threading.Lock()
+        self.stats = {'frames': 0, 'rows_written': 0, 'write_errors': 0}
+
+        self._stop = threading.Event()
+        self._sweeper = None
+        if sweep_interval:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="history-coalescer", daemon=True)
+            self._sweeper.start()
+        atexit.register(self.close)
+
+    def observe(self, session_id, conversion_type, output, confidence, input_text, method, join=False, now=None):
+        """Record one recognized frame (merge) or committed word (join=True), seen at `now` (default: current time)"""
+        now = now if now is not None else time.time()
+        key = (session_id, conversion_type)
+        finished = []
+
+        with self.lock:
+            self.stats['frames'] += 1
+            run = self.runs.get(key)
+
+            if run is not None and self._is_closed(run, now):
+                finished.append(self.runs.pop(key))
+                run = None
+
+            if run is not None and not join and run['output'] != output:
+                finished.append(self.runs.pop(key))
+                run = None
+
+            if run is None:
+                self.runs[key] = {
+                    'session_id': session_id,
+                    'conversion_type': conversion_type,
+                    'output': output,
+                    'input_text': input_text,
+                    'method': method,
+                    'start': now,
+                    'end': now,
+                    'frames': 1,
+                    'confidence_sum': float(confidence)
+                }
+            else:
+                if join:
+                    run['output'] = f"{run['output']} {output}"
+                run['end'] = now
+                run['frames'] += 1
+                run['confidence_sum'] += float(confidence)
+
+        for run in finished:
+            self._write(run)
+
+    def flush(self, session_id=None, conversion_type=None):
+        """Write open runs (all, one session, and/or one conversion type)"""
+        with self.lock:
+            keys = [k for k in self.runs
+                    if (session_id is None or k[0] == session_id)
+                    and (conversion_type is None or k[1] == conversion_type)]
+            finished = [self.runs.pop(k) for k in keys]
+
+        for run in finished:
+            self._write(run)
+        return len(finished)
+
+    def flush_idle(self):
+        """Write runs that went quiet or grew too long"""
+        now = time.time()
+        with self.lock:
+            keys = [k for k, run in self.runs.items() if self._is_closed(run, now)]
+            finished = [self.runs.pop(k) for k in keys]
+
+        for run in finished:
+            self._write(run)
+        return len(finished)
+
+    def close(self):
+        """Stop the sweeper and write everything still open"""
+        self._stop.set()
+        self.flush()
+
+    def get_stats(self):
+        with self.lock:
+            open_runs = len(self.runs)
+        frames = self.stats['frames']
+        return {
+            **self.stats,
+            'open_runs': open_runs,
+            'frames_per_row': round(frames / self.stats['rows_written'], 2) if self.stats['rows_written'] else None
+        }
+
+    def _is_closed(self, run, now):
+        return now - run['end'] > self.max_gap or now - run['start'] > self.max_run
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.flush_idle()
+            except Exception as e:
+                logger.error(f"History coalescer sweep error: {e}")
+
+    def _write(self, run):
+        frames = run['frames']
+        confidence = run['confidence_sum'] / frames
+        metadata = {
+            "session": run['session_id'],
+            "start": run['start'],
+            "end": run['end'],
+            "frames": frames,
+            "mean_confidence": round(confidence, 4)
+        }
+        try:
+            self.writer(run['conversion_type'], run['input_text'], run['output'], confidence, run['method'],
+                        run['end'] - run['start'], metadata, run['start'])
+            self.stats['rows_written'] += 1
+        except Exception as e:
+            self.stats['write_errors'] += 1
+            logger.warning(f"Failed to write coalesced history row: {e}")
@@ -0,0 +1,100 @@
+"""
+Remote History - Serve conversion history from the node that owns the database
+
+With several app nodes behind a load balancer, one node keeps the SQLite
+history database (and runs retention on it); every other node sets
+SIGNEASE_HISTORY_URL to that node's address. On those nodes
+- history requests (list, search, export, statistics, delete, clear,
+  retention) are forwarded as they are and the owner's response is relayed
+  (streamed, so large exports are not buffered)
+- auto-saved recognitions are posted to the owner's /save_history
+
+USAGE:
+    python app.py                                                  # history node
+    SIGNEASE_HISTORY_URL=http://history-node:5000 python app.py    # other nodes
+"""
+
+import json
+import logging
+import threading
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Request headers passed on to the history node / response headers relayed back
+FORWARDED_REQUEST_HEADERS = ('Content-Type', 'Accept', 'If-None-Match', 'X-Session-ID', 'X-Admin-Token')
+RELAYED_RESPONSE_HEADERS = ('Content-Type', 'Content-Disposition', 'Cache-Control', 'ETag', 'Retry-After')
+
+
+class RemoteHistory:
+    """Client of the history node"""
+
+    def __init__(self, base_url, timeout=10.0, chunk_size=64 * 1024):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.stats = {'forwarded': 0, 'inserted': 0, 'errors': 0}
+        self.last_error = None
+
+    def _count(self, name, error=None):
+        with self.lock:
+            self.stats[name] += 1
+            if error is not None:
+                self.last_error = str(error)
+
+    def _open(self, method, path, body=None, headers=None):
+        """HTTP response of the history node (error statuses are responses too)"""
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers or {})
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            return e
+
+    def insert(self, conversion_type, input_text, output_text, confidence, method, duration=0.0, metadata=None,
+               timestamp=None):
+        """Same signature as insert_history_entry, written through the history node"""
+        body = json.dumps({
+            'type': conversion_type,
+            'input': input_text,
+            'output': output_text,
+            'confidence': confidence,
+            'method': method,
+            'duration': duration,
+            'metadata': metadata or {},
+            'timestamp': timestamp
+        }).encode('utf-8')
+        try:
+            with self._open('POST', '/save_history', body, {'Content-Type': 'application/json'}) as response:
+                if response.status >= 300:
+                    raise RuntimeError(f"History node answered {response.status}")
+        except Exception as e:
+            self._count('errors', e)
+            raise
+        self._count('inserted')
+
+    def forward(self, method, path, body, headers):
+        """(status, headers, body chunks) of the same request sent to the history node"""
+        forwarded = {name: headers[name] for name in FORWARDED_REQUEST_HEADERS if headers.get(name)}
+        try:
+            response = self._open(method, path, body or None, forwarded)
+        except Exception as e:
+            self._count('errors', e)
+            raise
+        self._count('forwarded')
+
+        def chunks():
+            with response:
+                while True:
+                    chunk = response.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        relayed = [(name, response.headers[name]) for name in RELAYED_RESPONSE_HEADERS if response.headers.get(name)]
+        return response.status, relayed, chunks()
+
+    def get_status(self):
+        with self.lock:
+            return {'url': self.base_url, **self.stats, 'last_error': self.last_error}
@@ -0,0 +1,345 @@
+"""
+History Retention - Expire, roll up and vacuum conversion history
+
+Policy (environment overridable, see RetentionPolicy.from_env):
+- Raw `conversion_history` rows are kept for `raw_days`
+- Older rows are folded into daily per-type summaries (`history_rollup`)
+  and deleted, `chunk_size` rows per short transaction
+- Summaries older than `rollup_days` are dropped (0 keeps them forever)
+- Freed pages are returned with `PRAGMA incremental_vacuum` in small steps
+
+The database runs in WAL mode with auto_vacuum=INCREMENTAL so the history
+endpoints keep reading while the job works in the background.
+
+USAGE:
+    python history_retention.py status
+    python history_retention.py run --raw-days 30
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def configure_history_database(conn):
+    """Incremental auto-vacuum (one-time VACUUM for existing files) and WAL journaling"""
+    # auto_vacuum must be set before the first table / WAL switch of a new file
+    mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    if mode != AUTO_VACUUM_INCREMENTAL:
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        has_tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+        if has_tables:
+            # Changing auto_vacuum on an existing file only takes effect after a full VACUUM
+            logger.info("Converting history database to incremental auto-vacuum (one-time VACUUM)")
+            conn.execute('VACUUM')
+    conn.execute('PRAGMA journal_mode=WAL')
+
+
+@dataclass
+class RetentionPolicy:
+    """How long raw rows and rollups are kept, and how the job paces itself"""
+    raw_days: float = 30.0
+    rollup_days: float = 365.0
+    chunk_size: int = 500
+    chunk_pause: float = 0.05
+    vacuum_pages: int = 256
+    interval: float = 3600.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            raw_days=float(os.environ.get("SIGNEASE_HISTORY_RAW_DAYS", cls.raw_days)),
+            rollup_days=float(os.environ.get("SIGNEASE_HISTORY_ROLLUP_DAYS", cls.rollup_days)),
+            interval=float(os.environ.get("SIGNEASE_RETENTION_INTERVAL", cls.interval))
+        )
+
+
+class HistoryRetention:
+    """Background retention job for the history database"""
+
+    def __init__(self, db_path="asl_history.db", policy=None):
+        self.db_path = db_path
+        self.policy = policy or RetentionPolicy()
+        self.lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._requests = threading.Lock()
+        self._full_requested = False
+        self._vacuum_requested = False
+        self.prune_listeners = []   # called after rows or rollups were deleted (e.g. to drop caches)
+
+        self.status = {
+            'running': False,
+            'last_run': None,
+            'last_duration': None,
+            'last_error': None,
+            'rows_pruned_last_run': 0,
+            'rows_pruned_total': 0,
+            'rollups_pruned_total': 0,
+            'pages_vacuumed_total': 0
+        }
+        self.ensure_schema()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def ensure_schema(self):
+        """Rollup table and the timestamp index the expiry scan walks"""
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS history_rollup (
+                day TEXT NOT NULL,
+                conversion_type TEXT NOT NULL,
+                rows INTEGER NOT NULL,
+                confidence_sum REAL NOT NULL,
+                duration_sum REAL NOT NULL,
+                first_timestamp REAL,
+                last_timestamp REAL,
+                PRIMARY KEY (day, conversion_type)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_history_timestamp ON conversion_history(timestamp)')
+        conn.commit()
+        conn.close()
+
+    # ============================================
+    # BACKGROUND THREAD
+    # ============================================
+
+    def start(self):
+        """Run the policy every `interval` seconds in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="history-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self, vacuum_only=False):
+        """Wake the background thread now (e.g. after /clear_history)"""
+        with self._requests:
+            if vacuum_only:
+                self._vacuum_requested = True
+            else:
+                self._full_requested = True
+        self._wake.set()
+
+    def _loop(self):
+        # First full pass shortly after startup, not in the middle of initialization;
+        # vacuum-only wakes never move the next full-run deadline
+        next_full = time.monotonic() + 5.0
+        while not self._stop.is_set():
+            self._wake.wait(max(0.0, next_full - time.monotonic()))
+            if self._stop.is_set():
+                break
+            with self._requests:
+                self._wake.clear()
+                full = self._full_requested or time.monotonic() >= next_full
+                vacuum = self._vacuum_requested and not full
+                self._full_requested = self._vacuum_requested = False
+            try:
+                if full:
+                    next_full = time.monotonic() + self.policy.interval
+                    self.run_once()
+                elif vacuum:
+                    self.vacuum()
+            except Exception as e:
+                logger.error(f"History retention error: {e}")
+
+    # ============================================
+    # RETENTION STEPS
+    # ============================================
+
+    def run_once(self):
+        """Roll up and delete expired rows, drop old rollups, then vacuum"""
+        if not self.lock.acquire(blocking=False):
+            return self.get_status()
+
+        start = time.time()
+        self.status['running'] = True
+        self.status['last_error'] = None
+        try:
+            pruned = self.prune_raw_rows(start - self.policy.raw_days * 86400)
+            rollups = self.prune_rollups(start - self.policy.rollup_days * 86400) if self.policy.rollup_days > 0 else 0
+            self.vacuum()
+
+            self.status['rows_pruned_last_run'] = pruned
+            self.status['rows_pruned_total'] += pruned
+            self.status['rollups_pruned_total'] += rollups
+            logger.info(f"History retention: pruned {pruned} rows, {rollups} rollups")
+        except Exception as e:
+            self.status['last_error'] = str(e)
+            raise
+        finally:
+            self.status['running'] = False
+            self.status['last_run'] = start
+            self.status['last_duration'] = round(time.time() - start, 3)
+            self.lock.release()
+
+        return self.get_status()
+
+    def prune_raw_rows(self, cutoff):
+        """Fold rows older than `cutoff` into history_rollup and delete them, chunk by chunk"""
+        pruned = 0
+        while not self._stop.is_set():
+            conn = self._connect()
+            try:
+                ids = [row[0] for row in conn.execute(
+                    'SELECT id FROM conversion_history WHERE timestamp < ? ORDER BY timestamp LIMIT ?',
+                    (cutoff, self.policy.chunk_size))]
+                if not ids:
+                    break
+
+                placeholders = ','.join('?' * len(ids))
+                with conn:
+                    conn.execute(f'''
+                        INSERT INTO history_rollup
+                        (day, conversion_type, rows, confidence_sum, duration_sum, first_timestamp, last_timestamp)
+                        SELECT date(timestamp, 'unixepoch', 'localtime') AS day, conversion_type, COUNT(*),
+                               SUM(COALESCE(confidence, 0)), SUM(COALESCE(duration, 0)),
+                               MIN(timestamp), MAX(timestamp)
+                        FROM conversion_history WHERE id IN ({placeholders})
+                        GROUP BY day, conversion_type
+                        ON CONFLICT(day, conversion_type) DO UPDATE SET
+                            rows = rows + excluded.rows,
+                            confidence_sum = confidence_sum + excluded.confidence_sum,
+                            duration_sum = duration_sum + excluded.duration_sum,
+                            first_timestamp = MIN(first_timestamp, excluded.first_timestamp),
+                            last_timestamp = MAX(last_timestamp, excluded.last_timestamp)
+                    ''', ids)
+                    conn.execute(f'DELETE FROM conversion_history WHERE id IN ({placeholders})', ids)
+                pruned += len(ids)
+            finally:
+                conn.close()
+            self._notify_pruned()
+
+            # Let request handlers take the write lock between chunks
+            time.sleep(self.policy.chunk_pause)
+        return pruned
+
+    def prune_rollups(self, cutoff):
+        """Drop daily summaries whose last row is older than `cutoff`"""
+        conn = self._connect()
+        with conn:
+            deleted = conn.execute('DELETE FROM history_rollup WHERE last_timestamp < ?', (cutoff,)).rowcount
+        conn.close()
+        if deleted:
+            self._notify_pruned()
+        return deleted
+
+    def _notify_pruned(self):
+        for listener in self.prune_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"History retention listener error: {e}")
+
+    def vacuum(self):
+        """Return free pages to the filesystem in small incremental steps"""
+        vacuumed = 0
+        while not self._stop.is_set():
+            conn = self._connect()
+            try:
+                free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if free_pages == 0:
+                    break
+                step = min(free_pages, self.policy.vacuum_pages)
+                # executescript steps the pragma to completion (execute frees a single page)
+                conn.executescript(f'PRAGMA incremental_vacuum({step});')
+                freed = free_pages - conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if freed <= 0:
+                    # Not in incremental auto-vacuum mode: nothing can be returned
+                    break
+                vacuumed += freed
+            finally:
+                conn.close()
+            time.sleep(self.policy.chunk_pause)
+
+        self.status['pages_vacuumed_total'] += vacuumed
+        return vacuumed
+
+    # ============================================
+    # REPORTING
+    # ============================================
+
+    def get_status(self):
+        """Policy, last run results and database size"""
+        conn = self._connect()
+        try:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            raw_rows = conn.execute('SELECT COUNT(*) FROM conversion_history').fetchone()[0]
+            rollup_rows, archived = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM history_rollup').fetchone()
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        finally:
+            conn.close()
+
+        wal_path = f"{self.db_path}-wal"
+        return {
+            **self.status,
+            'policy': asdict(self.policy),
+            'database': {
+                'size_bytes': page_size * page_count,
+                'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+                'free_pages': free_pages,
+                'incremental_vacuum': auto_vacuum == AUTO_VACUUM_INCREMENTAL,
+                'raw_rows': raw_rows,
+                'rollup_rows': rollup_rows,
+                'archived_conversions': archived
+            }
+        }
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="History retention and vacuum")
+    parser.add_argument('command', choices=['run', 'status'])
+    parser.add_argument('--db', default=os.environ.get("SIGNEASE_HISTORY_DB", "asl_history.db"))
+    parser.add_argument('--raw-days', type=float, help="Keep raw rows this many days")
+    parser.add_argument('--rollup-days', type=float, help="Keep daily rollups this many days (0 = forever)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    policy = RetentionPolicy.from_env()
+    if args.raw_days is not None:
+        policy.raw_days = args.raw_days
+    if args.rollup_days is not None:
+        policy.rollup_days = args.rollup_days
+
+    conn = sqlite3.connect(args.db)
+    has_history = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversion_history'").fetchone()
+    if has_history:
+        configure_history_database(conn)
+    conn.close()
+    if not has_history:
+        print(f"No conversion_history table in {args.db}")
+        return 1
+
+    retention = HistoryRetention(args.db, policy)
+    status = retention.run_once() if args.command == 'run' else retention.get_status()
+    print(json.dumps(status, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+History Search - FTS5 full-text index over conversion history
+
+`conversion_history_fts` is an external-content FTS5 table: it stores only
+the inverted index and reads `input_text` / `output_text` from
+`conversion_history`. Insert, update and delete triggers keep it in sync,
+and existing rows are backfilled once when the index is created.
+
+Ranking: bm25 has to score every match, so for very broad queries (more than
+`RANK_WINDOW` matches) results are returned newest-first instead, which keeps
+latency in milliseconds regardless of table size.
+
+USAGE:
+    python history_search.py rebuild              # re-index all rows
+    python history_search.py search "thank you"
+"""
+
+import argparse
+import html
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "conversion_history_fts"
+RANK_WINDOW = 2000
+
+# Control characters as highlight markers: the text is HTML-escaped first,
+# then the markers become <mark> tags, so stored text can never inject markup
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts5_available():
+    """True if this SQLite build includes FTS5"""
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+FTS5_AVAILABLE = fts5_available()
+
+
+def ensure_search_index(conn):
+    """Create the FTS5 table and sync triggers; backfill when newly created"""
+    if not FTS5_AVAILABLE:
+        logger.warning("SQLite was built without FTS5: history search disabled")
+        return False
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).fetchone()
+
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            input_text, output_text,
+            content='conversion_history', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS conversion_history_fts_ai AFTER INSERT ON conversion_history BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, input_text, output_text)
+            VALUES (new.id, new.input_text, new.output_text);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS conversion_history_fts_ad AFTER DELETE ON conversion_history BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, input_text, output_text)
+            VALUES ('delete', old.id, old.input_text, old.output_text);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS conversion_history_fts_au
+        AFTER UPDATE OF input_text, output_text ON conversion_history BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, input_text, output_text)
+            VALUES ('delete', old.id, old.input_text, old.output_text);
+            INSERT INTO {FTS_TABLE}(rowid, input_text, output_text)
+            VALUES (new.id, new.input_text, new.output_text);
+        END
+    ''')
+
+    if not exists:
+        rebuild_search_index(conn)
+    conn.commit()
+    return True
+
+
+def rebuild_search_index(conn):
+    """Backfill / re-index every conversion_history row"""
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    conn.commit()
+    count = conn.execute("SELECT COUNT(*) FROM conversion_history").fetchone()[0]
+    logger.info(f"History search index built over {count} rows")
+    return count
+
+
+def build_match_query(text):
+    """Turn free user text into a safe FTS5 query: quoted terms, prefix match on the last"""
+    tokens = _TOKEN_PATTERN.findall(text or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return " ".join(terms)
+
+
+def _render_highlight(text):
+    if text is None:
+        return None
+    escaped = html.escape(text)
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def search_history(conn, text, conversion_type=None, limit=20, offset=0):
+    """Matches as (results, has_more, ranking); bm25 weighs output_text over input_text"""
+    match = build_match_query(text)
+    if match is None:
+        return [], False, None
+
+    # Cheap probe: is the match set small enough to rank completely?
+    broad = conn.execute(f'SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? LIMIT 1 OFFSET ?',
+                         (match, RANK_WINDOW - 1)).fetchone() is not None
+    ranking = 'recent' if broad else 'bm25'
+    order_by = f"{FTS_TABLE}.rowid DESC" if broad else "score"
+
+    params = [match]
+    type_filter = ""
+    if conversion_type and conversion_type != 'all':
+        type_filter = "AND h.conversion_type = ?"
+        params.append(conversion_type)
+    params.extend([limit + 1, offset])
+
+    rows = conn.execute(f'''
+        SELECT h.id, h.conversion_type, h.input_text, h.output_text, h.confidence,
+               h.method, h.duration, h.timestamp, h.date,
+               highlight({FTS_TABLE}, 0, ?, ?), highlight({FTS_TABLE}, 1, ?, ?),
+               bm25({FTS_TABLE}, 1.0, 2.0) AS score
+        FROM {FTS_TABLE}
+        JOIN conversion_history h ON h.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ? {type_filter}
+        ORDER BY {order_by}
+        LIMIT ? OFFSET ?
+    ''', [_MARK_START, _MARK_END, _MARK_START, _MARK_END] + params).fetchall()
+
+    results = []
+    for row in rows[:limit]:
+        results.append({
+            "id": row[0],
+            "conversion_type": row[1],
+            "input_text": row[2],
+            "output_text": row[3],
+            "confidence": row[4],
+            "method": row[5],
+            "duration": row[6],
+            "timestamp": row[7],
+            "date": row[8],
+            "input_highlight": _render_highlight(row[9]),
+            "output_highlight": _render_highlight(row[10]),
+            "score": round(-row[11], 4)
+        })
+    return results, len(rows) > limit, ranking
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Full-text search over conversion history")
+    parser.add_argument('command', choices=['rebuild', 'search'])
+    parser.add_argument('query', nargs='?', default="")
+    parser.add_argument('--db', default=os.environ.get("SIGNEASE_HISTORY_DB", "asl_history.db"))
+    parser.add_argument('--type', help="Only this conversion type")
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not FTS5_AVAILABLE:
+        print("SQLite FTS5 is not available in this Python build")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    ensure_search_index(conn)
+
+    if args.command == 'rebuild':
+        print(f"Indexed {rebuild_search_index(conn)} rows")
+    else:
+        results, has_more, ranking = search_history(conn, args.query, args.type, args.limit)
+        for entry in results:
+            print(json.dumps({k: entry[k] for k in ('id', 'conversion_type', 'output_highlight', 'score')}))
+        print(f"{len(results)} results, ranked by {ranking}{' (more available)' if has_more else ''}")
+
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Inference Scheduler - Weighted fair sharing and admission control
+
+Inference requests run in a fixed number of slots (concurrent model calls).
+When every slot is busy, waiting requests are served by start-time fair
+queuing: each session's requests get virtual start tags that advance by
+cost / weight, and a freed slot goes to the lowest tag. A session posting
+at twice the rate of another therefore does not get twice the capacity.
+
+Before queuing:
+- each session has a token bucket (`rate` requests/s, `burst` deep);
+  an empty bucket is rejected with 429 and the time until the next token
+- the expected queue delay (work queued ahead of the request's start tag
+  / slots x mean service time) is compared with `queue_budget`; above it
+  the request is shed with 503 right away instead of timing out later.
+  Only work with lower tags counts, so a light session still gets in
+  while a heavy one is shed
+A request that still waits longer than `max_wait` in the queue is shed too.
+
+Policy (environment overridable, see SchedulerPolicy.from_env):
+    SIGNEASE_INFERENCE_SLOTS      concurrent inference requests
+    SIGNEASE_SESSION_RATE         requests/s per session (0 disables)
+    SIGNEASE_SESSION_BURST        bucket depth
+    SIGNEASE_QUEUE_BUDGET_MS      expected queue delay before shedding
+    SIGNEASE_QUEUE_MAX_WAIT_MS    longest actual wait in the queue
+"""
+
+import contextlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+
+
+class Overloaded(Exception):
+    """Request refused: `status` 429 (session rate) or 503 (server saturated)"""
+
+    def __init__(self, status, reason, retry_after, message):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class SchedulerPolicy:
+    """Capacity, per-session limits and the queue delay budget"""
+    slots: int = 1
+    rate: float = 10.0
+    burst: float = 20.0
+    queue_budget: float = 0.5
+    max_wait: float = 1.0
+    max_sessions: int = 1024
+
+    @classmethod
+    def from_env(cls, slots=None):
+        return cls(
+            slots=int(os.environ.get("SIGNEASE_INFERENCE_SLOTS", slots or cls.slots)),
+            rate=float(os.environ.get("SIGNEASE_SESSION_RATE", cls.rate)),
+            burst=float(os.environ.get("SIGNEASE_SESSION_BURST", cls.burst)),
+            queue_budget=float(os.environ.get("SIGNEASE_QUEUE_BUDGET_MS", cls.queue_budget * 1000)) / 1000,
+            max_wait=float(os.environ.get("SIGNEASE_QUEUE_MAX_WAIT_MS", cls.max_wait * 1000)) / 1000
+        )
+
+
+class _Session:
+    def __init__(self, burst, weight=1.0):
+        self.tokens = burst
+        self.refilled = time.monotonic()
+        self.weight = weight
+        self.last_finish = 0.0      # virtual finish tag of the session's latest request
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+
+class _Waiter:
+    def __init__(self, session, start_tag):
+        self.session = session
+        self.start_tag = start_tag
+        self.enqueued = time.monotonic()
+        self.granted = threading.Event()
+        self.cancelled = False
+
+
+class FairScheduler:
+    """Slots for inference requests, handed out in weighted fair order"""
+
+    def __init__(self, policy=None):
+        self.policy = policy or SchedulerPolicy()
+        self.lock = threading.Lock()
+        self.free = self.policy.slots
+        self.queue = []                      # heap of (start tag, seq, waiter)
+        self.queued = 0
+        self.vtime = 0.0
+        self.service_time = 0.05             # moving average of slot hold time (seconds)
+        self.sessions = OrderedDict()
+        self.weights = {}
+        self.waits = deque(maxlen=1000)
+        self._seq = itertools.count()
+        self.totals = {'admitted': 0, 'rate_limited': 0, 'shed': 0, 'timed_out': 0}
+
+    def set_weight(self, session_id, weight):
+        """Relative share of a session (default 1.0)"""
+        with self.lock:
+            self.weights[session_id] = weight
+            if session_id in self.sessions:
+                self.sessions[session_id].weight = weight
+
+    def _session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = _Session(self.policy.burst, self.weights.get(session_id, 1.0))
+            while len(self.sessions) > self.policy.max_sessions:
+                self.sessions.popitem(last=False)
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def expected_delay(self, cost=1.0, start_tag=None):
+        """Queue delay of a new request with `start_tag` (None: behind everything); lock held"""
+        if self.free > 0 and not self.queued:
+            return 0.0
+        ahead = self.queued if start_tag is None else sum(
+            1 for tag, _, waiter in self.queue if tag <= start_tag and not waiter.cancelled)
+        return (ahead + cost) / self.policy.slots * self.service_time
+
+    # ============================================
+    # ADMISSION
+    # ============================================
+
+    def check_rate(self, session_id):
+        """Take one token from the session's bucket or raise Overloaded(429)"""
+        with self.lock:
+            self._take_token(self._session(session_id))
+
+    def _take_token(self, session):
+        if self.policy.rate <= 0:
+            return
+        now = time.monotonic()
+        session.tokens = min(self.policy.burst, session.tokens + (now - session.refilled) * self.policy.rate)
+        session.refilled = now
+        if session.tokens < 1.0:
+            session.rate_limited += 1
+            self.totals['rate_limited'] += 1
+            raise Overloaded(429, 'rate_limited', (1.0 - session.tokens) / self.policy.rate,
+                             f"Session rate limit ({self.policy.rate:g} requests/s)")
+        session.tokens -= 1.0
+
+    @contextlib.contextmanager
+    def admit(self, session_id, cost=1.0):
+        """Hold an inference slot for the block; raises Overloaded when refused"""
+        self._enter(session_id, cost)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._leave(time.monotonic() - start)
+
+    def _enter(self, session_id, cost):
+        with self.lock:
+            session = self._session(session_id)
+            self._take_token(session)
+            start_tag = max(self.vtime, session.last_finish)
+
+            if self.free > 0 and not self.queued:
+                self.free -= 1
+                self.vtime = start_tag
+                session.last_finish = start_tag + cost / session.weight
+                self._admitted(session, 0.0)
+                return
+
+            expected = self.expected_delay(cost, start_tag)
+            if expected > self.policy.queue_budget:
+                session.tokens += 1.0  # shed requests do not count against the session
+                session.shed += 1
+                self.totals['shed'] += 1
+                raise Overloaded(503, 'overloaded', expected,
+                                 f"Server busy (expected queue delay {expected * 1000:.0f} ms)")
+
+            session.last_finish = start_tag + cost / session.weight
+            waiter = _Waiter(session, start_tag)
+            heapq.heappush(self.queue, (start_tag, next(self._seq), waiter))
+            self.queued += 1
+
+        if waiter.granted.wait(self.policy.max_wait):
+            return
+
+        with self.lock:
+            if waiter.granted.is_set():  # granted while timing out
+                return
+            waiter.cancelled = True
+            self.queued -= 1
+            session.shed += 1
+            self.totals['timed_out'] += 1
+            retry_after = self.expected_delay()
+        raise Overloaded(503, 'queue_timeout', max(retry_after, self.policy.max_wait),
+                         f"Server busy (queued longer than {self.policy.max_wait * 1000:.0f} ms)")
+
+    def _admitted(self, session, waited):
+        session.admitted += 1
+        self.totals['admitted'] += 1
+        self.waits.append(waited)
+
+    def _leave(self, held):
+        with self.lock:
+            self.service_time += 0.1 * (held - self.service_time)
+            self.free += 1
+            # Hand freed slots to the lowest start tags
+            while self.free > 0 and self.queue:
+                start_tag, _, waiter = heapq.heappop(self.queue)
+                if waiter.cancelled:
+                    continue
+                self.free -= 1
+                self.queued -= 1
+                self.vtime = start_tag
+                self._admitted(waiter.session, time.monotonic() - waiter.enqueued)
+                waiter.granted.set()
+
+    # ============================================
+    # STATUS
+    # ============================================
+
+    def get_status(self, top=10):
+        with self.lock:
+            waits = sorted(self.waits)
+            busiest = sorted(self.sessions.items(), key=lambda item: item[1].admitted, reverse=True)[:top]
+            return {
+                'policy': asdict(self.policy),
+                'busy_slots': self.policy.slots - self.free,
+                'queued': self.queued,
+                'service_ms': round(self.service_time * 1000, 1),
+                'expected_delay_ms': round(self.expected_delay() * 1000, 1),
+                'queue_wait_ms': {
+                    'p50': round(waits[len(waits) // 2] * 1000, 1) if waits else None,
+                    'p95': round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else None
+                },
+                **self.totals,
+                'sessions': {
+                    session_id: {'weight': s.weight, 'admitted': s.admitted, 'rate_limited': s.rate_limited,
+                                 'shed': s.shed}
+                    for session_id, s in busiest
+                }
+            }
@@ -0,0 +1,554 @@
+"""
+Session Record & Replay Load Harness - /predict_asl and /predict_lip
+
+RECORD: run a small proxy in front of the app and use the browser through it.
+Every frame camera.js posts is stored (raw JPEG + timestamp + the crop `roi`
+of capture-profile uploads) in a compact binary file, all other requests are
+simply forwarded.
+
+    python load_harness.py record --upstream http://localhost:5000 --port 5050 --out session.sgnrec
+    (then open http://localhost:5050 and use the ASL / Lip Reading tabs)
+
+REPLAY: send the recorded frames from N concurrent virtual clients at the
+original pacing (or faster) and report latency, fps, errors, drops and
+server CPU/RSS.
+
+    python load_harness.py replay session.sgnrec --clients 1,2,4,8 --speed 1.0 --server-pid 12345
+    python load_harness.py info session.sgnrec
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# File layout: MAGIC, uint32 header length, JSON header, then records of
+# <float64 seconds since start><uint8 endpoint><4 x float64 roi, NaN = full frame>
+# <uint32 payload length><JPEG bytes>
+# (SGNREC01 recordings have no roi field and are replayed as full frames)
+MAGIC = b"SGNREC02"
+RECORD_HEADER = struct.Struct('<dB4dI')
+MAGIC_V1 = b"SGNREC01"
+RECORD_HEADER_V1 = struct.Struct('<dBI')
+NO_ROI = (float('nan'),) * 4
+
+ENDPOINTS = {1: '/predict_asl', 2: '/predict_lip'}
+ENDPOINT_CODES = {path: code for code, path in ENDPOINTS.items()}
+STREAM_CHUNK_BYTES = 64 * 1024    # proxy relay read size for non-recorded responses
+
+
+# ============================================
+# SESSION FILE FORMAT
+# ============================================
+
+class SessionWriter:
+    """Append frames to a session recording (thread-safe)"""
+
+    def __init__(self, path, source=""):
+        self.file = open(path, 'wb')
+        self.lock = threading.Lock()
+        self.start = None
+        self.count = 0
+
+        header = json.dumps({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'source': source
+        }).encode('utf-8')
+        self.file.write(MAGIC)
+        self.file.write(struct.pack('<I', len(header)))
+        self.file.write(header)
+
+    def add(self, endpoint, jpeg_bytes, roi=None):
+        with self.lock:
+            now = time.time()
+            if self.start is None:
+                self.start = now
+            self.file.write(RECORD_HEADER.pack(now - self.start, ENDPOINT_CODES[endpoint],
+                                               *(roi or NO_ROI), len(jpeg_bytes)))
+            self.file.write(jpeg_bytes)
+            self.file.flush()
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_session(path):
+    """Load a recording: returns (header dict, [(t, endpoint, jpeg_bytes, roi or None), ...])"""
+    frames = []
+    with open(path, 'rb') as f:
+        magic = f.read(len(MAGIC))
+        if magic not in (MAGIC, MAGIC_V1):
+            raise ValueError(f"Not a session recording: {path}")
+        record_header = RECORD_HEADER if magic == MAGIC else RECORD_HEADER_V1
+        (header_len,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_len).decode('utf-8'))
+
+        while True:
+            raw = f.read(record_header.size)
+            if len(raw) < record_header.size:
+                break
+            t, code, *roi, length = record_header.unpack(raw)
+            payload = f.read(length)
+            if len(payload) < length:
+                break
+            frames.append((t, ENDPOINTS[code], payload, None if not roi or roi[0] != roi[0] else roi))
+
+    return header, frames
+
+
+# ============================================
+# RECORDING PROXY
+# ============================================
+
+def make_proxy_handler(upstream, writer):
+    """Build a request handler that forwards to upstream and records frames"""
+    target = urlsplit(upstream)
+
+    class RecordingProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _forward(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else None
+
+            path = self.path.split('?', 1)[0]
+            if body and path in ENDPOINT_CODES:
+                try:
+                    data = json.loads(body)
+                    image_data = data.get('image', '')
+                    if ',' in image_data:
+                        writer.add(path, base64.b64decode(image_data.split(',', 1)[1]), data.get('roi'))
+                except Exception as e:
+                    print(f"WARNING: could not record frame: {e}")
+
+            headers = {k: v for k, v in self.headers.items()
+                       if k.lower() not in ('host', 'connection', 'accept-encoding')}
+            conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+            try:
+                conn.request(self.command, self.path, body=body, headers=headers)
+                response = conn.getresponse()
+                if path in ENDPOINT_CODES:
+                    self._relay_buffered(response)
+                else:
+                    self._relay_streaming(response)
+            finally:
+                conn.close()
+
+        def _send_headers(self, response, framing=None):
+            self.send_response(response.status)
+            for key, value in response.getheaders():
+                if key.lower() not in ('transfer-encoding', 'connection', 'content-length'):
+                    self.send_header(key, value)
+            if framing is not None:
+                self.send_header(*framing)
+            self.end_headers()
+
+        def _relay_buffered(self, response):
+            """Small JSON prediction responses: read whole, send with Content-Length"""
+            payload = response.read()
+            self._send_headers(response, ('Content-Length', str(len(payload))))
+            self.wfile.write(payload)
+
+        def _relay_streaming(self, response):
+            """Everything else (SSE, exports): pass chunks on as soon as upstream sends them"""
+            if self.command == 'HEAD' or response.status in (204, 304):
+                self._send_headers(response)
+                return
+            length = response.getheader('Content-Length')
+            if length is not None:
+                self._send_headers(response, ('Content-Length', length))
+            else:
+                self._send_headers(response, ('Transfer-Encoding', 'chunked'))
+            while True:
+                chunk = response.read1(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if length is None:
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+                self.wfile.flush()
+            if length is None:
+                self.wfile.write(b'0\r\n\r\n')
+                self.wfile.flush()
+
+        do_GET = _forward
+        do_POST = _forward
+        do_PUT = _forward
+        do_DELETE = _forward
+
+        def log_message(self, format, *args):
+            pass
+
+    return RecordingProxyHandler
+
+
+def record(args):
+    writer = SessionWriter(args.out, source=args.upstream)
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), make_proxy_handler(args.upstream, writer))
+
+    print("=" * 60)
+    print("SESSION RECORDER")
+    print("=" * 60)
+    print(f"Forwarding to: {args.upstream}")
+    print(f"Open in browser: http://localhost:{args.port}")
+    print(f"Recording to: {args.out}")
+    print("Press Ctrl+C to stop")
+    print("=" * 60)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        writer.close()
+        print(f"\nRecorded {writer.count} frames -> {args.out}")
+    return 0
+
+
+# ============================================
+# SERVER RESOURCE SAMPLER
+# ============================================
+
+class ProcessSampler:
+    """Sample CPU% and RSS of the server process in the background"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_samples = []
+        self.rss_samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_proc(self):
+        """Return (cpu seconds, rss bytes) from /proc (Linux fallback)"""
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / ticks
+        rss_bytes = int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+        return cpu_seconds, rss_bytes
+
+    def _run(self):
+        if PSUTIL_AVAILABLE:
+            process = psutil.Process(self.pid)
+            process.cpu_percent(None)
+            while not self._stop.wait(self.interval):
+                self.cpu_samples.append(process.cpu_percent(None))
+                self.rss_samples.append(process.memory_info().rss)
+            return
+
+        last_cpu, _ = self._read_proc()
+        last_time = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            cpu, rss = self._read_proc()
+            now = time.perf_counter()
+            self.cpu_samples.append(100.0 * (cpu - last_cpu) / (now - last_time))
+            self.rss_samples.append(rss)
+            last_cpu, last_time = cpu, now
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if not self.cpu_samples:
+            return {}
+        return {
+            'cpu_percent_mean': round(sum(self.cpu_samples) / len(self.cpu_samples), 1),
+            'cpu_percent_max': round(max(self.cpu_samples), 1),
+            'rss_mb_mean': round(sum(self.rss_samples) / len(self.rss_samples) / 1e6, 1),
+            'rss_mb_max': round(max(self.rss_samples) / 1e6, 1)
+        }
+
+
+# ============================================
+# VIRTUAL CLIENTS
+# ============================================
+
+def percentiles(values):
+    """Latency summary in milliseconds"""
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+
+    def pick(pct):
+        return values[max(0, min(len(values) - 1, int(round(pct / 100.0 * len(values))) - 1))]
+
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values), 2),
+        'p50_ms': round(pick(50), 2),
+        'p90_ms': round(pick(90), 2),
+        'p99_ms': round(pick(99), 2),
+        'max_ms': round(values[-1], 2)
+    }
+
+
+class VirtualClient:
+    """Replays a recording against the server like one browser tab"""
+
+    def __init__(self, client_id, base_url, frames, speed=1.0, max_in_flight=1, loops=1, timeout=30.0):
+        self.client_id = client_id
+        self.base_url = base_url.rstrip('/')
+        self.frames = frames
+        self.speed = speed
+        self.max_in_flight = max(1, max_in_flight)
+        self.loops = max(1, loops)
+        self.timeout = timeout
+
+        self.slots = threading.Semaphore(self.max_in_flight)
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.scheduled = 0
+        self.sent = 0
+        self.completed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.first_send = None
+        self.last_done = None
+
+    def _send(self, endpoint, body):
+        request = urllib.request.Request(
+            self.base_url + endpoint,
+            data=body,
+            headers={'Content-Type': 'application/json', 'X-Session-ID': f"replay-{self.client_id}"}
+        )
+        start = time.perf_counter()
+        ok = False
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, OSError, http.client.HTTPException):
+            ok = False
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            with self.lock:
+                if ok:
+                    self.completed += 1
+                    self.latencies[endpoint].append(elapsed_ms)
+                else:
+                    self.errors += 1
+                self.last_done = time.perf_counter()
+            self.slots.release()
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for _ in range(self.loops):
+                start = time.perf_counter()
+                for t, endpoint, body in self.frames:
+                    if self.speed > 0:
+                        delay = start + t / self.speed - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+
+                    self.scheduled += 1
+                    # A frame is dropped when all request slots are still busy
+                    # (the browser would simply have a newer frame by then)
+                    if not self.slots.acquire(blocking=self.speed <= 0):
+                        self.dropped += 1
+                        continue
+
+                    if self.first_send is None:
+                        self.first_send = time.perf_counter()
+                    self.sent += 1
+                    pool.submit(self._send, endpoint, body)
+
+    def summary(self):
+        active = (self.last_done - self.first_send) if self.first_send and self.last_done else 0.0
+        return {
+            'client': self.client_id,
+            'scheduled': self.scheduled,
+            'sent': self.sent,
+            'completed': self.completed,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'achieved_fps': round(self.completed / active, 2) if active > 0 else 0.0
+        }
+
+
+def run_level(frames, args, clients):
+    """Replay with a fixed number of concurrent clients and aggregate results"""
+    virtual_clients = [
+        VirtualClient(i, args.url, frames, args.speed, args.max_in_flight, args.loops, args.timeout)
+        for i in range(clients)
+    ]
+
+    sampler = ProcessSampler(args.server_pid) if args.server_pid else None
+    if sampler:
+        sampler.start()
+
+    threads = []
+    wall_start = time.perf_counter()
+    for client in virtual_clients:
+        thread = threading.Thread(target=client.run, daemon=True)
+        thread.start()
+        threads.append(thread)
+        if args.ramp > 0:
+            time.sleep(args.ramp / clients)
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    per_client = [client.summary() for client in virtual_clients]
+    all_latencies = [v for c in virtual_clients for values in c.latencies.values() for v in values]
+    by_endpoint = defaultdict(list)
+    for client in virtual_clients:
+        for endpoint, values in client.latencies.items():
+            by_endpoint[endpoint].extend(values)
+
+    scheduled = sum(c['scheduled'] for c in per_client)
+    sent = sum(c['sent'] for c in per_client)
+    fps_values = [c['achieved_fps'] for c in per_client]
+
+    return {
+        'clients': clients,
+        'wall_seconds': round(wall, 2),
+        'throughput_rps': round(sum(c['completed'] for c in per_client) / wall, 2) if wall > 0 else 0.0,
+        'latency': percentiles(all_latencies),
+        'latency_by_endpoint': {endpoint: percentiles(values) for endpoint, values in by_endpoint.items()},
+        'fps_per_client': {
+            'mean': round(sum(fps_values) / len(fps_values), 2) if fps_values else 0.0,
+            'min': min(fps_values) if fps_values else 0.0
+        },
+        'error_rate': round(sum(c['errors'] for c in per_client) / sent, 4) if sent else 0.0,
+        'drop_rate': round(sum(c['dropped'] for c in per_client) / scheduled, 4) if scheduled else 0.0,
+        'server': sampler.stop() if sampler else {},
+        'per_client': per_client
+    }
+
+
+def replay(args):
+    header, recorded = read_session(args.session)
+    if args.endpoint:
+        recorded = [frame for frame in recorded if frame[1] == args.endpoint]
+    if not recorded:
+        print("ERROR: Recording contains no frames")
+        return 1
+
+    # Build request bodies once so clients spend no CPU on encoding
+    frames = [
+        (t, endpoint, json.dumps({'image': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii'),
+                                  **({'roi': roi} if roi else {})}).encode('utf-8'))
+        for t, endpoint, jpeg, roi in recorded
+    ]
+    levels = [int(value) for value in str(args.clients).split(',') if value.strip()]
+
+    print("=" * 90)
+    print("SESSION REPLAY")
+    print("=" * 90)
+    print(f"Recording: {args.session} ({len(frames)} frames, {recorded[-1][0]:.1f}s, created {header.get('created')})")
+    print(f"Target: {args.url} | Speed: {'max' if args.speed <= 0 else f'{args.speed}x'} | "
+          f"Max in flight per client: {args.max_in_flight}")
+    print("=" * 90)
+    print(f"{'CLIENTS':>7s} {'RPS':>8s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s} "
+          f"{'FPS/CLI':>8s} {'ERR%':>6s} {'DROP%':>6s} {'CPU%':>6s} {'RSS MB':>8s}")
+
+    reports = []
+    for clients in levels:
+        result = run_level(frames, args, clients)
+        reports.append(result)
+        latency = result['latency']
+        server = result['server']
+        print(f"{clients:>7d} {result['throughput_rps']:>8.1f} {latency.get('p50_ms', 0):>9.1f} "
+              f"{latency.get('p90_ms', 0):>9.1f} {latency.get('p99_ms', 0):>9.1f} "
+              f"{result['fps_per_client']['mean']:>8.2f} {result['error_rate'] * 100:>6.1f} "
+              f"{result['drop_rate'] * 100:>6.1f} {server.get('cpu_percent_mean', 0):>6.0f} "
+              f"{server.get('rss_mb_max', 0):>8.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'recording': args.session, 'header': header, 'levels': reports}, f, indent=2)
+        print(f"\nReport saved: {args.output}")
+    return 0
+
+
+def info(args):
+    header, frames = read_session(args.session)
+    counts = defaultdict(int)
+    cropped = 0
+    for _, endpoint, _, roi in frames:
+        counts[endpoint] += 1
+        cropped += roi is not None
+    duration = frames[-1][0] if frames else 0.0
+    size = os.path.getsize(args.session)
+
+    print(f"Recording: {args.session}")
+    print(f"Created: {header.get('created')} | Source: {header.get('source')}")
+    print(f"Frames: {len(frames)} over {duration:.1f}s ({len(frames) / duration if duration else 0:.1f} fps)")
+    for endpoint, count in counts.items():
+        print(f"   {endpoint}: {count}")
+    print(f"Cropped (roi) frames: {cropped}")
+    print(f"File size: {size / 1024:.1f} KB ({size / max(1, len(frames)) / 1024:.1f} KB/frame)")
+    return 0
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay SignEase camera sessions")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help="Record frames through a forwarding proxy")
+    rec.add_argument('--upstream', default="http://localhost:5000", help="Running app URL")
+    rec.add_argument('--port', type=int, default=5050, help="Proxy port to open in the browser")
+    rec.add_argument('--out', default="session.sgnrec", help="Recording file")
+
+    rep = sub.add_parser('replay', help="Replay a recording with N virtual clients")
+    rep.add_argument('session', help="Recording file")
+    rep.add_argument('--url', default="http://localhost:5000", help="Server to load")
+    rep.add_argument('--clients', default="1", help="Concurrent clients, or a list like 1,2,4,8")
+    rep.add_argument('--speed', type=float, default=1.0, help="Pacing multiplier (0 = as fast as possible)")
+    rep.add_argument('--loops', type=int, default=1, help="Times each client replays the recording")
+    rep.add_argument('--max-in-flight', type=int, default=1, help="Outstanding requests per client")
+    rep.add_argument('--ramp', type=float, default=0.0, help="Seconds over which clients start")
+    rep.add_argument('--endpoint', choices=list(ENDPOINT_CODES), help="Only replay one endpoint")
+    rep.add_argument('--timeout', type=float, default=30.0, help="Request timeout in seconds")
+    rep.add_argument('--server-pid', type=int, help="Sample CPU/RSS of this process")
+    rep.add_argument('--output', help="Save the full report as JSON")
+
+    inf = sub.add_parser('info', help="Describe a recording")
+    inf.add_argument('session', help="Recording file")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'record':
+        return record(args)
+    if args.command == 'replay':
+        return replay(args)
+    return info(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Model Lifecycle - Unload idle models, reload them on demand
+
+Each pipeline model (YOLO, FaceMesh, ...) is registered with a load and an
+unload callback. Inference code wraps model use in `lifecycle.use(name)`:
+an unloaded model is reloaded (and warmed up by its load callback) before
+the block runs, and the time of use is recorded. A daemon thread
+- unloads models idle for longer than `idle_seconds`
+- under memory pressure (process RSS above `max_rss_mb`, or system
+  available memory below `min_available_mb`) evicts least recently used
+  models first, never one in use or used within `pressure_grace` seconds
+
+Per-model RSS is the change in process RSS measured around each load and
+unload (freed heap is handed back to the OS with malloc_trim where glibc
+provides it).
+
+Policy (environment overridable, see LifecyclePolicy.from_env):
+    SIGNEASE_MODEL_IDLE_SECONDS   idle time before unloading (0 disables)
+    SIGNEASE_MODEL_MAX_RSS_MB     process RSS that triggers eviction (0 disables)
+    SIGNEASE_MIN_AVAILABLE_MB     system available memory that triggers eviction (0 disables)
+"""
+
+import contextlib
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def process_rss():
+    """Resident set size of this process in bytes (None if unknown)"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def available_memory():
+    """System memory available to new allocations in bytes (None if unknown)"""
+    if PSUTIL_AVAILABLE:
+        return psutil.virtual_memory().available
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _load_libc():
+    name = ctypes.util.find_library('c')
+    try:
+        libc = ctypes.CDLL(name) if name else None
+        return libc if libc is not None and hasattr(libc, 'malloc_trim') else None
+    except OSError:
+        return None
+
+
+_LIBC = _load_libc()
+
+
+def release_memory():
+    """Collect garbage and return free heap pages to the OS"""
+    gc.collect()
+    if _LIBC is not None:
+        _LIBC.malloc_trim(0)
+
+
+@dataclass
+class LifecyclePolicy:
+    """When models are unloaded"""
+    idle_seconds: float = 900.0
+    max_rss_mb: float = 0.0
+    min_available_mb: float = 0.0
+    pressure_grace: float = 30.0
+    check_interval: float = 15.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            idle_seconds=float(os.environ.get("SIGNEASE_MODEL_IDLE_SECONDS", cls.idle_seconds)),
+            max_rss_mb=float(os.environ.get("SIGNEASE_MODEL_MAX_RSS_MB", cls.max_rss_mb)),
+            min_available_mb=float(os.environ.get("SIGNEASE_MIN_AVAILABLE_MB", cls.min_available_mb))
+        )
+
+
+class ManagedModel:
+    """Load state, use tracking and measured memory of one model"""
+
+    def __init__(self, name, load, unload, idle_seconds=None, loaded=True, rss_bytes=None):
+        self.name = name
+        self.load = load                    # () -> None, loads and warms up
+        self.unload = unload                # () -> None, drops every reference
+        self.idle_seconds = idle_seconds    # None = policy default
+        self.loaded = loaded
+        self.in_use = 0
+        self.last_used = time.time()
+        self.rss_bytes = rss_bytes
+        self.loads = 0
+        self.unloads = 0
+        self.last_load_seconds = None
+        self.last_error = None
+        self.lock = threading.Lock()        # held while loading / unloading
+
+    def get_status(self, now):
+        return {
+            'loaded': self.loaded,
+            'in_use': self.in_use,
+            'idle_seconds': round(now - self.last_used, 1),
+            'last_used': datetime.fromtimestamp(self.last_used).isoformat(timespec='seconds'),
+            'rss_mb': round(self.rss_bytes / MB, 1) if self.rss_bytes is not None else None,
+            'reloads': self.loads,
+            'unloads': self.unloads,
+            'last_load_ms': round(self.last_load_seconds * 1000, 1) if self.last_load_seconds is not None else None,
+            'last_error': self.last_error
+        }
+
+
+class ModelLifecycle:
+    """Registered models with idle unloading, on-demand reload and LRU eviction"""
+
+    def __init__(self, policy=None):
+        self.policy = policy or LifecyclePolicy()
+        self.models = {}
+        self.evictions = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name, load, unload, idle_seconds=None, loaded=True, rss_bytes=None):
+        """Manage a model; `loaded` says whether it is resident now"""
+        self.models[name] = ManagedModel(name, load, unload, idle_seconds, loaded, rss_bytes)
+
+    @contextlib.contextmanager
+    def use(self, name):
+        """Make sure `name` is loaded and keep it loaded for the duration of the block"""
+        model = self.models.get(name)
+        if model is None:
+            yield
+            return
+
+        with model.lock:
+            if not model.loaded:
+                self._load(model)
+            model.in_use += 1
+            model.last_used = time.time()
+        try:
+            yield
+        finally:
+            with model.lock:
+                model.in_use -= 1
+                model.last_used = time.time()
+
+    def mark_loaded(self, name):
+        """Record that a model was loaded outside `use` (e.g. a new version swapped in)"""
+        model = self.models.get(name)
+        if model is not None:
+            model.loaded = True
+            model.last_used = time.time()
+
+    def _load(self, model):
+        before = process_rss()
+        start = time.perf_counter()
+        try:
+            model.load()
+        except Exception as e:
+            model.last_error = f"load: {e}"
+            logger.error(f"Could not reload model {model.name}: {e}")
+            raise
+        model.last_load_seconds = time.perf_counter() - start
+        after = process_rss()
+        if before is not None and after is not None:
+            model.rss_bytes = max(0, after - before)
+        model.loaded = True
+        model.loads += 1
+        model.last_error = None
+        logger.info(f"Reloaded model {model.name} in {model.last_load_seconds * 1000:.0f} ms")
+
+    def unload(self, name, reason="manual"):
+        """Unload a model that is not in use; True if it was unloaded"""
+        model = self.models[name]
+        with model.lock:
+            if not model.loaded or model.in_use:
+                return False
+            before = process_rss()
+            try:
+                model.unload()
+            except Exception as e:
+                model.last_error = f"unload: {e}"
+                logger.error(f"Could not unload model {name}: {e}")
+                return False
+            model.loaded = False
+            model.unloads += 1
+
+        release_memory()
+        after = process_rss()
+        if before is not None and after is not None and before > after:
+            model.rss_bytes = before - after
+        logger.info(f"Unloaded model {name} ({reason})")
+        return True
+
+    # ============================================
+    # BACKGROUND THREAD
+    # ============================================
+
+    def start(self):
+        """Check idle time and memory pressure every `check_interval` seconds in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="model-lifecycle", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.policy.check_interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Model lifecycle error: {e}")
+
+    def run_once(self):
+        """Unload idle models, then evict LRU models while memory is under pressure"""
+        now = time.time()
+        unloaded = []
+        for model in list(self.models.values()):
+            idle_seconds = model.idle_seconds if model.idle_seconds is not None else self.policy.idle_seconds
+            if model.loaded and idle_seconds > 0 and now - model.last_used > idle_seconds:
+                if self.unload(model.name, reason=f"idle {now - model.last_used:.0f}s"):
+                    unloaded.append(model.name)
+
+        candidates = sorted((m for m in self.models.values()
+                             if m.loaded and now - m.last_used > self.policy.pressure_grace),
+                            key=lambda m: m.last_used)
+        for model in candidates:
+            pressure = self.memory_pressure()
+            if not pressure:
+                break
+            if self.unload(model.name, reason=pressure):
+                self.evictions += 1
+                unloaded.append(model.name)
+        return unloaded
+
+    def memory_pressure(self):
+        """Reason string while memory is over a configured limit, else None"""
+        if self.policy.max_rss_mb > 0:
+            rss = process_rss()
+            if rss is not None and rss > self.policy.max_rss_mb * MB:
+                return f"rss {rss / MB:.0f} MB > {self.policy.max_rss_mb:.0f} MB"
+        if self.policy.min_available_mb > 0:
+            available = available_memory()
+            if available is not None and available < self.policy.min_available_mb * MB:
+                return f"available {available / MB:.0f} MB < {self.policy.min_available_mb:.0f} MB"
+        return None
+
+    # ============================================
+    # STATUS
+    # ============================================
+
+    def get_status(self):
+        now = time.time()
+        rss, available = process_rss(), available_memory()
+        return {
+            'policy': asdict(self.policy),
+            'process_rss_mb': round(rss / MB, 1) if rss is not None else None,
+            'available_mb': round(available / MB, 1) if available is not None else None,
+            'memory_pressure': self.memory_pressure(),
+            'evictions': self.evictions,
+            'models': {name: model.get_status(now) for name, model in self.models.items()}
+        }
@@ -161,7 +161,7 @@ class LRS3LipReader:
             
             input_tensor = input_tensor.to(self.device)
             
-            with torch.no_grad():
+            with torch.inference_mode():
                 # Calculate visual features
                 mean_intensity = input_tensor.mean().item()
                 std_intensity = input_tensor.std().item()
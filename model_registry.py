@@ -0,0 +1,364 @@
+"""
+Model Registry - Versioned detector artifacts with zero-downtime swaps
+
+Versions are recorded in `registry.json` next to the model files
+(path, sha256, size, registration time) together with the active version.
+A new version is loaded and warmed up in a background thread, then swapped
+in with a single reference assignment: a request that already started keeps
+the snapshot it read, the next request sees the new model.
+
+Shadow mode runs a candidate version on a sampled fraction of live frames
+(off the request path) and records latency and agreement with the active
+model before it is promoted.
+
+USAGE:
+    python model_registry.py list
+    python model_registry.py register dataset/trained_model/best_v2.pt --note "retrained"
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+LoadedModel = namedtuple('LoadedModel', ['version', 'path', 'model', 'class_names', 'loaded_at'])
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Versioned models with background load, warm-up, atomic swap and shadow sampling"""
+
+    def __init__(self, root, loader, predict, warmup_input=None, warmup_runs=3):
+        self.root = root
+        self.index_path = os.path.join(root, "registry.json")
+        self.loader = loader                # path -> (model, class_names)
+        self.predict = predict              # (model, class_names, image) -> (prediction, confidence)
+        self.warmup_input = warmup_input    # callable returning a dummy input
+        self.warmup_runs = warmup_runs
+
+        self.lock = threading.RLock()
+        self.active = None                  # LoadedModel, replaced atomically
+        self.shadow = None
+        self.shadow_fraction = 0.0
+        self.shadow_stats = self._empty_shadow_stats()
+        self._shadow_pending = 0
+        self.state = {'loading': None, 'last_error': None, 'last_swap': None}
+        self.swap_listeners = []
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-registry")
+        self.index = self._read_index()
+
+    # ============================================
+    # INDEX
+    # ============================================
+
+    def _read_index(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Could not read model registry: {e}")
+        return {'versions': [], 'active': None}
+
+    def _write_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def get_version(self, version):
+        return next((v for v in self.index['versions'] if v['version'] == version), None)
+
+    def resolve_artifact(self, path):
+        """Absolute path of an artifact inside the registry root (rejects anything outside it)"""
+        root = os.path.realpath(self.root)
+        resolved = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, resolved]) != root:
+            raise ValueError(f"Model artifacts must live under {self.root}")
+        return resolved
+
+    def register(self, path, version=None, note=""):
+        """Record a model artifact (idempotent per file content); returns its entry"""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model not found: {path}")
+
+        sha256 = file_sha256(path)
+        with self.lock:
+            for entry in self.index['versions']:
+                if entry['sha256'] == sha256 and os.path.abspath(entry['path']) == os.path.abspath(path):
+                    return entry
+
+            version = version or f"v{len(self.index['versions']) + 1}-{sha256[:8]}"
+            if self.get_version(version):
+                raise ValueError(f"Version already registered: {version}")
+
+            entry = {
+                'version': version,
+                'path': path,
+                'sha256': sha256,
+                'size_bytes': os.path.getsize(path),
+                'registered_at': datetime.now().isoformat(timespec='seconds'),
+                'note': note
+            }
+            self.index['versions'].append(entry)
+            self._write_index()
+            logger.info(f"Registered model {version}: {path}")
+            return entry
+
+    # ============================================
+    # LOADING AND SWAPPING
+    # ============================================
+
+    def _load(self, entry):
+        """Load and warm up a version (no effect on the active model)"""
+        if file_sha256(entry['path']) != entry['sha256']:
+            raise ValueError(f"{entry['path']} changed since {entry['version']} was registered")
+        model, class_names = self.loader(entry['path'])
+        loaded = LoadedModel(entry['version'], entry['path'], model, class_names, time.time())
+        if self.warmup_input is not None:
+            dummy = self.warmup_input()
+            for _ in range(self.warmup_runs):
+                self.predict(loaded.model, loaded.class_names, dummy)
+        return loaded
+
+    def _swap(self, loaded, reason=None):
+        previous, self.active = self.active, loaded
+        self.index['active'] = loaded.version
+        self._write_index()
+        self.state['last_swap'] = {
+            'from': previous.version if previous else None,
+            'to': loaded.version,
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'reason': reason
+        }
+        for listener in self.swap_listeners:
+            try:
+                listener(loaded)
+            except Exception as e:
+                logger.error(f"Model swap listener error: {e}")
+        logger.info(f"Active model: {loaded.version}")
+
+    def load_initial(self, override_path=None, default_path=None):
+        """Synchronous startup load: override path, else the persisted active version, else the default"""
+        candidates = []
+        if override_path:
+            candidates.append(lambda: self.register(override_path))
+        else:
+            candidates.append(lambda: self.get_version(self.index.get('active')))
+        if default_path:
+            candidates.append(lambda: self.register(default_path))
+
+        for candidate in candidates:
+            try:
+                entry = candidate()
+                if entry is None:
+                    continue
+                with self.lock:
+                    self._swap(self._load(entry))
+                return True
+            except Exception as e:
+                self.state['last_error'] = str(e)
+                logger.error(f"Model load error: {e}")
+        return False
+
+    def unload_active(self):
+        """Drop the active model's weights (version and class names stay for status and clients)"""
+        with self.lock:
+            if self.active is not None and self.active.model is not None:
+                self.active = self.active._replace(model=None)
+
+    def reload_active(self):
+        """Load and warm up the active version again after unload_active
+
+        If the active file was replaced in place (e.g. best.pt retrained), the new
+        content is registered as its own version and swapped in instead.
+        """
+        with self.lock:
+            active = self.active
+            if active is None or active.model is not None:
+                return
+            entry = self.get_version(active.version)
+            if entry is not None and file_sha256(active.path) == entry['sha256']:
+                self.active = self._load(entry)
+                return
+            entry = self.register(active.path, note=f"changed in place (was {active.version})")
+            logger.warning(f"{active.path} changed since {active.version} was loaded, reloading as {entry['version']}")
+            self._swap(self._load(entry), reason="artifact changed on reload")
+
+    def activate(self, version):
+        """Load + warm up `version` in the background, then swap it in"""
+        entry = self.get_version(version)
+        if entry is None:
+            raise KeyError(f"Unknown model version: {version}")
+        if self.state['loading']:
+            raise RuntimeError(f"Already loading {self.state['loading']}")
+
+        self.state['loading'] = version
+        threading.Thread(target=self._activate_worker, args=(entry,), name="model-activate", daemon=True).start()
+
+    def _activate_worker(self, entry):
+        try:
+            loaded = self._load(entry)
+            with self.lock:
+                self._swap(loaded)
+            self.state['last_error'] = None
+        except Exception as e:
+            self.state['last_error'] = f"{entry['version']}: {e}"
+            logger.error(f"Model activation failed for {entry['version']}: {e}")
+        finally:
+            self.state['loading'] = None
+
+    # ============================================
+    # SHADOW SAMPLING
+    # ============================================
+
+    @staticmethod
+    def _empty_shadow_stats():
+        return {'samples': 0, 'agreements': 0, 'skipped': 0, 'errors': 0,
+                'active_time': 0.0, 'shadow_time': 0.0}
+
+    def start_shadow(self, version, fraction=0.1):
+        """Load a candidate in the background and sample it on `fraction` of frames"""
+        entry = self.get_version(version)
+        if entry is None:
+            raise KeyError(f"Unknown model version: {version}")
+
+        def worker():
+            try:
+                loaded = self._load(entry)
+                with self.lock:
+                    self.shadow = loaded
+                    self.shadow_fraction = max(0.0, min(1.0, float(fraction)))
+                    self.shadow_stats = self._empty_shadow_stats()
+                logger.info(f"Shadowing {version} on {self.shadow_fraction:.0%} of frames")
+            except Exception as e:
+                self.state['last_error'] = f"shadow {version}: {e}"
+                logger.error(f"Shadow load failed for {version}: {e}")
+
+        threading.Thread(target=worker, name="model-shadow", daemon=True).start()
+
+    def stop_shadow(self):
+        with self.lock:
+            self.shadow = None
+            self.shadow_fraction = 0.0
+
+    def promote_shadow(self):
+        """Make the shadow model active (already loaded and warm, so the swap is immediate)"""
+        with self.lock:
+            if self.shadow is None:
+                raise RuntimeError("No shadow model loaded")
+            loaded, self.shadow, self.shadow_fraction = self.shadow, None, 0.0
+            self._swap(loaded)
+        return loaded.version
+
+    def maybe_shadow(self, image, prediction, active_time):
+        """Called after an active inference: queue a sampled shadow comparison"""
+        shadow = self.shadow
+        if shadow is None or random.random() >= self.shadow_fraction:
+            return
+        # Never let shadow work pile up behind a slow candidate
+        with self.lock:
+            if self._shadow_pending >= 2:
+                self.shadow_stats['skipped'] += 1
+                return
+            self._shadow_pending += 1
+        self._executor.submit(self._run_shadow, shadow, image, prediction, active_time)
+
+    def _run_shadow(self, shadow, image, prediction, active_time):
+        try:
+            start = time.perf_counter()
+            shadow_prediction, _ = self.predict(shadow.model, shadow.class_names, image)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                if self.shadow is not shadow:
+                    return
+                stats = self.shadow_stats
+                stats['samples'] += 1
+                stats['agreements'] += int(shadow_prediction == prediction)
+                stats['active_time'] += active_time
+                stats['shadow_time'] += elapsed
+        except Exception as e:
+            self.shadow_stats['errors'] += 1
+            logger.warning(f"Shadow inference error: {e}")
+        finally:
+            with self.lock:
+                self._shadow_pending -= 1
+
+    # ============================================
+    # STATUS
+    # ============================================
+
+    def get_status(self):
+        active, shadow = self.active, self.shadow
+        stats = self.shadow_stats
+        samples = stats['samples']
+        return {
+            'active_version': active.version if active else None,
+            'active_path': active.path if active else None,
+            'loaded_at': datetime.fromtimestamp(active.loaded_at).isoformat(timespec='seconds') if active else None,
+            'loading': self.state['loading'],
+            'last_swap': self.state['last_swap'],
+            'last_error': self.state['last_error'],
+            'shadow': {
+                'version': shadow.version,
+                'fraction': self.shadow_fraction,
+                'samples': samples,
+                'skipped': stats['skipped'],
+                'errors': stats['errors'],
+                'agreement': round(stats['agreements'] / samples, 4) if samples else None,
+                'active_ms': round(stats['active_time'] / samples * 1000, 2) if samples else None,
+                'shadow_ms': round(stats['shadow_time'] / samples * 1000, 2) if samples else None
+            } if shadow else None,
+            'versions': self.index['versions']
+        }
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Versioned model registry")
+    parser.add_argument('command', choices=['list', 'register'])
+    parser.add_argument('path', nargs='?', help="Model file to register")
+    parser.add_argument('--root', default="dataset/trained_model")
+    parser.add_argument('--version', help="Version name (default: v<n>-<sha>)")
+    parser.add_argument('--note', default="")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    registry = ModelRegistry(args.root, loader=None, predict=None)
+    if args.command == 'register':
+        if not args.path:
+            parser.error("register needs a model path")
+        print(json.dumps(registry.register(args.path, args.version, args.note), indent=2))
+    else:
+        for entry in registry.index['versions']:
+            marker = '*' if entry['version'] == registry.index.get('active') else ' '
+            print(f"{marker} {entry['version']:<20} {entry['size_bytes'] / 1e6:7.1f} MB  "
+                  f"{entry['registered_at']}  {entry['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
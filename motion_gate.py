@@ -0,0 +1,141 @@
+"""
+Motion Gate - Reuse the last inference result for near-static frames
+
+A signer holding a letter sends almost identical frames. Before running
+YOLO / FaceMesh, each frame is reduced to a tiny grayscale thumbnail and
+compared with the thumbnail of the last frame that was actually inferred
+(per session). If the mean absolute difference is below the threshold and
+the cached result is not too stale, the cached result is reused.
+
+A gate with a `region` compares only that part of the frame (e.g. the mouth
+around the last face landmarks), so small movements that matter to the model
+are not averaged away by the rest of the frame.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """Per-session frame-difference gate in front of a model"""
+
+    def __init__(self, threshold=3.0, max_staleness=1.5, max_reuse=6, thumb_size=(32, 24), max_sessions=256,
+                 region=None):
+        self.threshold = threshold          # mean abs gray-level difference (0-255)
+        self.max_staleness = max_staleness  # seconds a cached result may be reused
+        self.max_reuse = max_reuse          # consecutive reuses before forcing inference
+        self.thumb_size = thumb_size
+        self.max_sessions = max_sessions
+        self.region = region                # result -> normalized [x1, y1, x2, y2] to compare (None: whole frame)
+        self.enabled = True
+
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            'checks': 0,
+            'hits': 0,
+            'inferences': 0,
+            'inference_time': 0.0
+        }
+
+    def signature(self, frame, box=None):
+        """Downscaled grayscale thumbnail (of the normalized `box`) used for the difference test"""
+        if box is not None:
+            h, w = frame.shape[:2]
+            x1, y1 = max(int(box[0] * w), 0), max(int(box[1] * h), 0)
+            x2, y2 = min(int(np.ceil(box[2] * w)), w), min(int(np.ceil(box[3] * h)), h)
+            if x2 > x1 and y2 > y1:
+                frame = frame[y1:y2, x1:x2]
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def lookup(self, session_id, frame):
+        """Return (hit, cached_result, signature) for this frame"""
+        box = None
+        if self.region is not None:
+            with self.lock:
+                entry = self.sessions.get(session_id)
+                box = entry['box'] if entry is not None else None
+        signature = self.signature(frame, box)
+
+        with self.lock:
+            self.stats['checks'] += 1
+            if not self.enabled:
+                return False, None, signature
+
+            entry = self.sessions.get(session_id)
+            if entry is None or entry['box'] != box or entry['signature'].shape != signature.shape:
+                return False, None, signature
+
+            self.sessions.move_to_end(session_id)
+            if time.time() - entry['time'] > self.max_staleness or entry['reuses'] >= self.max_reuse:
+                return False, None, signature
+
+            difference = float(np.mean(cv2.absdiff(signature, entry['signature'])))
+            if difference >= self.threshold:
+                return False, None, signature
+
+            entry['reuses'] += 1
+            self.stats['hits'] += 1
+            return True, entry['result'], signature
+
+    def store(self, session_id, signature, result, inference_time, frame=None):
+        """Remember the result of a real inference as the new reference
+
+        Region gates need the `frame`: the reference signature is taken over the new result's region.
+        """
+        box = None
+        if self.region is not None and frame is not None:
+            box = self.region(result)
+            signature = self.signature(frame, box)
+
+        with self.lock:
+            self.stats['inferences'] += 1
+            self.stats['inference_time'] += inference_time
+
+            self.sessions[session_id] = {
+                'signature': signature,
+                'box': box,
+                'result': result,
+                'time': time.time(),
+                'reuses': 0
+            }
+            self.sessions.move_to_end(session_id)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+
+    def reset(self, session_id=None):
+        """Forget cached results (one session or all)"""
+        with self.lock:
+            if session_id is None:
+                self.sessions.clear()
+            else:
+                self.sessions.pop(session_id, None)
+
+    def get_stats(self):
+        """Gate hit rate and estimated inference time saved"""
+        with self.lock:
+            checks = self.stats['checks']
+            hits = self.stats['hits']
+            inferences = self.stats['inferences']
+            avg_inference = self.stats['inference_time'] / inferences if inferences else 0.0
+
+            return {
+                'enabled': self.enabled,
+                'threshold': self.threshold,
+                'max_staleness': self.max_staleness,
+                'checks': checks,
+                'hits': hits,
+                'hit_rate': hits / checks if checks else 0.0,
+                'avg_inference_ms': avg_inference * 1000.0,
+                'saved_inference_seconds': hits * avg_inference
+            }
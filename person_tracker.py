@@ -0,0 +1,96 @@
+"""
+Person Tracker - Stable IDs for hands and faces across frames
+
+Detections of consecutive frames are matched greedily:
+- IoU first (boxes that overlap the previous position of a track)
+- then normalized centroid distance (fast movement between frames)
+Unmatched detections open new tracks; tracks unseen for `max_missing`
+seconds expire, and their IDs are reported so per-person state can be freed.
+The tracks and the ID counter are plain data (STATE_FIELDS), so a tracker
+can be stored between frames by session_state.
+"""
+
+import time
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """IoU matrix between (N, 4) and (M, 4) xyxy boxes"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def box_centers(boxes):
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+
+
+class PersonTracker:
+    """Greedy IoU / centroid tracker assigning stable IDs"""
+
+    STATE_FIELDS = ('tracks', 'next_id')
+
+    def __init__(self, prefix="P", iou_threshold=0.3, max_center_distance=0.15, max_missing=2.0):
+        self.prefix = prefix
+        self.iou_threshold = iou_threshold
+        self.max_center_distance = max_center_distance  # fraction of the frame diagonal
+        self.max_missing = max_missing                  # seconds before a track expires
+
+        self.tracks = {}  # id -> {'bbox': [x1, y1, x2, y2], 'last_seen': t, 'hits': n}
+        self.next_id = 1
+
+    def update(self, boxes, frame_size, now=None):
+        """Match boxes to tracks; returns (ids aligned with boxes, expired ids)"""
+        now = time.time() if now is None else now
+        width, height = frame_size
+        diagonal = float(np.hypot(width, height)) or 1.0
+
+        track_ids = list(self.tracks)
+        assigned = [None] * len(boxes)
+
+        if track_ids and len(boxes):
+            previous = np.array([self.tracks[t]['bbox'] for t in track_ids], dtype=np.float32)
+            iou = box_iou(previous, boxes)
+            distance = np.linalg.norm(
+                box_centers(previous)[:, None, :] - box_centers(boxes)[None, :, :], axis=2) / diagonal
+
+            # IoU matches always outrank centroid-only matches
+            score = np.where(iou >= self.iou_threshold, 1.0 + iou,
+                             np.where(distance <= self.max_center_distance,
+                                      1.0 - distance / self.max_center_distance, -1.0))
+
+            used_tracks, used_boxes = set(), set()
+            for flat in np.argsort(-score, axis=None):
+                t, b = np.unravel_index(flat, score.shape)
+                if score[t, b] <= 0:
+                    break
+                if t in used_tracks or b in used_boxes:
+                    continue
+                used_tracks.add(t)
+                used_boxes.add(b)
+                assigned[b] = track_ids[t]
+
+        for i, box in enumerate(boxes):
+            if assigned[i] is None:
+                assigned[i] = f"{self.prefix}{self.next_id}"
+                self.next_id += 1
+                self.tracks[assigned[i]] = {'hits': 0}
+            track = self.tracks[assigned[i]]
+            track['bbox'] = [float(v) for v in box]
+            track['last_seen'] = now
+            track['hits'] += 1
+
+        expired = [t for t, track in self.tracks.items() if now - track['last_seen'] > self.max_missing]
+        for t in expired:
+            del self.tracks[t]
+
+        return assigned, expired
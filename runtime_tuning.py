@@ -0,0 +1,343 @@
+"""
+Runtime Tuning - CPU inference settings per machine
+
+A RuntimeProfile bundles the torch knobs that matter on CPU:
+- intra-op threads (per-operator parallelism) and inter-op threads
+- inference mode (no autograd bookkeeping)
+- bf16 autocast (faster on CPUs with AVX512-BF16 / AMX, checked against fp32)
+- channels_last memory format for the conv layers
+
+Built-in profiles are derived from the core count: `latency` gives one
+request all cores, `throughput` gives each concurrent request a few cores.
+`autotune` benchmarks candidate settings against the installed YOLO model
+on this machine and saves the best latency / throughput profiles; the app
+applies the saved profile at startup. bf16 is only selected when it gives the
+fp32 predictions on at least `min_check_frames` real frames in which fp32
+detects a sign (synthetic frames are used for timing only).
+
+USAGE:
+    python runtime_tuning.py autotune                      # writes runtime_profile.json
+    python runtime_tuning.py autotune --iterations 30 --model dataset/trained_model/best.pt
+    python runtime_tuning.py autotune --frames captured_frames/      # real frames for the bf16 check
+    python runtime_tuning.py show
+    SIGNEASE_RUNTIME_PROFILE=throughput python app.py
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILE = os.environ.get("SIGNEASE_RUNTIME_PROFILE_FILE", "runtime_profile.json")
+
+
+@dataclass
+class RuntimeProfile:
+    """Torch CPU inference settings (0 threads = leave the torch default)"""
+    name: str = "default"
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    inference_mode: bool = True
+    bf16: bool = False
+    channels_last: bool = False
+
+    @classmethod
+    def from_dict(cls, values):
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in values.items() if k in known})
+
+    def inference_context(self):
+        """Context manager for one inference call"""
+        stack = contextlib.ExitStack()
+        if self.inference_mode:
+            stack.enter_context(torch.inference_mode())
+        if self.bf16:
+            stack.enter_context(torch.autocast('cpu', dtype=torch.bfloat16))
+        return stack
+
+
+def builtin_profiles(cores=None):
+    """Named profiles derived from the core count"""
+    cores = cores or os.cpu_count() or 1
+    return {
+        'default': RuntimeProfile('default'),
+        'latency': RuntimeProfile('latency', intra_op_threads=cores, inter_op_threads=1),
+        'throughput': RuntimeProfile('throughput', intra_op_threads=max(1, min(4, cores // 4)), inter_op_threads=1)
+    }
+
+
+def load_runtime_profile(name=None, path=PROFILE_FILE):
+    """Profile to run with: `name` from the autotune file or the built-ins, else the file's selection"""
+    saved = {}
+    selected = None
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            saved = {key: RuntimeProfile.from_dict(value) for key, value in data.get('profiles', {}).items()}
+            selected = data.get('selected')
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Could not read runtime profile {path}: {e}")
+
+    name = name or selected or 'default'
+    profile = saved.get(name) or builtin_profiles().get(name)
+    if profile is None:
+        logger.warning(f"Unknown runtime profile '{name}', using defaults")
+        profile = RuntimeProfile()
+    return profile
+
+
+def apply_runtime_profile(profile):
+    """Process-wide thread settings (inter-op threads can only be set before first parallel work)"""
+    if profile.intra_op_threads > 0:
+        torch.set_num_threads(profile.intra_op_threads)
+    if profile.inter_op_threads > 0 and torch.get_num_interop_threads() != profile.inter_op_threads:
+        try:
+            torch.set_num_interop_threads(profile.inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"Inter-op threads not changed: {e}")
+    logger.info(f"Runtime profile '{profile.name}': {torch.get_num_threads()} intra-op / "
+                f"{torch.get_num_interop_threads()} inter-op threads, bf16={profile.bf16}, "
+                f"channels_last={profile.channels_last}")
+
+
+def prepare_yolo(model, profile, warmup_input=None):
+    """Apply the memory format to an Ultralytics model (after its predictor fused the layers)"""
+    if not profile.channels_last:
+        return model
+    if getattr(model, 'predictor', None) is None and warmup_input is not None:
+        model(warmup_input, verbose=False)
+    predictor = getattr(model, 'predictor', None)
+    module = getattr(getattr(predictor, 'model', None), 'model', None) or model.model
+    module.to(memory_format=torch.channels_last)
+    return model
+
+
+def runtime_status(profile):
+    return {
+        **asdict(profile),
+        'torch_threads': torch.get_num_threads(),
+        'torch_interop_threads': torch.get_num_interop_threads(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+# ============================================
+# AUTOTUNE
+# ============================================
+
+def bf16_supported():
+    """bf16 autocast runs on this build/CPU (speed is measured separately)"""
+    try:
+        with torch.autocast('cpu', dtype=torch.bfloat16):
+            torch.nn.functional.conv2d(torch.ones(1, 3, 8, 8), torch.ones(4, 3, 3, 3))
+        return True
+    except Exception:
+        return False
+
+
+def _top_predictions(model, frames, profile, conf):
+    outputs = []
+    for frame in frames:
+        with profile.inference_context():
+            results = model(frame, conf=conf, verbose=False)
+        boxes = results[0].boxes if results else []
+        outputs.append((int(boxes.cls[0]), float(boxes.conf[0])) if len(boxes) else (None, 0.0))
+    return outputs
+
+
+def _agrees(reference, candidate, max_conf_drift, checked):
+    return all(reference[i][0] == candidate[i][0] and abs(reference[i][1] - candidate[i][1]) <= max_conf_drift
+               for i in checked)
+
+
+def _measure(models, frames, profile, iterations):
+    """(p50 latency ms, frames/s) with one concurrent caller per model instance"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(model, count):
+        for i in range(count):
+            t0 = time.perf_counter()
+            with profile.inference_context():
+                model(frames[i % len(frames)], verbose=False)
+            with lock:
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+    per_worker = max(1, iterations // len(models))
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(model, per_worker)) for model in models]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return latencies[len(latencies) // 2], len(latencies) / elapsed
+
+
+def autotune(model_path, frames, iterations=20, conf=0.25, max_conf_drift=0.05, min_check_frames=4):
+    """Benchmark candidate profiles on real `frames`; returns (profiles {'latency', 'throughput'}, result rows)"""
+    from ultralytics import YOLO
+
+    # Timing does not need real content; the accuracy check only counts real frames
+    check_frames = frames
+    frames = frames or synthetic_frames()
+
+    cores = os.cpu_count() or 1
+    thread_options = sorted({1, 2, 4, max(1, cores // 2), cores} & set(range(1, cores + 1)))
+    precision_options = [False, True] if bf16_supported() else [False]
+    if torch.get_num_interop_threads() != 1:
+        torch.set_num_interop_threads(1)
+
+    rows = []
+    reference = None
+    checked = []
+    for channels_last in (False, True):
+        base = RuntimeProfile('candidate', channels_last=channels_last)
+        # Fresh models per memory format (fused layers cannot be converted back),
+        # one instance per concurrent worker (Ultralytics predictors are not thread-safe)
+        models = []
+
+        def instances(count):
+            while len(models) < count:
+                models.append(prepare_yolo(YOLO(model_path), base, frames[0]))
+            return models[:count]
+
+        model = instances(1)[0]
+
+        for bf16 in precision_options:
+            profile = replace(base, bf16=bf16)
+            torch.set_num_threads(cores)
+            predictions = _top_predictions(model, check_frames, profile, conf)
+            if reference is None:
+                reference = predictions
+                # Frames without an fp32 detection agree with anything
+                checked = [i for i, (class_id, _) in enumerate(reference) if class_id is not None]
+                if len(checked) < min_check_frames and len(precision_options) > 1:
+                    logger.warning(f"bf16 not selectable: {len(checked)} real frames with an fp32 detection, "
+                                   f"{min_check_frames} needed (pass --frames)")
+            accurate = _agrees(reference, predictions, max_conf_drift, checked)
+            if bf16 and len(checked) < min_check_frames:
+                accurate = False
+
+            for threads in thread_options:
+                torch.set_num_threads(threads)
+                candidate = replace(profile, intra_op_threads=threads, inter_op_threads=1)
+                workers = max(1, cores // threads)
+                _measure(instances(workers), frames, candidate, 2 * workers)  # warm-up
+                latency, _ = _measure([model], frames, candidate, iterations)
+                _, throughput = _measure(instances(workers), frames, candidate, iterations * workers)
+                rows.append({
+                    'profile': asdict(candidate),
+                    'accurate': accurate,
+                    'p50_ms': round(latency, 2),
+                    'throughput_fps': round(throughput, 2),
+                    'workers': workers
+                })
+                logger.info(f"threads={threads} bf16={bf16} channels_last={channels_last}: "
+                            f"p50 {latency:.1f} ms, {throughput:.1f} frames/s ({workers} workers)"
+                            f"{'' if accurate else ' [predictions differ from fp32, rejected]'}")
+
+    valid = [row for row in rows if row['accurate']]
+    best_latency = min(valid, key=lambda row: row['p50_ms'])
+    best_throughput = max(valid, key=lambda row: row['throughput_fps'])
+    profiles = {
+        'latency': RuntimeProfile.from_dict({**best_latency['profile'], 'name': 'latency'}),
+        'throughput': RuntimeProfile.from_dict({**best_throughput['profile'], 'name': 'throughput'})
+    }
+    return profiles, rows
+
+
+def load_frames(frames_dir=None, count=32):
+    """Real frames from `frames_dir` (default: the sample detection images), up to `count`"""
+    frames = []
+    frames_dir = frames_dir or "runs/detect/predict"
+    if os.path.isdir(frames_dir):
+        import cv2
+        for name in sorted(os.listdir(frames_dir)):
+            frame = cv2.imread(os.path.join(frames_dir, name))
+            if frame is not None:
+                frames.append(frame)
+            if len(frames) >= count:
+                break
+    return frames
+
+
+def synthetic_frames(count=8):
+    """Random frames for timing when no real frames are available"""
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CPU inference runtime profiles")
+    parser.add_argument('command', choices=['autotune', 'show'])
+    parser.add_argument('--model', default="dataset/trained_model/best.pt")
+    parser.add_argument('--output', default=PROFILE_FILE)
+    parser.add_argument('--iterations', type=int, default=20, help="Timed inferences per candidate")
+    parser.add_argument('--select', choices=['latency', 'throughput'], default='latency',
+                        help="Profile the app uses by default")
+    parser.add_argument('--frames', help="Folder of real camera frames for the bf16 accuracy check")
+    parser.add_argument('--min-check-frames', type=int, default=4,
+                        help="Frames with an fp32 detection needed before bf16 can be selected")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'show':
+        for name in ('default', 'latency', 'throughput'):
+            print(json.dumps(asdict(load_runtime_profile(name, args.output))))
+        return 0
+
+    if not os.path.exists(args.model):
+        print(f"Model not found: {args.model}")
+        return 1
+
+    if args.frames and not os.path.isdir(args.frames):
+        print(f"Frames folder not found: {args.frames}")
+        return 1
+
+    profiles, rows = autotune(args.model, load_frames(args.frames), args.iterations,
+                              min_check_frames=args.min_check_frames)
+    result = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'torch': torch.__version__
+        },
+        'model': args.model,
+        'selected': args.select,
+        'profiles': {name: asdict(profile) for name, profile in profiles.items()},
+        'results': rows
+    }
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    for name, profile in profiles.items():
+        print(f"{name:<10} {json.dumps(asdict(profile))}")
+    print(f"Saved to {args.output} (app default: {args.select})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Sampling Profiler - Low-overhead stack sampling of a live server
+
+A daemon thread wakes every `interval` seconds, reads the current stack of
+every other thread with `sys._current_frames()` and counts identical stacks.
+Nothing is instrumented, so the server runs at full speed between samples
+(a sample costs tens of microseconds).
+
+Results are exported as collapsed stacks ("thread;outer;...;inner count"),
+the input format of flamegraph.pl, speedscope and inferno, plus a summary of
+where samples landed: YOLO, FaceMesh, image decode, SQLite, other Python or
+idle (threads parked in waits / socket selects).
+
+USAGE:
+    curl "localhost:5000/admin/profile?seconds=10" > profile.folded   # all threads
+    flamegraph.pl profile.folded > profile.svg
+    curl "localhost:5000/admin/profile?seconds=10&format=json"        # summary
+    curl -H "X-Profile-Request: 1" -i -X POST localhost:5000/predict_asl ...
+    curl localhost:5000/admin/profile/trace/<X-Profile-Trace header>  # one request
+"""
+
+import itertools
+import linecache
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+# Leaf files that mean "this thread is waiting, not working"
+_IDLE_FILES = ('threading.py', 'selectors.py', 'socketserver.py', 'queue.py',
+               os.path.join('concurrent', 'futures', 'thread.py'))
+_SQLITE_CALLS = re.compile(r"\.(execute|executemany|executescript|fetchone|fetchall|fetchmany|commit)\(|sqlite3\.connect\(")
+_DECODE_CALLS = re.compile(r"imdecode\(|b64decode\(|Image\.open\(")
+_THREAD_NUMBER = re.compile(r"-\d+")
+
+
+def _category_of_file(filename):
+    if 'ultralytics' in filename or f'{os.sep}torch{os.sep}' in filename:
+        return 'yolo'
+    if 'mediapipe' in filename:
+        return 'facemesh'
+    return None
+
+
+class ProfileResult:
+    """Stack counts of one profiling run"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.started = time.time()
+        self.duration = 0.0
+        self.samples = 0
+        self.counts = Counter()       # (thread name, code objects outer->inner, leaf line) -> samples
+        self._categories = {}
+
+    @staticmethod
+    def label(code):
+        return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+    def category(self, key):
+        """yolo | facemesh | decode | sqlite | idle | python for one sampled stack"""
+        cached = self._categories.get(key)
+        if cached is not None:
+            return cached
+
+        _, codes, lineno = key
+        leaf = codes[-1]
+        line = linecache.getline(leaf.co_filename, lineno)
+        if leaf.co_filename.endswith(_IDLE_FILES):
+            category = 'idle'
+        elif _SQLITE_CALLS.search(line):
+            category = 'sqlite'
+        elif _DECODE_CALLS.search(line) or leaf.co_name == 'decode_frame':
+            category = 'decode'
+        else:
+            # Innermost library frame decides (e.g. numpy called from YOLO postprocessing)
+            category = next((c for c in map(_category_of_file, (code.co_filename for code in reversed(codes))) if c),
+                            'python')
+        self._categories[key] = category
+        return category
+
+    def collapsed(self, include_idle=False):
+        """Collapsed stack lines for flame graph tools"""
+        merged = Counter()
+        for key, count in self.counts.items():
+            if not include_idle and self.category(key) == 'idle':
+                continue
+            thread, codes, _ = key
+            merged[';'.join([thread] + [self.label(code) for code in codes])] += count
+        return '\n'.join(f"{stack} {count}" for stack, count in merged.most_common()) + '\n'
+
+    def summary(self, top=20, include_idle=False):
+        categories = Counter()
+        functions = Counter()
+        stacks = Counter()
+        for key, count in self.counts.items():
+            category = self.category(key)
+            categories[category] += count
+            if category == 'idle' and not include_idle:
+                continue
+            thread, codes, _ = key
+            functions[self.label(codes[-1])] += count
+            stacks[' <- '.join(self.label(code) for code in reversed(codes[-6:]))] += count
+
+        busy = sum(count for category, count in categories.items() if category != 'idle')
+        return {
+            'samples': self.samples,
+            'duration': round(self.duration, 3),
+            'interval_ms': round(self.interval * 1000, 2),
+            'busy_thread_samples': busy,
+            'categories': {
+                category: {'samples': count, 'share': round(count / busy, 4) if busy and category != 'idle' else None}
+                for category, count in categories.most_common()
+            },
+            'top_functions': [{'function': f, 'samples': c} for f, c in functions.most_common(top)],
+            'top_stacks': [{'stack': s, 'samples': c} for s, c in stacks.most_common(top)]
+        }
+
+
+class SamplingProfiler:
+    """Stack sampler over all threads (one session at a time) or single request threads"""
+
+    def __init__(self, interval=0.005, max_traces=20):
+        self.interval = interval
+        self.max_traces = max_traces
+        self.session_lock = threading.Lock()
+        self.traces = OrderedDict()   # trace id -> ProfileResult
+        self.trace_lock = threading.Lock()
+        self._trace_ids = itertools.count(1)
+
+    def _sample_loop(self, result, stop, thread_ids=None):
+        own = threading.get_ident()
+        names = {}
+        start = time.perf_counter()
+        next_sample = start
+
+        while not stop.is_set():
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (thread_ids is not None and ident not in thread_ids):
+                    continue
+                name = names.get(ident)
+                if name is None:
+                    names.update((t.ident, _THREAD_NUMBER.sub('', t.name)) for t in threading.enumerate())
+                    name = names.setdefault(ident, f"thread-{ident}")
+
+                lineno = frame.f_lineno
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                result.counts[(name, tuple(codes), lineno)] += 1
+            result.samples += 1
+
+            next_sample += result.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                stop.wait(delay)
+            else:
+                next_sample = time.perf_counter()  # fell behind: do not burst
+
+        result.duration = time.perf_counter() - start
+
+    def profile(self, seconds, interval=None):
+        """Sample every thread for `seconds` (blocks the caller); None if a session is already running"""
+        if not self.session_lock.acquire(blocking=False):
+            return None
+        try:
+            result = ProfileResult(interval or self.interval)
+            stop = threading.Event()
+            timer = threading.Timer(seconds, stop.set)
+            timer.daemon = True
+            timer.start()
+            self._sample_loop(result, stop)
+            return result
+        finally:
+            self.session_lock.release()
+
+    # ============================================
+    # SINGLE REQUEST TRACES
+    # ============================================
+
+    def start_trace(self, thread_id=None, interval=None):
+        """Begin sampling one thread (the current request); returns a handle for finish_trace"""
+        result = ProfileResult(interval or self.interval)
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample_loop,
+                                   args=(result, stop, {thread_id or threading.get_ident()}),
+                                   name="profile-trace", daemon=True)
+        sampler.start()
+        return result, stop, sampler
+
+    def finish_trace(self, handle):
+        """Stop sampling and keep the result; returns its trace id"""
+        result, stop, sampler = handle
+        stop.set()
+        sampler.join()
+        with self.trace_lock:
+            trace_id = str(next(self._trace_ids))
+            self.traces[trace_id] = result
+            while len(self.traces) > self.max_traces:
+                self.traces.popitem(last=False)
+        return trace_id
+
+    def get_trace(self, trace_id):
+        return self.traces.get(trace_id)
@@ -0,0 +1,351 @@
+"""
+Session State - Per-session recognition state behind a pluggable backend
+
+Text buffers, cooldown timestamps, lip reading temporal windows and
+multi-person trackers are loaded from a backend when a frame arrives and
+written back when it has been processed, so consecutive frames of one
+session can be served by different app nodes behind a load balancer.
+
+Backends:
+- MemoryStateBackend: live objects in this process (default, single node)
+- KeyValueStateBackend: one hash per state object in a shared Redis-compatible
+  store; LocalKeyValueStore is an in-process stand-in with the same commands
+  for tests and single-machine trials
+
+In a hash every attribute listed in the object's STATE_FIELDS is one field
+holding a compact tagged encoding (float windows as packed float32, the
+rest as short strings / doubles / compact JSON). After a frame only the
+fields whose encoding changed are written, together with the TTL refresh,
+in a single round trip.
+
+Clients send the frames of a session one at a time; should two nodes
+process frames of the same session concurrently, the last writer wins
+per field.
+
+USAGE:
+    SIGNEASE_STATE_BACKEND=memory python app.py                           # default
+    SIGNEASE_STATE_BACKEND=redis://state-host:6379/0 python app.py        # pip install redis
+    SIGNEASE_STATE_BACKEND=local python app.py                            # key-value path, one process
+"""
+
+import contextlib
+import json
+import logging
+import numbers
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_DOUBLE = struct.Struct('<d')
+
+
+# ============================================
+# ENCODING
+# ============================================
+
+def encode_value(value):
+    """One attribute -> tagged bytes"""
+    if value is None:
+        return b'N'
+    if isinstance(value, str):
+        return b'S' + value.encode('utf-8')
+    if isinstance(value, deque):
+        return b'W' + np.asarray(value, dtype='<f4').tobytes()
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return b'D' + _DOUBLE.pack(float(value))
+    if isinstance(value, tuple):
+        return b'T' + np.asarray([np.nan if v is None else v for v in value], dtype='<f8').tobytes()
+    if hasattr(value, 'STATE_FIELDS'):
+        value = {name: getattr(value, name) for name in value.STATE_FIELDS}
+    return b'J' + json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def decode_value(data, current):
+    """Tagged bytes -> attribute value; `current` (the factory default) gives window sizes and nested objects"""
+    tag, body = data[:1], data[1:]
+    if tag == b'N':
+        return None
+    if tag == b'S':
+        return body.decode('utf-8')
+    if tag == b'W':
+        return deque(np.frombuffer(body, dtype='<f4').tolist(), maxlen=getattr(current, 'maxlen', None))
+    if tag == b'D':
+        return _DOUBLE.unpack(body)[0]
+    if tag == b'T':
+        return tuple(None if np.isnan(v) else v for v in np.frombuffer(body, dtype='<f8').tolist())
+    if tag == b'J':
+        value = json.loads(body)
+        if hasattr(current, 'STATE_FIELDS'):
+            for name, field_value in value.items():
+                setattr(current, name, field_value)
+            return current
+        return value
+    raise ValueError(f"Unknown state encoding tag: {tag!r}")
+
+
+def encode_state(state):
+    """{field: bytes} for every attribute in STATE_FIELDS"""
+    return {name: encode_value(getattr(state, name)) for name in state.STATE_FIELDS}
+
+
+def decode_state(state, fields):
+    """Apply stored fields onto a freshly constructed state object"""
+    for name in state.STATE_FIELDS:
+        data = fields.get(name)
+        if data is not None:
+            setattr(state, name, decode_value(data, getattr(state, name)))
+    return state
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class MemoryStateBackend:
+    """Live state objects in this process (nothing is encoded)"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'loads': 0, 'created': 0}
+
+    def load(self, key, factory):
+        """(state, snapshot) for `key`, created with `factory` if unknown"""
+        with self.lock:
+            self.stats['loads'] += 1
+            state = self.entries.get(key)
+            if state is None:
+                state = self.entries[key] = factory()
+                self.stats['created'] += 1
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            self.entries.move_to_end(key)
+            return state, None
+
+    def load_many(self, keys, factory):
+        return [self.load(key, factory) for key in keys]
+
+    def save(self, key, state, snapshot):
+        """Changes are already visible (the state object is the stored one)"""
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def get_status(self):
+        with self.lock:
+            return {'backend': self.name, 'entries': len(self.entries), **self.stats}
+
+
+class KeyValueStateBackend:
+    """State objects as hashes in a shared key-value store (redis-py client interface)"""
+
+    name = 'key-value'
+
+    def __init__(self, client, prefix="signease:state:", ttl=3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.stats = {'loads': 0, 'created': 0, 'saves': 0, 'fields_written': 0, 'bytes_written': 0}
+
+    def _count(self, **increments):
+        with self.lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _decode(self, fields, factory):
+        state = factory()
+        if not fields:
+            self._count(loads=1, created=1)
+            return state, {}
+        fields = {name.decode('utf-8') if isinstance(name, bytes) else name: value for name, value in fields.items()}
+        self._count(loads=1)
+        return decode_state(state, fields), fields
+
+    def load(self, key, factory):
+        """(state, snapshot of its encoded fields)"""
+        return self._decode(self.client.hgetall(self.prefix + key), factory)
+
+    def load_many(self, keys, factory):
+        """Several states in one round trip"""
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(self.prefix + key)
+        return [self._decode(fields, factory) for fields in pipe.execute()]
+
+    def save(self, key, state, snapshot):
+        """Write the fields whose encoding changed since `load`"""
+        changed = {name: data for name, data in encode_state(state).items() if snapshot.get(name) != data}
+        if not changed:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(self.prefix + key, mapping=changed)
+        if self.ttl:
+            pipe.expire(self.prefix + key, self.ttl)
+        pipe.execute()
+        snapshot.update(changed)
+        self._count(saves=1, fields_written=len(changed), bytes_written=sum(len(data) for data in changed.values()))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def get_status(self):
+        with self.lock:
+            stats = dict(self.stats)
+        saves = stats['saves']
+        return {
+            'backend': self.name,
+            'client': type(self.client).__name__,
+            'ttl': self.ttl,
+            **stats,
+            'bytes_per_save': round(stats['bytes_written'] / saves, 1) if saves else None
+        }
+
+
+class LocalKeyValueStore:
+    """In-process stand-in for a Redis server (the hash commands KeyValueStateBackend uses)"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.RLock()
+
+    def _live(self, name):
+        deadline = self.expires.get(name)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(name, None)
+            self.expires.pop(name, None)
+        return self.data.get(name)
+
+    def hgetall(self, name):
+        with self.lock:
+            return {field.encode('utf-8'): value for field, value in (self._live(name) or {}).items()}
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        with self.lock:
+            fields = self._live(name)
+            if fields is None:
+                fields = self.data[name] = {}
+            updates = dict(mapping or {})
+            if key is not None:
+                updates[key] = value
+            added = sum(1 for field in updates if field not in fields)
+            fields.update({field: value if isinstance(value, bytes) else str(value).encode('utf-8')
+                           for field, value in updates.items()})
+            return added
+
+    def expire(self, name, seconds):
+        with self.lock:
+            if self._live(name) is None:
+                return False
+            self.expires[name] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *names):
+        with self.lock:
+            removed = 0
+            for name in names:
+                removed += self._live(name) is not None
+                self.data.pop(name, None)
+                self.expires.pop(name, None)
+            return removed
+
+    def pipeline(self, transaction=True):
+        return _LocalPipeline(self)
+
+
+class _LocalPipeline:
+    """Queued commands run in one go, like a redis-py pipeline"""
+
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+
+    def __getattr__(self, command):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.store, command), args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self.store.lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+def create_state_backend(spec=None, ttl=3600):
+    """Backend for SIGNEASE_STATE_BACKEND: "memory" (default), "local" or a redis:// URL"""
+    spec = (spec or "memory").strip()
+    if spec == "memory":
+        return MemoryStateBackend()
+    if spec == "local":
+        return KeyValueStateBackend(LocalKeyValueStore(), ttl=ttl)
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("A redis:// state backend needs the redis package (pip install redis)")
+        return KeyValueStateBackend(redis.Redis.from_url(spec), ttl=ttl)
+    raise ValueError(f"Unknown state backend: {spec}")
+
+
+# ============================================
+# SESSION STATES
+# ============================================
+
+class SessionStates:
+    """Load / save of per-session state objects around each request"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryStateBackend()
+
+    @staticmethod
+    def key(kind, session_id):
+        return f"{kind}:{session_id}"
+
+    @contextlib.contextmanager
+    def session(self, kind, session_id, factory):
+        """The session's `kind` state for the block; saved when the block completes without error"""
+        key = self.key(kind, session_id)
+        state, snapshot = self.backend.load(key, factory)
+        yield state
+        self.backend.save(key, state, snapshot)
+
+    def get(self, kind, session_id, factory):
+        """The session's `kind` state for reading (changes are not saved)"""
+        return self.backend.load(self.key(kind, session_id), factory)[0]
+
+    @contextlib.contextmanager
+    def sessions(self, kind, session_ids, factory):
+        """{session_id: state} for several ids (one round trip on shared backends)"""
+        keys = [self.key(kind, session_id) for session_id in session_ids]
+        loaded = self.backend.load_many(keys, factory)
+        yield {session_id: state for session_id, (state, _) in zip(session_ids, loaded)}
+        for key, (state, snapshot) in zip(keys, loaded):
+            self.backend.save(key, state, snapshot)
+
+    def delete(self, kind, *session_ids):
+        self.backend.delete(*(self.key(kind, session_id) for session_id in session_ids))
+
+    def get_status(self):
+        try:
+            return self.backend.get_status()
+        except Exception as e:
+            logger.error(f"State backend status error: {e}")
+            return {'backend': self.backend.name, 'error': str(e)}
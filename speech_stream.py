@@ -0,0 +1,225 @@
+"""
+Speech Streams - Local streaming speech recognition for voice-to-ASL
+
+Audio never leaves the machine: a Vosk (Kaldi) model recognizes 16 kHz mono
+16-bit PCM on the CPU. A client opens a stream, posts audio chunks as it
+records them and listens on one Server-Sent Events connection for:
+- `partial`: the running hypothesis of the current utterance
+- `segment`: words that stayed unchanged over the last few partials,
+  converted to ASL right away so signs start before the sentence ends
+  (held back while the tail could still grow into a multi-word phrase)
+- `final`: the end of an utterance, with the words not yet sent as segments
+- `end`: the stream was closed
+
+Events carry increasing ids, so a reconnecting EventSource resumes after
+Last-Event-ID.
+
+USAGE:
+    pip install vosk
+    # unpack a model, e.g. vosk-model-small-en-us-0.15 from https://alphacephei.com/vosk/models
+    SIGNEASE_VOSK_MODEL=models/vosk-model-small-en-us-0.15 python app.py
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+try:
+    from vosk import KaldiRecognizer, Model, SetLogLevel
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+DEFAULT_MODEL_PATH = os.environ.get("SIGNEASE_VOSK_MODEL", "models/vosk-model-small-en-us-0.15")
+
+
+def phrase_prefixes(phrases):
+    """Word tuples that can still grow into one of the multi-word phrases"""
+    prefixes = set()
+    for phrase in phrases:
+        words = tuple(phrase.split())
+        prefixes.update(words[:n] for n in range(1, len(words)))
+    return prefixes
+
+
+class SpeechStream:
+    """One recognizer, its stability tracking and the events it produced"""
+
+    def __init__(self, stream_id, recognizer, convert, prefixes, stable_partials=3, max_events=256):
+        self.id = stream_id
+        self.recognizer = recognizer
+        self.convert = convert              # text -> (words, animations)
+        self.prefixes = prefixes
+        self.stable_partials = stable_partials
+        self.lock = threading.Lock()        # recognizers are not thread-safe
+        self.changed = threading.Condition()
+        self.events = deque(maxlen=max_events)
+        self.next_event_id = 1
+        self.created = self.last_activity = time.time()
+        self.closed = False
+        self.audio_seconds = 0.0
+        self._reset_utterance()
+
+    def _reset_utterance(self):
+        self.partial = ''
+        self.recent = deque(maxlen=self.stable_partials)   # word lists of the latest partials
+        self.committed = []                                 # words already sent as segments
+
+    def _emit(self, kind, **payload):
+        with self.changed:
+            event = {'id': self.next_event_id, 'event': kind, **payload}
+            self.next_event_id += 1
+            self.events.append(event)
+            self.changed.notify_all()
+        return event
+
+    def _converted(self, kind, words, **payload):
+        text = ' '.join(words)
+        asl_words, animations = self.convert(text) if text else ([], [])
+        return self._emit(kind, text=text, words=asl_words, animations=animations, **payload)
+
+    # ============================================
+    # RECOGNITION
+    # ============================================
+
+    def feed(self, pcm):
+        """Recognize a chunk of 16 kHz mono int16 PCM; returns the events it produced"""
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Stream is closed")
+            self.last_activity = time.time()
+            self.audio_seconds += len(pcm) / (2 * SAMPLE_RATE)
+            if self.recognizer.AcceptWaveform(pcm):
+                return self._finish_utterance(json.loads(self.recognizer.Result()).get('text', ''))
+            return self._update_partial(json.loads(self.recognizer.PartialResult()).get('partial', ''))
+
+    def _update_partial(self, text):
+        if text == self.partial:
+            return []
+        self.partial = text
+        words = text.split()
+        self.recent.append(words)
+        events = [self._emit('partial', text=text)]
+
+        if len(self.recent) < self.stable_partials:
+            return events
+        # Stable = common to the last few hypotheses, minus the word still being spoken
+        stable = 0
+        while stable < len(words) - 1 and all(len(w) > stable and w[stable] == words[stable] for w in self.recent):
+            stable += 1
+        # Do not split a phrase such as "thank | you" across two segments
+        while stable > len(self.committed) and any(tuple(words[start:stable]) in self.prefixes
+                                                   for start in range(max(0, stable - 5), stable)):
+            stable -= 1
+
+        if stable > len(self.committed) and words[:len(self.committed)] == self.committed:
+            new_words = words[len(self.committed):stable]
+            self.committed = words[:stable]
+            events.append(self._converted('segment', new_words))
+        return events
+
+    def _finish_utterance(self, text):
+        words = text.split()
+        sent = len(self.committed)
+        revised = words[:sent] != self.committed
+        events = []
+        if words or self.partial:
+            events.append(self._converted('final', words[sent:], utterance=text, revised=revised))
+        self._reset_utterance()
+        return events
+
+    def close(self):
+        """Flush the last utterance and end the stream"""
+        with self.lock:
+            if self.closed:
+                return []
+            events = self._finish_utterance(json.loads(self.recognizer.FinalResult()).get('text', ''))
+            self.closed = True
+            events.append(self._emit('end'))
+            return events
+
+    def wait_events(self, after_id, timeout=15.0):
+        """Events newer than `after_id`, waiting up to `timeout` for one (empty list on timeout)"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.next_event_id - 1 > after_id or self.closed, timeout)
+            return [event for event in self.events if event['id'] > after_id]
+
+
+class SpeechStreams:
+    """Open streams over one shared, lazily loaded Vosk model"""
+
+    def __init__(self, convert, phrases=(), model_path=DEFAULT_MODEL_PATH, max_streams=8, idle_timeout=60.0):
+        self.convert = convert
+        self.prefixes = phrase_prefixes(phrases)
+        self.model_path = model_path
+        self.max_streams = max_streams
+        self.idle_timeout = idle_timeout
+        self.model = None
+        self.model_lock = threading.Lock()
+        self.streams = OrderedDict()
+        self.lock = threading.Lock()
+        self.last_error = None
+
+    @property
+    def is_available(self):
+        return VOSK_AVAILABLE and os.path.isdir(self.model_path)
+
+    def _get_model(self):
+        with self.model_lock:
+            if self.model is None:
+                SetLogLevel(-1)
+                start = time.perf_counter()
+                self.model = Model(self.model_path)
+                logger.info(f"Vosk model loaded from {self.model_path} in {time.perf_counter() - start:.1f}s")
+            return self.model
+
+    def _expire_idle(self):
+        now = time.time()
+        for stream_id, stream in list(self.streams.items()):
+            if stream.closed or now - stream.last_activity > self.idle_timeout:
+                del self.streams[stream_id]
+
+    def create(self):
+        """Open a new stream (RuntimeError when the model is missing or too many streams are open)"""
+        if not self.is_available:
+            raise RuntimeError("Local speech recognition unavailable (pip install vosk and set SIGNEASE_VOSK_MODEL)")
+        with self.lock:
+            self._expire_idle()
+            if len(self.streams) >= self.max_streams:
+                raise RuntimeError(f"Too many open speech streams ({self.max_streams})")
+        try:
+            recognizer = KaldiRecognizer(self._get_model(), SAMPLE_RATE)
+        except Exception as e:
+            self.last_error = str(e)
+            raise RuntimeError(f"Could not start speech recognition: {e}")
+
+        stream = SpeechStream(uuid.uuid4().hex[:16], recognizer, self.convert, self.prefixes)
+        with self.lock:
+            self.streams[stream.id] = stream
+        return stream
+
+    def get(self, stream_id):
+        with self.lock:
+            return self.streams.get(stream_id)
+
+    def get_status(self):
+        with self.lock:
+            self._expire_idle()
+            open_streams = len(self.streams)
+        return {
+            'available': self.is_available,
+            'engine': 'vosk' if VOSK_AVAILABLE else None,
+            'model_path': self.model_path,
+            'model_loaded': self.model is not None,
+            'sample_rate': SAMPLE_RATE,
+            'open_streams': open_streams,
+            'max_streams': self.max_streams,
+            'last_error': self.last_error
+        }
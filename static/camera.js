@@ -7,6 +7,11 @@
 let conversionStartTime = null;
 let lipConversionStartTime = null;
 
+// Per-tab session id so the server can keep per-client state (motion gate etc.)
+const clientSessionId = (window.crypto && crypto.randomUUID)
+    ? crypto.randomUUID()
+    : `s-${Date.now()}-${Math.random().toString(36).slice(2, 10)}`;
+
 // Sound effects (optional - can be disabled)
 const soundEnabled = false; // Set to true if you want sound effects
 
@@ -87,6 +92,270 @@ function showNotification(message, type = 'info') {
     }, 3000);
 }
 
+// ============================================
+// LANDMARK UPLOAD MODE
+// ============================================
+// Enable with ?mode=landmarks (or localStorage signeaseUploadMode = 'landmarks').
+// Hand / face tracking then runs in the browser and only a few hundred bytes
+// of landmark floats are posted instead of a ~100 KB JPEG.
+
+const MEDIAPIPE_CDN = 'https://cdn.jsdelivr.net/npm/@mediapipe';
+// Outer then inner lip contour (same order as face_landmarks.LIP_LANDMARK_IDS)
+const LIP_LANDMARK_IDS = [
+    61, 185, 40, 39, 37, 0, 267, 269, 270, 409, 291, 375, 321, 405, 314, 17, 84, 181, 91, 146,
+    78, 191, 80, 81, 82, 13, 312, 311, 310, 415, 308, 324, 318, 402, 317, 14, 87, 178, 88, 95
+];
+const landmarkModeEnabled = (
+    new URLSearchParams(window.location.search).get('mode') === 'landmarks' ||
+    localStorage.getItem('signeaseUploadMode') === 'landmarks'
+);
+
+function loadScript(src) {
+    return new Promise((resolve, reject) => {
+        if (document.querySelector(`script[src="${src}"]`)) {
+            resolve();
+            return;
+        }
+        const script = document.createElement('script');
+        script.src = src;
+        script.crossOrigin = 'anonymous';
+        script.onload = () => resolve();
+        script.onerror = () => reject(new Error(`Failed to load ${src}`));
+        document.head.appendChild(script);
+    });
+}
+
+function roundLandmark(value) {
+    return Math.round(value * 10000) / 10000;
+}
+
+class LandmarkExtractor {
+    constructor(kind) {
+        this.kind = kind; // 'hands' or 'face'
+        this.model = null;
+        this.latest = null;
+    }
+    
+    async init() {
+        if (this.kind === 'hands') {
+            await loadScript(`${MEDIAPIPE_CDN}/hands/hands.js`);
+            this.model = new Hands({ locateFile: file => `${MEDIAPIPE_CDN}/hands/${file}` });
+            this.model.setOptions({
+                maxNumHands: 1,
+                modelComplexity: 0,
+                minDetectionConfidence: 0.5,
+                minTrackingConfidence: 0.5
+            });
+        } else {
+            await loadScript(`${MEDIAPIPE_CDN}/face_mesh/face_mesh.js`);
+            this.model = new FaceMesh({ locateFile: file => `${MEDIAPIPE_CDN}/face_mesh/${file}` });
+            this.model.setOptions({
+                maxNumFaces: 1,
+                refineLandmarks: false,
+                minDetectionConfidence: 0.5,
+                minTrackingConfidence: 0.5
+            });
+        }
+        this.model.onResults(results => { this.latest = results; });
+        console.log(`[AMG] Local ${this.kind} landmark extraction ready`);
+    }
+    
+    // Flat [x, y, z] * 21 for the first hand, or null
+    async handLandmarks(video) {
+        await this.model.send({ image: video });
+        const hands = this.latest && this.latest.multiHandLandmarks;
+        if (!hands || hands.length === 0) return null;
+        return hands[0].flatMap(p => [roundLandmark(p.x), roundLandmark(p.y), roundLandmark(p.z)]);
+    }
+    
+    // Flat [x, y] for the 40 lip contour ids, or null
+    async lipLandmarks(video) {
+        await this.model.send({ image: video });
+        const faces = this.latest && this.latest.multiFaceLandmarks;
+        if (!faces || faces.length === 0) return null;
+        return LIP_LANDMARK_IDS.flatMap(id => [roundLandmark(faces[0][id].x), roundLandmark(faces[0][id].y)]);
+    }
+}
+
+async function createLandmarkExtractor(kind) {
+    if (!landmarkModeEnabled) return null;
+    try {
+        const extractor = new LandmarkExtractor(kind);
+        await extractor.init();
+        return extractor;
+    } catch (error) {
+        console.warn('[AMG] Landmark mode unavailable, falling back to JPEG upload:', error);
+        return null;
+    }
+}
+
+// ============================================
+// CAPTURE PROFILES
+// ============================================
+// The server decides how each pipeline uploads frames: the size the model
+// actually uses, JPEG quality and (lip reading) a crop around the last face.
+// Updated profiles arrive with prediction responses.
+
+class CaptureProfile {
+    constructor(pipeline) {
+        this.pipeline = pipeline;
+        this.profile = { version: null, width: 960, height: 720, quality: 0.8, roi: null };
+        this.refresh();
+    }
+    
+    async refresh() {
+        try {
+            const response = await fetch(`/capture_profile?pipeline=${this.pipeline}&session_id=${clientSessionId}`);
+            const data = await response.json();
+            this.update(data.profile);
+        } catch (error) {
+            console.warn('[AMG] Capture profile unavailable, using defaults:', error);
+        }
+    }
+    
+    update(profile) {
+        if (profile) this.profile = profile;
+    }
+    
+    // Draw the ROI (or whole frame) fitted into the profile size; returns the upload fields
+    capture(video, canvas) {
+        const { width, height, quality, roi, version } = this.profile;
+        const vw = video.videoWidth || 960;
+        const vh = video.videoHeight || 720;
+        const [x1, y1, x2, y2] = roi || [0, 0, 1, 1];
+        const sx = x1 * vw, sy = y1 * vh, sw = (x2 - x1) * vw, sh = (y2 - y1) * vh;
+        const scale = Math.min(1, width / sw, height / sh);
+        
+        canvas.width = Math.max(1, Math.round(sw * scale));
+        canvas.height = Math.max(1, Math.round(sh * scale));
+        canvas.getContext('2d').drawImage(video, sx, sy, sw, sh, 0, 0, canvas.width, canvas.height);
+        
+        return { image: canvas.toDataURL('image/jpeg', quality), roi: roi, profile_version: version };
+    }
+}
+
+// ============================================
+// SLIM FRAME RESPONSES
+// ============================================
+// Static data (class list, vocabulary, thresholds) comes once from
+// /session/handshake. Per-frame responses then only carry prediction,
+// confidence, bbox, status and a [keep, append] delta of the running text.
+// ?frames=binary (or localStorage signeaseFrameFormat=binary) asks for the
+// packed encoding of frame_protocol.py instead of JSON.
+
+const FRAME_CONTENT_TYPE = 'application/x-signease-frame';
+const binaryFramesEnabled = (
+    new URLSearchParams(window.location.search).get('frames') === 'binary' ||
+    localStorage.getItem('signeaseFrameFormat') === 'binary'
+);
+const frameTextDecoder = new TextDecoder();
+let handshakeRequest = null;
+
+function sessionHandshake(refresh = false) {
+    if (!handshakeRequest || refresh) {
+        handshakeRequest = fetch(`/session/handshake?session_id=${clientSessionId}`)
+            .then(response => response.json())
+            .catch(error => {
+                console.warn('[AMG] Session handshake failed:', error);
+                handshakeRequest = null;
+                return null;
+            });
+    }
+    return handshakeRequest;
+}
+
+// Inverse of frame_protocol.pack_frame
+function decodeFrame(buffer) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    if (view.getUint8(0) !== 0x53 || view.getUint8(1) !== 0x46 || view.getUint8(2) !== 1) {
+        throw new Error('Unsupported frame encoding');
+    }
+    const flags = view.getUint8(3);
+    let offset = 6;
+    
+    const readString = (wide) => {
+        const length = wide ? view.getUint16(offset, true) : view.getUint8(offset);
+        offset += wide ? 2 : 1;
+        const value = frameTextDecoder.decode(bytes.subarray(offset, offset + length));
+        offset += length;
+        return value;
+    };
+    
+    const frame = {
+        confidence: view.getUint16(4, true) / 65535,
+        prediction: readString(false) || null,
+        status: readString(false),
+        stale: Boolean(flags & 0x04)
+    };
+    if (flags & 0x01) {
+        frame.bbox = [0, 1, 2, 3].map(i => view.getInt16(offset + i * 2, true));
+        offset += 8;
+    }
+    if (flags & 0x02) {
+        const keep = view.getUint16(offset, true);
+        offset += 2;
+        frame.text = [keep, readString(true)];
+    }
+    if (flags & 0x08) {
+        frame.capture_profile = JSON.parse(readString(true));
+    }
+    return frame;
+}
+
+// 429 (session rate limit) / 503 (server saturated): pause uploads for Retry-After
+function retryAfterMs(response) {
+    if (response.status !== 429 && response.status !== 503) return 0;
+    const seconds = parseFloat(response.headers.get('Retry-After'));
+    return (Number.isFinite(seconds) ? seconds : 1) * 1000;
+}
+
+class SlimFrames {
+    constructor() {
+        this.metadata = null;
+        this.chars = [];   // running text as code points (the server counts Python characters)
+        this.refreshing = null;
+        this.ready = this.refresh(false);
+    }
+    
+    refresh(force = true) {
+        if (!this.refreshing) {
+            this.refreshing = sessionHandshake(force).then(metadata => {
+                if (metadata) this.metadata = metadata;
+                this.refreshing = null;
+                return this.metadata;
+            });
+        }
+        return this.refreshing;
+    }
+    
+    // Fields added to each prediction request
+    requestFields() {
+        return {
+            slim: true,
+            metadata_version: this.metadata ? this.metadata.metadata_version : null,
+            text_length: this.chars.length,
+            format: binaryFramesEnabled ? 'binary' : 'json'
+        };
+    }
+    
+    // Decode a slim response and rebuild current_text from the delta
+    async read(response) {
+        const contentType = response.headers.get('Content-Type') || '';
+        const frame = contentType.startsWith(FRAME_CONTENT_TYPE)
+            ? decodeFrame(await response.arrayBuffer())
+            : await response.json();
+        
+        if (frame.text) {
+            const [keep, append] = frame.text;
+            this.chars = this.chars.slice(0, keep).concat(Array.from(append));
+        }
+        frame.current_text = this.chars.join('');
+        if (frame.stale) this.refresh();
+        return frame;
+    }
+}
+
 // ============================================
 // YOLOV11 ASL CAMERA CLASS - ENHANCED
 // ============================================
@@ -101,6 +370,8 @@ class ASLCamera {
         this.stream = null;
         this.isProcessing = false;
         this.processingInterval = null;
+        this.landmarkExtractor = null;
+        this.landmarkUnavailable = false;  // the server has no trained landmark index (409)
         this.currentText = "";
         this.lastPrediction = null;
         this.lastAddedSign = null;
@@ -116,10 +387,9 @@ class ASLCamera {
             model_loaded: false 
         };
         
-        if (this.canvasElement) {
-            this.canvasElement.width = 960;
-            this.canvasElement.height = 720;
-        }
+        this.captureProfile = new CaptureProfile('asl');
+        this.frames = new SlimFrames();
+        this.retryAt = 0;
         
         console.log('[AMG] YOLOv11 ASL Camera initialized');
         this.checkModelStatus();
@@ -141,14 +411,14 @@ class ASLCamera {
     
     async checkModelStatus() {
         try {
-            const response = await fetch('/system_status');
-            const status = await response.json();
+            const metadata = await this.frames.ready;
+            if (!metadata) throw new Error('Session handshake failed');
             
-            if (status.yolo && status.yolo.available) {
+            if (metadata.asl.available) {
                 this.stats.model_loaded = true;
                 const statusEl = document.getElementById('yoloStatus');
                 if (statusEl) {
-                    statusEl.innerHTML = `Model Ready - ${status.signs.total} signs loaded`;
+                    statusEl.innerHTML = `Model Ready - ${metadata.asl.classes.length} signs loaded`;
                     statusEl.style.color = '#04BFAD';
                 }
                 
@@ -159,10 +429,10 @@ class ASLCamera {
                 
                 const totalSignsEl = document.getElementById('yoloTotalSigns');
                 if (totalSignsEl) {
-                    totalSignsEl.textContent = status.signs.total;
+                    totalSignsEl.textContent = metadata.asl.classes.length;
                 }
                 
-                console.log('[AMG] YOLOv11 Model Ready:', status.signs.available);
+                console.log('[AMG] YOLOv11 Model Ready:', metadata.asl.classes);
                 showNotification('YOLOv11 Model Ready', 'success');
             } else {
                 const statusEl = document.getElementById('yoloStatus');
@@ -260,6 +530,10 @@ class ASLCamera {
         this.updateStatus('YOLOv11 detection active...', 'success');
         showNotification('Detection started', 'success');
         
+        if (landmarkModeEnabled && !this.landmarkExtractor && !this.landmarkUnavailable) {
+            createLandmarkExtractor('hands').then(extractor => { this.landmarkExtractor = extractor; });
+        }
+        
         // Process every 500ms (2 FPS for accuracy)
         this.processingInterval = setInterval(() => {
             this.captureAndPredict();
@@ -281,23 +555,38 @@ class ASLCamera {
     }
     
     async captureAndPredict() {
-        if (!this.isProcessing) return;
+        if (!this.isProcessing || Date.now() < this.retryAt) return;
         
         try {
-            const ctx = this.canvasElement.getContext('2d');
-            ctx.drawImage(this.videoElement, 0, 0, 960, 720);
-            
-            const imageData = this.canvasElement.toDataURL('image/jpeg', 0.8);
-            
-            const response = await fetch('/predict_asl', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ image: imageData })
-            });
+            let response;
+            if (this.landmarkExtractor) {
+                const landmarks = await this.landmarkExtractor.handLandmarks(this.videoElement);
+                response = await fetch('/predict_asl_landmarks', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ landmarks: landmarks, session_id: clientSessionId, ...this.frames.requestFields() })
+                });
+            } else {
+                const upload = this.captureProfile.capture(this.videoElement, this.canvasElement);
+                
+                response = await fetch('/predict_asl', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ ...upload, session_id: clientSessionId, ...this.frames.requestFields() })
+                });
+            }
             
             if (response.ok) {
-                const result = await response.json();
+                const result = await this.frames.read(response);
+                this.captureProfile.update(result.capture_profile);
                 this.handlePrediction(result);
+            } else if (response.status === 409 && this.landmarkExtractor) {
+                console.warn('[AMG] No trained landmark index on the server, falling back to JPEG upload');
+                this.landmarkExtractor = null;
+                this.landmarkUnavailable = true;
+            } else if (retryAfterMs(response)) {
+                this.retryAt = Date.now() + retryAfterMs(response);
+                this.updateStatus('Server busy - retrying shortly', 'info');
             } else {
                 console.error('[AMG] Prediction failed:', response.status);
             }
@@ -310,7 +599,7 @@ class ASLCamera {
     handlePrediction(result) {
         const { prediction, confidence, current_text, status, model_loaded, frame_count, total_signs } = result;
         
-        this.stats.model_loaded = model_loaded;
+        if (model_loaded !== undefined) this.stats.model_loaded = model_loaded;
         
         // Update frame counter with animation
         const framesEl = document.getElementById('yoloFrames');
@@ -417,7 +706,8 @@ class ASLCamera {
         
         fetch('/clear_text', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ session_id: clientSessionId })
         }).catch(err => console.error(err));
         
         showNotification('Text cleared', 'info');
@@ -473,6 +763,7 @@ class LipReadingCamera {
         this.stream = null;
         this.isProcessing = false;
         this.processingInterval = null;
+        this.landmarkExtractor = null;
         this.currentText = '';
         
         this.currentPrediction = null;
@@ -486,10 +777,9 @@ class LipReadingCamera {
             frames: 0
         };
         
-        if (this.canvasElement) {
-            this.canvasElement.width = 960;
-            this.canvasElement.height = 720;
-        }
+        this.captureProfile = new CaptureProfile('lip');
+        this.frames = new SlimFrames();
+        this.retryAt = 0;
         
         console.log('[AMG] Lip Reading Camera initialized');
         this.ensureInterfaceVisible();
@@ -576,6 +866,10 @@ class LipReadingCamera {
         this.updateStatus('Lip reading active - Speak clearly!', 'success');
         showNotification('Lip reading started', 'success');
         
+        if (landmarkModeEnabled && !this.landmarkExtractor) {
+            createLandmarkExtractor('face').then(extractor => { this.landmarkExtractor = extractor; });
+        }
+        
         // Process every 200ms (5 FPS)
         this.processingInterval = setInterval(() => {
             this.captureAndPredict();
@@ -595,7 +889,7 @@ class LipReadingCamera {
     }
     
     async captureAndPredict() {
-        if (!this.isProcessing) return;
+        if (!this.isProcessing || Date.now() < this.retryAt) return;
         
         try {
             this.stats.frames++;
@@ -604,20 +898,33 @@ class LipReadingCamera {
                 frameCountEl.textContent = this.stats.frames;
             }
             
-            const ctx = this.canvasElement.getContext('2d');
-            ctx.drawImage(this.videoElement, 0, 0, 960, 720);
-            
-            const imageData = this.canvasElement.toDataURL('image/jpeg', 0.8);
-            
-            const response = await fetch('/predict_lip', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ image: imageData })
-            });
+            let response;
+            if (this.landmarkExtractor) {
+                const lips = await this.landmarkExtractor.lipLandmarks(this.videoElement);
+                response = await fetch('/predict_lip_landmarks', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        lips: lips, width: 960, height: 720, session_id: clientSessionId, ...this.frames.requestFields()
+                    })
+                });
+            } else {
+                const upload = this.captureProfile.capture(this.videoElement, this.canvasElement);
+                
+                response = await fetch('/predict_lip', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ ...upload, session_id: clientSessionId, ...this.frames.requestFields() })
+                });
+            }
             
             if (response.ok) {
-                const result = await response.json();
+                const result = await this.frames.read(response);
+                this.captureProfile.update(result.capture_profile);
                 this.handlePrediction(result);
+            } else if (retryAfterMs(response)) {
+                this.retryAt = Date.now() + retryAfterMs(response);
+                this.updateStatus('Server busy - retrying shortly', 'info');
             } else {
                 console.error('[AMG] Prediction failed:', response.status);
             }
@@ -717,7 +1024,8 @@ class LipReadingCamera {
         
         fetch('/clear_lip_text', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ session_id: clientSessionId })
         }).catch(err => console.error(err));
         
         showNotification('Output cleared', 'info');
@@ -5,6 +5,10 @@
 
 let historyData = [];
 let currentFilter = 'all';
+let currentSearch = '';
+let nextCursor = null;  // before_id for history pages, offset for search pages
+let searchTimer = null;
+const HISTORY_PAGE_SIZE = 100;
 
 // Initialize history when switching to history screen
 function initializeHistory() {
@@ -12,16 +16,26 @@ function initializeHistory() {
     updateStatistics();
 }
 
-// Load history from backend
-async function loadHistory() {
+// Load history (or search results) from backend; append=true fetches the next page
+async function loadHistory(append = false) {
     try {
         const typeParam = currentFilter !== 'all' ? `&type=${currentFilter}` : '';
-        const response = await fetch(`/get_history?limit=100${typeParam}`);
+        let url;
+        if (currentSearch) {
+            const offset = append && nextCursor !== null ? nextCursor : 0;
+            url = `/search_history?q=${encodeURIComponent(currentSearch)}&limit=${HISTORY_PAGE_SIZE}&offset=${offset}${typeParam}`;
+        } else {
+            const cursorParam = append && nextCursor !== null ? `&before_id=${nextCursor}` : '';
+            url = `/get_history?limit=${HISTORY_PAGE_SIZE}${typeParam}${cursorParam}`;
+        }
+        const response = await fetch(url);
         const data = await response.json();
         
         if (data.status === 'success') {
-            historyData = data.history;
+            historyData = append ? historyData.concat(data.history) : data.history;
+            nextCursor = data.has_more ? (currentSearch ? data.next_offset : data.next_before_id) : null;
             displayHistory(historyData);
+            updateLoadMoreButton();
         } else {
             console.error('Failed to load history');
         }
@@ -30,6 +44,37 @@ async function loadHistory() {
     }
 }
 
+// Load the next page of older entries
+function loadMoreHistory() {
+    if (nextCursor !== null) {
+        loadHistory(true);
+    }
+}
+
+// Full-text search (debounced while typing)
+function searchHistory() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => {
+        const searchInput = document.getElementById('historySearch');
+        currentSearch = searchInput ? searchInput.value.trim() : '';
+        loadHistory();
+    }, 250);
+}
+
+// Show the "Load more" button only while older entries exist
+function updateLoadMoreButton() {
+    const button = document.getElementById('loadMoreHistory');
+    if (button) {
+        button.style.display = nextCursor !== null ? 'inline-flex' : 'none';
+    }
+}
+
+// Download the full history (streamed by the server)
+function exportHistory(format) {
+    const typeParam = currentFilter !== 'all' ? `&type=${currentFilter}` : '';
+    window.location.href = `/export_history?format=${format}${typeParam}`;
+}
+
 // Display history entries
 function displayHistory(history) {
     const historyList = document.getElementById('historyList');
@@ -89,11 +134,11 @@ function createHistoryEntryHTML(entry) {
             <div class="history-content">
                 <div class="history-input">
                     <div class="history-label">Input</div>
-                    <div class="history-text">${entry.input_text || 'Camera/Microphone Input'}</div>
+                    <div class="history-text">${entry.input_highlight || entry.input_text || 'Camera/Microphone Input'}</div>
                 </div>
                 <div class="history-output">
                     <div class="history-label">Output</div>
-                    <div class="history-text">${entry.output_text || 'No output'}</div>
+                    <div class="history-text">${entry.output_highlight || entry.output_text || 'No output'}</div>
                 </div>
             </div>
             
@@ -267,7 +312,10 @@ async function saveToHistory(type, input, output, confidence = 0, method = '', d
 window.historyModule = {
     saveToHistory,
     initializeHistory,
-    refreshHistory
+    refreshHistory,
+    loadMoreHistory,
+    exportHistory,
+    searchHistory
 };
 
 // Auto-load when history screen is shown
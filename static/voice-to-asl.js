@@ -1,14 +1,111 @@
 // Voice-to-ASL with GIF/Animation Display
+
+// Streams microphone audio to the server's local recognizer (/speech/stream):
+// 16 kHz int16 PCM chunks are posted every 250 ms, transcripts and their ASL
+// conversion come back over one EventSource. Audio never leaves the server.
+class LocalSpeechStream {
+    constructor(handlers) {
+        this.handlers = handlers;   // { partial, segment, final }
+        this.streamId = null;
+        this.pending = [];
+        this.pendingLength = 0;
+        this.sending = Promise.resolve();
+    }
+
+    async start() {
+        const response = await fetch('/speech/stream', { method: 'POST' });
+        const opened = await response.json();
+        if (opened.status !== 'success') {
+            throw new Error(opened.message);
+        }
+        this.streamId = opened.stream_id;
+        this.sampleRate = opened.sample_rate;
+
+        this.media = await navigator.mediaDevices.getUserMedia({
+            audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true }
+        });
+        this.context = new (window.AudioContext || window.webkitAudioContext)();
+        const source = this.context.createMediaStreamSource(this.media);
+        this.processor = this.context.createScriptProcessor(4096, 1, 1);
+        this.processor.onaudioprocess = (event) => this.collect(event.inputBuffer.getChannelData(0));
+        source.connect(this.processor);
+        this.processor.connect(this.context.destination);
+
+        this.events = new EventSource(`/speech/stream/${this.streamId}/events`);
+        ['partial', 'segment', 'final'].forEach(kind => {
+            this.events.addEventListener(kind, (event) => this.handlers[kind](JSON.parse(event.data)));
+        });
+        this.events.addEventListener('end', () => this.events.close());
+        this.sendTimer = setInterval(() => this.flush(), 250);
+    }
+
+    // Average down to the server sample rate and convert to int16
+    collect(samples) {
+        const ratio = this.context.sampleRate / this.sampleRate;
+        const length = Math.floor(samples.length / ratio);
+        const pcm = new Int16Array(length);
+        for (let i = 0; i < length; i++) {
+            const start = Math.floor(i * ratio);
+            const end = Math.min(samples.length, Math.floor((i + 1) * ratio));
+            let sum = 0;
+            for (let j = start; j < end; j++) sum += samples[j];
+            const value = sum / Math.max(1, end - start);
+            pcm[i] = Math.max(-1, Math.min(1, value)) * 0x7fff;
+        }
+        this.pending.push(pcm);
+        this.pendingLength += length;
+    }
+
+    flush() {
+        if (!this.pendingLength) return;
+        const chunk = new Int16Array(this.pendingLength);
+        let offset = 0;
+        this.pending.forEach(part => {
+            chunk.set(part, offset);
+            offset += part.length;
+        });
+        this.pending = [];
+        this.pendingLength = 0;
+
+        // Chained so chunks reach the recognizer in order
+        this.sending = this.sending
+            .then(() => fetch(`/speech/stream/${this.streamId}/audio`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: chunk.buffer
+            }))
+            .catch(error => console.error('Audio upload failed:', error));
+    }
+
+    async stop() {
+        clearInterval(this.sendTimer);
+        if (this.processor) this.processor.disconnect();
+        if (this.media) this.media.getTracks().forEach(track => track.stop());
+        if (this.context) this.context.close();
+        this.flush();
+        await this.sending;
+        if (this.streamId) {
+            // The last final arrives on the event stream, followed by 'end'
+            await fetch(`/speech/stream/${this.streamId}/close`, { method: 'POST' });
+        }
+    }
+}
+
 class VoiceToASL {
     constructor() {
         this.recognition = null;
+        this.localStream = null;
+        this.useLocalRecognizer = false;
         this.isListening = false;
         this.isInitialized = false;
+        this.transcript = '';
+        this.playbackEnd = 0;
+        this.animationToken = 0;
 
         console.log('VoiceToASL constructor called');
         
         setTimeout(() => {
-            this.initSpeechRecognition();
+            this.chooseRecognizer();
         }, 500);
 
         // Map words to GIF/animation paths
@@ -103,6 +200,79 @@ class VoiceToASL {
         };
     }
 
+    // Prefer the server's local recognizer (works offline); fall back to the browser's
+    async chooseRecognizer() {
+        try {
+            const response = await fetch('/speech/status');
+            const status = await response.json();
+            if (status.speech && status.speech.available) {
+                this.useLocalRecognizer = true;
+                this.isInitialized = true;
+                console.log('Using local streaming speech recognition');
+                return;
+            }
+        } catch (error) {
+            console.warn('Local speech recognition status unavailable:', error);
+        }
+        this.initSpeechRecognition();
+    }
+
+    async startLocalStream() {
+        this.localStream = new LocalSpeechStream({
+            partial: (event) => this.showTranscript(event.text),
+            segment: (event) => this.handleRecognized(event),
+            final: (event) => this.handleRecognized(event)
+        });
+        try {
+            await this.localStream.start();
+            this.isListening = true;
+            this.updateMicrophoneUI(true);
+            this.showStatusMessage('Listening... Speak now!');
+        } catch (error) {
+            console.error('Local speech recognition error:', error);
+            this.localStream = null;
+            this.isListening = false;
+            this.updateMicrophoneUI(false);
+            this.showStatusMessage('Error: ' + error.message);
+        }
+    }
+
+    // Segments and finals arrive already converted by the server's text-to-ASL
+    handleRecognized(event) {
+        if (event.text) {
+            this.transcript = this.transcript ? `${this.transcript} ${event.text}` : event.text;
+        }
+        this.showTranscript('');
+        this.playConverted(event.words || [], event.animations || []);
+    }
+
+    showTranscript(interim) {
+        const transcriptionElement = document.querySelector('#voice-to-asl-screen .transcribed-text');
+        if (transcriptionElement) {
+            const text = [this.transcript, interim].filter(Boolean).join(' ');
+            transcriptionElement.textContent = text || 'Your speech will appear here...';
+        }
+    }
+
+    // Queue animations behind the ones still playing (2.5 s each)
+    playConverted(words, animations) {
+        const animationArea = document.querySelector('#voice-to-asl-screen .animation-area');
+        if (!animationArea) return;
+
+        words.forEach((word, index) => {
+            const now = Date.now();
+            const delay = Math.max(0, this.playbackEnd - now);
+            this.playbackEnd = Math.max(this.playbackEnd, now) + 2500;
+            setTimeout(() => {
+                if (animations[index]) {
+                    this.showGifAnimation(animationArea, animations[index], word);
+                } else {
+                    this.showTextAnimation(animationArea, word);
+                }
+            }, delay);
+        });
+    }
+
     initSpeechRecognition() {
         console.log('Initializing speech recognition...');
         
@@ -255,6 +425,7 @@ class VoiceToASL {
     }
 
     showGifAnimation(container, gifPath, word) {
+        const token = ++this.animationToken;
         // Clear container
         container.innerHTML = '';
         
@@ -302,13 +473,14 @@ class VoiceToASL {
         wrapper.appendChild(gifImage);
         container.appendChild(wrapper);
 
-        // Auto-clear after animation duration
+        // Auto-clear after animation duration (unless a newer animation replaced it)
         setTimeout(() => {
-            this.resetAnimationArea();
+            if (token === this.animationToken) this.resetAnimationArea();
         }, 3000);
     }
 
     showTextAnimation(container, word) {
+        const token = ++this.animationToken;
         // Clear container
         container.innerHTML = '';
         
@@ -346,7 +518,7 @@ class VoiceToASL {
 
         // Auto-clear
         setTimeout(() => {
-            this.resetAnimationArea();
+            if (token === this.animationToken) this.resetAnimationArea();
         }, 2500);
     }
 
@@ -369,6 +541,15 @@ class VoiceToASL {
             return;
         }
 
+        if (this.useLocalRecognizer) {
+            if (this.isListening) {
+                this.stopListening();
+            } else {
+                this.startLocalStream();
+            }
+            return;
+        }
+
         if (!this.recognition) {
             console.error('No recognition object available');
             this.showStatusMessage('Speech recognition not available');
@@ -395,6 +576,15 @@ class VoiceToASL {
     stopListening() {
         console.log('Stop listening called');
         
+        if (this.localStream) {
+            const stream = this.localStream;
+            this.localStream = null;
+            this.isListening = false;
+            this.updateMicrophoneUI(false);
+            stream.stop().catch(error => console.error('Error stopping local recognition:', error));
+            return;
+        }
+        
         if (this.recognition && this.isListening) {
             try {
                 this.recognition.stop();
@@ -469,6 +659,7 @@ class VoiceToASL {
             transcriptionElement.textContent = 'Your speech will appear here...';
         }
         
+        this.transcript = '';
         this.resetAnimationArea();
     }
 }